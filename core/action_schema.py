@@ -0,0 +1,209 @@
+import ast
+import json
+import re
+
+ACTION_TYPES = [
+    'app_search_open', 'screen_click', 'screen_type', 'web_search',
+    'multi_step_task', 'analyze_and_recommend', 'web_intelligent', 'key_press'
+]
+
+# JSON Schema passed to Ollama's `format` option so decoding is constrained to it
+RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'type': {'type': 'string', 'enum': ACTION_TYPES},
+        'reasoning': {'type': 'string'},
+        'app_to_search': {'type': 'string'},
+        'coordinates': {'type': 'array', 'items': {'type': 'number'}, 'minItems': 2, 'maxItems': 2},
+        'target_element': {'type': 'string'},
+        'text_to_type': {'type': 'string'},
+        'query': {'type': 'string'},
+        'url': {'type': 'string'},
+        'key': {'type': 'string'},
+        'steps': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'action': {'type': 'string', 'enum': ['open_app', 'click', 'type', 'press_key', 'web_search', 'wait']},
+                    'target': {'type': ['string', 'array']},
+                    'text': {'type': 'string'},
+                    'key': {'type': 'string'},
+                    'query': {'type': 'string'},
+                    'seconds': {'type': 'number'},
+                    'success': {'type': 'object'}
+                },
+                'required': ['action']
+            }
+        },
+        'confidence': {'type': 'number'}
+    },
+    'required': ['type']
+}
+
+# Per-action requirements on top of the shared schema; a tuple means "any one of"
+ACTION_REQUIREMENTS = {
+    'app_search_open': ['app_to_search'],
+    'screen_click': [('coordinates', 'target_element')],
+    'screen_type': ['text_to_type'],
+    'web_search': ['query'],
+    'multi_step_task': ['steps'],
+    'analyze_and_recommend': [],
+    'web_intelligent': ['url'],
+    'key_press': ['key']
+}
+
+JSON_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'number': (int, float),
+    'integer': int,
+    'boolean': bool
+}
+
+
+class ActionValidationError(ValueError):
+    pass
+
+
+def compile_validator(schema, path='$'):
+    """Compile a JSON Schema subset (type, enum, properties, required, items, min/maxItems) into a checker.
+
+    The returned function raises ActionValidationError on the first violation.
+    Compiling once up front avoids walking the schema dict on every response.
+    """
+    checks = []
+
+    if 'type' in schema:
+        names = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        python_types = []
+        for name in names:
+            python_type = JSON_TYPES[name]
+            python_types.extend(python_type if isinstance(python_type, tuple) else (python_type,))
+        python_types = tuple(python_types)
+        rejects_bool = 'boolean' not in names
+
+        def check_type(value, path):
+            if not isinstance(value, python_types) or (rejects_bool and isinstance(value, bool)):
+                raise ActionValidationError(f"{path}: expected {'/'.join(names)}")
+        checks.append(check_type)
+
+    if 'enum' in schema:
+        allowed = frozenset(schema['enum'])
+
+        def check_enum(value, path):
+            if value not in allowed:
+                raise ActionValidationError(f"{path}: '{value}' is not one of {sorted(allowed)}")
+        checks.append(check_enum)
+
+    if 'properties' in schema or 'required' in schema:
+        properties = {
+            name: compile_validator(subschema, f"{path}.{name}")
+            for name, subschema in schema.get('properties', {}).items()
+        }
+        required = tuple(schema.get('required', []))
+
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    raise ActionValidationError(f"{path}: missing '{name}'")
+            for name, validator in properties.items():
+                if name in value and value[name] is not None:
+                    validator(value[name], f"{path}.{name}")
+        checks.append(check_object)
+
+    if 'items' in schema or 'minItems' in schema or 'maxItems' in schema:
+        item_validator = compile_validator(schema['items'], f"{path}[]") if 'items' in schema else None
+        min_items = schema.get('minItems', 0)
+        max_items = schema.get('maxItems')
+
+        def check_array(value, path):
+            if not isinstance(value, list):
+                return
+            if len(value) < min_items or (max_items is not None and len(value) > max_items):
+                raise ActionValidationError(f"{path}: wrong number of items ({len(value)})")
+            if item_validator:
+                for i, item in enumerate(value):
+                    item_validator(item, f"{path}[{i}]")
+        checks.append(check_array)
+
+    def validate(value, path=path):
+        for check in checks:
+            check(value, path)
+        return value
+
+    return validate
+
+
+validate_response_schema = compile_validator(RESPONSE_SCHEMA)
+
+
+def validate_action(data):
+    """Validate a decoded response and return a normalized action dict"""
+    validate_response_schema(data)
+
+    action = {key: value for key, value in data.items() if value not in (None, '')}
+    for requirement in ACTION_REQUIREMENTS[action['type']]:
+        names = requirement if isinstance(requirement, tuple) else (requirement,)
+        if not any(action.get(name) not in (None, '', []) for name in names):
+            raise ActionValidationError(f"$: {action['type']} requires {' or '.join(names)}")
+
+    if 'coordinates' in action:
+        action['coordinates'] = (int(action['coordinates'][0]), int(action['coordinates'][1]))
+    if 'confidence' in action:
+        action['confidence'] = max(0.0, min(1.0, float(action['confidence'])))
+    return action
+
+
+# Quoted strings are matched first so the bare words are only replaced outside them
+JSON_LITERAL = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|\b(?:true|false|null)\b')
+PYTHON_LITERALS = {'true': 'True', 'false': 'False', 'null': 'None'}
+
+
+def extract_json_object(text):
+    """Return the first balanced {...} block in text, ignoring braces inside strings"""
+    start = text.find('{')
+    if start == -1:
+        return text
+    depth = 0
+    in_string = None
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == in_string:
+                in_string = None
+        elif char in ('"', "'"):
+            in_string = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def repair_json(text):
+    """Last-resort local repair: code fences, surrounding prose, trailing commas, Python-style literals"""
+    text = re.sub(r'^```(?:json)?|```$', '', text.strip(), flags=re.MULTILINE).strip()
+    text = extract_json_object(text)
+    text = re.sub(r',(\s*[}\]])', r'\1', text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    # Single-quoted keys/strings and True/False/None parse as a Python literal;
+    # words inside string values ("type true story") are left alone
+    literal = JSON_LITERAL.sub(lambda m: PYTHON_LITERALS.get(m.group(), m.group()), text)
+    value = ast.literal_eval(literal)
+    if not isinstance(value, dict):
+        raise ValueError("response is not an object")
+    return value
@@ -0,0 +1,270 @@
+import time
+import weakref
+import numpy as np
+
+# One row per detected element: 36 bytes instead of a dict of tuples
+ELEMENT_DTYPE = np.dtype([
+    ('x', '<i4'), ('y', '<i4'), ('w', '<i4'), ('h', '<i4'),
+    ('px', '<i4'), ('py', '<i4'),
+    ('area', '<f4'), ('confidence', '<f4'), ('flags', '<u4')
+])
+
+ELEMENT_KINDS = ('buttons', 'text_fields', 'images')
+
+# Widget roles reported by accessibility sources, stored as 1 + index in
+# 'flags'; 0 means the element came from pixel detection and has no role
+ELEMENT_ROLES = (
+    'push button', 'toggle button', 'check box', 'radio button', 'menu item', 'link',
+    'combo box', 'page tab', 'text', 'entry', 'password text', 'spin button',
+    'image', 'icon', 'list item', 'table cell', 'tree item'
+)
+ROLE_FLAGS = {role: i + 1 for i, role in enumerate(ELEMENT_ROLES)}
+
+
+class Element:
+    """One detected element; also answers element['position'] / element.get('text') like the old dicts"""
+
+    __slots__ = ('position', 'bounds', 'area', 'confidence', 'text', 'role')
+
+    def __init__(self, position, bounds, area=0.0, confidence=1.0, text=None, role=None):
+        self.position = position
+        self.bounds = bounds
+        self.area = area
+        self.confidence = confidence
+        self.text = text
+        self.role = role
+
+    def __getitem__(self, key):
+        if key not in self.__slots__ or (key in ('text', 'role') and getattr(self, key) is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_json(self):
+        data = {
+            'position': list(self.position),
+            'bounds': list(self.bounds),
+            'area': self.area,
+            'confidence': self.confidence
+        }
+        if self.text is not None:
+            data['text'] = self.text
+        if self.role is not None:
+            data['role'] = self.role
+        return data
+
+    def __repr__(self):
+        label = f' {self.text!r}' if self.text is not None else ''
+        if self.role is not None:
+            label = f' {self.role}{label}'
+        return f'Element({self.position[0]},{self.position[1]}{label})'
+
+
+class ElementArray:
+    """Elements stored column-wise in a structured array; texts (if any) in a parallel tuple"""
+
+    __slots__ = ('records', 'texts')
+
+    def __init__(self, records=None, texts=None):
+        self.records = records if records is not None else np.zeros(0, dtype=ELEMENT_DTYPE)
+        self.texts = tuple(texts) if texts is not None else None
+
+    @classmethod
+    def from_dicts(cls, elements, with_text=False):
+        """Pack detector output ({'position', 'bounds', 'area'?, 'confidence'?, 'text'?, 'role'?})"""
+        records = np.zeros(len(elements), dtype=ELEMENT_DTYPE)
+        for i, element in enumerate(elements):
+            x, y, w, h = element['bounds']
+            px, py = element['position']
+            records[i] = (x, y, w, h, px, py, element.get('area', w * h), element.get('confidence', 1.0),
+                          ROLE_FLAGS.get(element.get('role'), 0))
+        texts = [element.get('text', '') for element in elements] if with_text else None
+        return cls(records, texts)
+
+    @classmethod
+    def concatenate(cls, arrays):
+        arrays = list(arrays)
+        if not arrays:
+            return cls()
+        records = np.concatenate([a.records for a in arrays])
+        texts = None
+        if any(a.texts is not None for a in arrays):
+            texts = [t for a in arrays for t in (a.texts if a.texts is not None else [''] * len(a))]
+        return cls(records, texts)
+
+    def map_to_screen(self, left, top, scale):
+        """Image coordinates -> screen coordinates, in place and vectorized"""
+        records = self.records
+        for axis, origin in (('x', left), ('px', left), ('y', top), ('py', top)):
+            records[axis] = origin + (records[axis] / scale).astype('<i4')
+        for axis in ('w', 'h'):
+            records[axis] = (records[axis] / scale).astype('<i4')
+        return self
+
+    def element(self, index):
+        row = self.records[index]
+        return Element(
+            (int(row['px']), int(row['py'])),
+            (int(row['x']), int(row['y']), int(row['w']), int(row['h'])),
+            float(row['area']),
+            float(row['confidence']),
+            self.texts[index] if self.texts is not None else None,
+            ELEMENT_ROLES[row['flags'] - 1] if row['flags'] else None
+        )
+
+    def __len__(self):
+        return len(self.records)
+
+    def __bool__(self):
+        return len(self.records) > 0
+
+    def __iter__(self):
+        for i in range(len(self.records)):
+            yield self.element(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ElementArray(self.records[index], self.texts[index] if self.texts is not None else None)
+        if index < 0:
+            index += len(self.records)
+        if not 0 <= index < len(self.records):
+            raise IndexError(index)
+        return self.element(index)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def positions(self):
+        """(N, 2) array of element centers"""
+        return np.stack([self.records['px'], self.records['py']], axis=1)
+
+    def to_json(self):
+        rows = self.records.tolist()
+        texts = self.texts or (None,) * len(rows)
+        result = []
+        for (x, y, w, h, px, py, area, confidence, flags), text in zip(rows, texts):
+            data = {'position': [px, py], 'bounds': [x, y, w, h], 'area': area, 'confidence': round(confidence, 4)}
+            if text is not None:
+                data['text'] = text
+            if flags:
+                data['role'] = ELEMENT_ROLES[flags - 1]
+            result.append(data)
+        return result
+
+    def __repr__(self):
+        return f'ElementArray({len(self)} elements)'
+
+
+class ScreenAnalysis:
+    """Result of one screen analysis.
+
+    Readable like the dict it replaces (analysis.get('text_content'),
+    analysis['ui_elements']). The screenshot is only weakly referenced:
+    ScreenIntelligence keeps the latest capture alive, so holding on to
+    old analyses never pins full-resolution frames.
+    """
+
+    __slots__ = (
+        'text_content', 'text_boxes', 'ui_elements', 'clickable_areas', 'current_app',
+        'screen_layout', 'capture_region', 'scale', 'timestamp', '_screenshot', '__weakref__'
+    )
+
+    FIELDS = (
+        'screenshot', 'text_content', 'text_boxes', 'ui_elements', 'clickable_areas',
+        'current_app', 'screen_layout', 'capture_region', 'scale', 'timestamp'
+    )
+
+    def __init__(self, text_content='', text_boxes=None, ui_elements=None, clickable_areas=None,
+                 current_app=None, screen_layout=None, capture_region=None, scale=1.0, screenshot=None):
+        self.text_content = text_content
+        self.text_boxes = text_boxes if text_boxes is not None else ElementArray(texts=())
+        self.ui_elements = ui_elements if ui_elements is not None else {kind: ElementArray() for kind in ELEMENT_KINDS}
+        self.clickable_areas = clickable_areas if clickable_areas is not None else ElementArray()
+        self.current_app = current_app or {}
+        self.screen_layout = screen_layout or {'screen_size': (0, 0), 'regions': {}}
+        self.capture_region = capture_region
+        self.scale = scale
+        self.timestamp = time.time()
+        self._screenshot = None
+        self.screenshot = screenshot
+
+    @property
+    def screenshot(self):
+        """The captured BGR image while it is still alive, else None"""
+        return self._screenshot() if self._screenshot is not None else None
+
+    @screenshot.setter
+    def screenshot(self, image):
+        self._screenshot = weakref.ref(image) if image is not None else None
+
+    def release_screenshot(self):
+        self._screenshot = None
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_json(self):
+        """JSON-ready dict without the screenshot"""
+        return {
+            'text_content': self.text_content,
+            'text_boxes': self.text_boxes.to_json(),
+            'ui_elements': {kind: elements.to_json() for kind, elements in self.ui_elements.items()},
+            'clickable_areas': self.clickable_areas.to_json(),
+            'current_app': to_json_value(self.current_app),
+            'screen_layout': to_json_value(self.screen_layout),
+            'capture_region': to_json_value(self.capture_region),
+            'scale': self.scale,
+            'timestamp': self.timestamp
+        }
+
+    def __repr__(self):
+        return (f"ScreenAnalysis(app={self.current_app.get('app_name')!r}, chars={len(self.text_content)}, "
+                f"text_boxes={len(self.text_boxes)}, clickable={len(self.clickable_areas)})")
+
+
+def to_json_value(value):
+    """Convert analysis types, NumPy values and tuples to plain JSON values.
+
+    Images and other large arrays are dropped (None); anything else that is
+    not JSON-representable raises TypeError rather than being stringified.
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if hasattr(value, 'to_json'):
+        return value.to_json()
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if isinstance(item, np.ndarray) and item.ndim > 1:
+                continue
+            result[str(key)] = to_json_value(item)
+        return result
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist() if value.ndim == 1 and value.size <= 64 else None
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+from core.tracing import tracer
+
+
+class AnalysisJob:
+    def __init__(self, prefetch):
+        self.prefetch = prefetch
+        self.claimed = not prefetch
+        self.started = time.perf_counter()
+        self.activated = None if prefetch else self.started
+        self.cancel_event = threading.Event()
+        self.claimed_event = threading.Event()
+        if self.claimed:
+            self.claimed_event.set()
+        self.done = threading.Event()
+        self.result = None
+
+    def wait_for_claim(self, max_age):
+        """Hold a prefetch after capture until an activation claims it; False if it never will"""
+        # A little past the adoption window so a last-moment claim is never lost
+        deadline = self.started + max_age + 0.25
+        while not self.claimed_event.wait(0.02):
+            if self.cancel_event.is_set() or time.perf_counter() > deadline:
+                return False
+        return not self.cancel_event.is_set()
+
+
+class AnalysisScheduler:
+    """Owns the single in-flight screen analysis.
+
+    A prefetch (started when Alt goes down) only captures the screen and
+    checks the region cache; OCR and element detection wait until the
+    activation that follows adopts it, so Alt+Tab and menu accelerators
+    never pay for them. A newer activation cancels an older analysis at its
+    next stage boundary, so presses never stack up CPU-heavy analyses.
+    """
+
+    def __init__(self, screen_intelligence, on_ready, prefetch_max_age=1.5):
+        self.screen_intelligence = screen_intelligence
+        self.on_ready = on_ready
+        self.prefetch_max_age = prefetch_max_age
+        self.current = None
+        self.latencies = deque(maxlen=200)
+        self.prefetch_hits = 0
+        self.superseded = 0
+        self._lock = threading.Lock()
+        tracer.register_metrics('activation', self.metrics)
+
+    def prefetch(self):
+        """Speculatively start an analysis before the activation key arrives"""
+        with self._lock:
+            if self.current and not self.current.done.is_set():
+                return
+            self._start(AnalysisJob(prefetch=True))
+
+    def cancel_prefetch(self):
+        """Modifier released without an activation: drop the speculative work"""
+        with self._lock:
+            job = self.current
+            if job and job.prefetch and not job.claimed:
+                job.cancel_event.set()
+
+    def request(self, trace_id=None):
+        """Activation: adopt a fresh prefetch or start (and supersede) an analysis"""
+        now = time.perf_counter()
+        with self._lock:
+            job = self.current
+            if job and job.prefetch and not job.claimed and not job.cancel_event.is_set() \
+                    and now - job.started <= self.prefetch_max_age:
+                job.claimed = True
+                job.activated = now
+                job.claimed_event.set()
+                self.prefetch_hits += 1
+                if job.done.is_set():
+                    self._deliver(job)
+                return job
+
+            if job and not job.done.is_set():
+                job.cancel_event.set()
+                self.superseded += 1
+            job = AnalysisJob(prefetch=False)
+            self._start(job, trace_id)
+            return job
+
+    def refresh(self, trace_id=None):
+        """Non-urgent re-analysis: joins the analysis in flight instead of superseding it"""
+        with self._lock:
+            job = self.current
+            if job and job.claimed and not job.done.is_set() and not job.cancel_event.is_set():
+                return job
+        return self.request(trace_id)
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+        values = {'prefetch_hits': self.prefetch_hits, 'superseded': self.superseded, 'activations': len(latencies)}
+        if latencies:
+            values['last_ready_ms'] = round(self.latencies[-1], 1)
+            values['p50_ready_ms'] = round(latencies[len(latencies) // 2], 1)
+            values['p95_ready_ms'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1)
+        return values
+
+    def _start(self, job, trace_id=None):
+        self.current = job
+        threading.Thread(target=self._run, args=(job, trace_id), name='altqu-analysis', daemon=True).start()
+
+    def _run(self, job, trace_id):
+        try:
+            with tracer.span('screen_analysis', trace_id=trace_id, prefetch=job.prefetch):
+                job.result = self.screen_intelligence.capture_and_analyze_screen(
+                    should_cancel=job.cancel_event.is_set,
+                    proceed=(lambda: job.wait_for_claim(self.prefetch_max_age)) if job.prefetch else None
+                )
+        except Exception as e:
+            print(f"Screen analysis error: {e}")
+        finally:
+            with self._lock:
+                job.done.set()
+                if job.claimed and not job.cancel_event.is_set():
+                    self._deliver(job)
+
+    def _deliver(self, job):
+        if job.result is None:
+            return
+        latency_ms = (time.perf_counter() - job.activated) * 1000
+        self.latencies.append(latency_ms)
+        with tracer.span('activation_ready', latency_ms=round(latency_ms, 1), prefetched=job.prefetch):
+            pass
+        try:
+            self.on_ready(job.result)
+        except Exception as e:
+            print(f"Error delivering screen analysis: {e}")
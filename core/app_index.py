@@ -0,0 +1,327 @@
+import difflib
+import json
+import os
+import platform
+import re
+import shlex
+import subprocess
+import threading
+import time
+
+# Spoken names mapped to the executables / desktop ids that usually provide them
+BUILTIN_ALIASES = {
+    'calculator': ['gnome-calculator', 'org.gnome.calculator', 'kcalc', 'galculator', 'calc'],
+    'calc': ['gnome-calculator', 'org.gnome.calculator', 'kcalc', 'galculator', 'calc'],
+    'vscode': ['code', 'codium'],
+    'vs code': ['code', 'codium'],
+    'notepad': ['notepad', 'gedit', 'org.gnome.gedit', 'gnome-text-editor', 'org.gnome.texteditor', 'kate', 'mousepad'],
+    'text editor': ['gedit', 'org.gnome.gedit', 'gnome-text-editor', 'org.gnome.texteditor', 'kate', 'mousepad', 'notepad'],
+    'terminal': ['gnome-terminal', 'org.gnome.terminal', 'konsole', 'xfce4-terminal', 'x-terminal-emulator', 'xterm', 'cmd'],
+    'chrome': ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome'],
+    'browser': ['firefox', 'google-chrome', 'chromium', 'chromium-browser'],
+    'files': ['nautilus', 'org.gnome.nautilus', 'dolphin', 'thunar', 'explorer'],
+    'file manager': ['nautilus', 'org.gnome.nautilus', 'dolphin', 'thunar', 'explorer'],
+    'spotify': ['spotify', 'com.spotify.client']
+}
+
+# Desktop-entry Exec field codes (%f, %U, ...) that have no meaning without arguments
+FIELD_CODE = re.compile(r'%[fFuUdDnNickvm]')
+
+# Desktop entries beat bare executables when names tie
+SOURCE_PRIORITY = {'desktop': 0, 'bundle': 1, 'path': 2}
+
+# Sources whose entries are launchable by name. Bare $PATH executables (halt,
+# reboot, rm, sh, ...) are only reachable through BUILTIN_ALIASES: app names
+# come from LLM output whose prompt includes on-screen text.
+NAMED_SOURCES = ('desktop', 'bundle')
+
+# Placeholder names the command parser produces when it did not hear an app
+NON_NAMES = ('unknown', 'none', 'null', 'app', 'application')
+
+
+def normalize_name(name):
+    return ' '.join(re.sub(r'[^a-z0-9+]+', ' ', name.lower()).split())
+
+
+def desktop_dirs():
+    """XDG application directories, most specific first"""
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+    roots = [data_home] + data_dirs.split(os.pathsep) + [
+        os.path.expanduser('~/.local/share/flatpak/exports/share'),
+        '/var/lib/flatpak/exports/share',
+        '/var/lib/snapd/desktop'
+    ]
+    seen = []
+    for root in roots:
+        path = os.path.join(root, 'applications')
+        if root and path not in seen:
+            seen.append(path)
+    return seen
+
+
+def path_dirs():
+    seen = []
+    for path in os.environ.get('PATH', '').split(os.pathsep):
+        if path and path not in seen:
+            seen.append(path)
+    return seen
+
+
+def parse_exec(value):
+    """Exec= line to an argv list without field codes"""
+    try:
+        argv = shlex.split(value.replace('%%', '\0'))
+    except ValueError:
+        return None
+    argv = [FIELD_CODE.sub('', arg).replace('\0', '%') for arg in argv]
+    return [arg for arg in argv if arg] or None
+
+
+def parse_desktop_file(path):
+    """Application entry from a .desktop file, or None if hidden or not launchable"""
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    in_entry = line == '[Desktop Entry]'
+                    continue
+                if in_entry and '=' in line and not line.startswith('#'):
+                    key, value = line.split('=', 1)
+                    # Unlocalized keys only
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+
+    if fields.get('Type', 'Application') != 'Application':
+        return None
+    if fields.get('NoDisplay') == 'true' or fields.get('Hidden') == 'true':
+        return None
+    argv = parse_exec(fields.get('Exec', ''))
+    if not argv or not fields.get('Name'):
+        return None
+
+    desktop_id = os.path.basename(path)[:-len('.desktop')]
+    aliases = [desktop_id, desktop_id.split('.')[-1], os.path.basename(argv[0])]
+    if fields.get('GenericName'):
+        aliases.append(fields['GenericName'])
+    aliases.extend(k for k in fields.get('Keywords', '').split(';') if k)
+    return {'name': fields['Name'], 'argv': argv, 'source': 'desktop', 'aliases': aliases}
+
+
+def is_executable(path):
+    if platform.system() == 'Windows':
+        extensions = os.environ.get('PATHEXT', '.EXE;.BAT;.CMD').lower().split(';')
+        return os.path.splitext(path)[1].lower() in extensions and os.path.isfile(path)
+    return os.access(path, os.X_OK) and os.path.isfile(path)
+
+
+class ApplicationIndex:
+    """Launchable applications from .desktop files and $PATH, persisted between runs.
+
+    $PATH is scanned so the built-in spoken aliases ("terminal", "calculator")
+    find their providers; other executables cannot be launched by name.
+    Each scanned directory is stored with its modification time; a refresh
+    only rescans directories that changed, so lookups stay in the
+    microsecond range after the first scan.
+    """
+
+    def __init__(self, path='app_index.json', refresh_interval=10.0, cutoff=0.75):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.cutoff = cutoff
+        self.dirs = {}
+        self.keys = {}
+        self.loaded = False
+        self.last_check = 0.0
+        self.last_scan_ms = 0.0
+        self.lookups = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def scan_roots(self):
+        """(directory, kind) pairs to index on this platform"""
+        roots = [(d, 'desktop') for d in desktop_dirs()] if platform.system() == 'Linux' else []
+        if platform.system() == 'Darwin':
+            roots += [('/Applications', 'bundle'), (os.path.expanduser('~/Applications'), 'bundle')]
+        return roots + [(d, 'path') for d in path_dirs()]
+
+    def load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self.dirs = json.load(f).get('dirs', {})
+            except Exception as e:
+                print(f"Error loading app index: {e}")
+                self.dirs = {}
+        self.loaded = True
+        self.refresh(force=True)
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({'version': 1, 'dirs': self.dirs}, f)
+        except Exception as e:
+            print(f"Error saving app index: {e}")
+
+    def refresh(self, force=False):
+        """Rescan directories whose modification time changed"""
+        now = time.monotonic()
+        if not force and now - self.last_check < self.refresh_interval:
+            return False
+        self.last_check = now
+        started = time.perf_counter()
+
+        roots = self.scan_roots()
+        changed = False
+        for directory, kind in roots:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                changed |= self.dirs.pop(directory, None) is not None
+                continue
+            cached = self.dirs.get(directory)
+            if cached and cached['mtime'] == mtime and cached['kind'] == kind:
+                continue
+            self.dirs[directory] = {'mtime': mtime, 'kind': kind, 'entries': self.scan_dir(directory, kind, cached)}
+            changed = True
+
+        # Forget directories that left $PATH / XDG_DATA_DIRS
+        active = {directory for directory, _ in roots}
+        for directory in [d for d in self.dirs if d not in active]:
+            del self.dirs[directory]
+            changed = True
+
+        if changed or not self.keys:
+            self.rebuild_keys(roots)
+            self.last_scan_ms = (time.perf_counter() - started) * 1000
+        if changed:
+            self.save()
+        return changed
+
+    def scan_dir(self, directory, kind, cached=None):
+        """Entries keyed by file name; unchanged files are reused from `cached`"""
+        previous = (cached or {}).get('entries', {}) if (cached or {}).get('kind') == kind else {}
+        entries = {}
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return entries
+        for file_name in names:
+            if kind == 'desktop' and not file_name.endswith('.desktop'):
+                continue
+            if kind == 'bundle' and not file_name.endswith('.app'):
+                continue
+            full_path = os.path.join(directory, file_name)
+            try:
+                mtime = os.stat(full_path).st_mtime
+            except OSError:
+                continue
+            old = previous.get(file_name)
+            if old and old.get('mtime') == mtime:
+                entries[file_name] = old
+                continue
+
+            if kind == 'desktop':
+                entry = parse_desktop_file(full_path)
+            elif kind == 'bundle':
+                name = file_name[:-len('.app')]
+                entry = {'name': name, 'argv': ['open', '-a', full_path], 'source': 'bundle', 'aliases': []}
+            elif is_executable(full_path):
+                name = os.path.splitext(file_name)[0] if platform.system() == 'Windows' else file_name
+                entry = {'name': name, 'argv': [full_path], 'source': 'path', 'aliases': []}
+            else:
+                entry = None
+            if entry:
+                entry['mtime'] = mtime
+                entries[file_name] = entry
+        return entries
+
+    def rebuild_keys(self, roots):
+        """Normalized name/alias -> best entry, earlier directories winning ties"""
+        keys = {}
+        executables = {}
+        for directory, _ in roots:
+            for entry in self.dirs.get(directory, {}).get('entries', {}).values():
+                target = keys if entry['source'] in NAMED_SOURCES else executables
+                for name in [entry['name']] + entry.get('aliases', []):
+                    key = normalize_name(name)
+                    current = target.get(key)
+                    if key and (current is None or SOURCE_PRIORITY[entry['source']] < SOURCE_PRIORITY[current['source']]):
+                        target[key] = entry
+        # Spoken aliases point at whichever provider is installed; this is the
+        # only way a bare executable becomes launchable
+        for alias, candidates in BUILTIN_ALIASES.items():
+            for candidate in candidates:
+                provider = keys.get(normalize_name(candidate)) or executables.get(normalize_name(candidate))
+                if provider is not None:
+                    keys.setdefault(normalize_name(alias), provider)
+                    break
+        self.keys = keys
+
+    def find(self, app_name):
+        """Best matching entry for a spoken/typed application name, or None"""
+        query = normalize_name(app_name or '')
+        if not query or query in NON_NAMES:
+            return None
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            else:
+                self.refresh()
+            self.lookups += 1
+            entry = self.match(query)
+            if entry is None:
+                # Maybe it was installed since the last refresh
+                if self.refresh(force=True):
+                    entry = self.match(query)
+            if entry is None:
+                self.misses += 1
+            return entry
+
+    def match(self, query):
+        if query in self.keys:
+            return self.keys[query]
+        # Approximate matches only ever resolve to desktop entries and app bundles
+        candidates = [key for key, entry in self.keys.items() if entry['source'] in NAMED_SOURCES]
+        # Word-prefix match ("visual studio" -> "visual studio code")
+        prefixed = [key for key in candidates if key.startswith(query + ' ')]
+        if prefixed:
+            return self.keys[min(prefixed, key=len)]
+        close = difflib.get_close_matches(query, candidates, n=1, cutoff=self.cutoff)
+        return self.keys[close[0]] if close else None
+
+    def launch(self, app_name):
+        """Start the application without waiting; returns the entry or None"""
+        entry = self.find(app_name)
+        if entry is None:
+            return None
+        kwargs = {'stdin': subprocess.DEVNULL, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = getattr(subprocess, 'DETACHED_PROCESS', 0)
+        else:
+            # Detach so the app outlives the assistant and never sends it signals
+            kwargs['start_new_session'] = True
+        try:
+            subprocess.Popen(entry['argv'], **kwargs)
+        except OSError as e:
+            print(f"Failed to launch {entry['name']}: {e}")
+            return None
+        return entry
+
+    def metrics(self):
+        return {
+            'entries': sum(len(d.get('entries', {})) for d in self.dirs.values()),
+            'lookups': self.lookups,
+            'misses': self.misses,
+            'last_scan_ms': round(self.last_scan_ms, 1)
+        }
+
+
+# Shared index; loaded on first lookup
+app_index = ApplicationIndex()
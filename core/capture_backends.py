@@ -0,0 +1,136 @@
+import os
+import threading
+import cv2
+import numpy as np
+import pyautogui
+
+
+class CaptureBackend:
+    """Grabs screen pixels as a BGR or BGRA NumPy array (OpenCV channel order)"""
+    name = 'base'
+
+    def grab(self, region=None):
+        """Capture `region` (left, top, width, height) or the whole screen"""
+        raise NotImplementedError
+
+    def screen_size(self):
+        return pyautogui.size()
+
+    def virtual_bounds(self):
+        """(left, top, width, height) of the whole desktop across monitors"""
+        width, height = self.screen_size()
+        return (0, 0, width, height)
+
+    def monitors(self):
+        """(left, top, width, height) of each physical monitor"""
+        return [self.virtual_bounds()]
+
+    def close(self):
+        pass
+
+
+class MSSCaptureBackend(CaptureBackend):
+    """MSS (XShm / GDI / CoreGraphics) capture returning a view of the raw BGRA buffer"""
+    name = 'mss'
+
+    def __init__(self):
+        import mss
+        self._mss = mss
+        # mss handles are not safe to share between threads
+        self._local = threading.local()
+
+    def _handle(self):
+        if not hasattr(self._local, 'sct'):
+            self._local.sct = self._mss.mss()
+        return self._local.sct
+
+    def grab(self, region=None):
+        sct = self._handle()
+        if region:
+            left, top, width, height = region
+            monitor = {'left': left, 'top': top, 'width': width, 'height': height}
+        else:
+            monitor = sct.monitors[0]
+        shot = sct.grab(monitor)
+        # Zero-copy: reinterpret the BGRA bytes in place
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+    def screen_size(self):
+        monitor = self._handle().monitors[0]
+        return monitor['width'], monitor['height']
+
+    def virtual_bounds(self):
+        monitor = self._handle().monitors[0]
+        return (monitor['left'], monitor['top'], monitor['width'], monitor['height'])
+
+    def monitors(self):
+        # monitors[0] is the union of all displays; the rest are the physical ones
+        return [
+            (m['left'], m['top'], m['width'], m['height'])
+            for m in self._handle().monitors[1:]
+        ] or [self.virtual_bounds()]
+
+    def close(self):
+        if hasattr(self._local, 'sct'):
+            self._local.sct.close()
+            del self._local.sct
+
+
+class PyAutoGUICaptureBackend(CaptureBackend):
+    """Fallback using pyautogui.screenshot(); costs one PIL-to-array copy"""
+    name = 'pyautogui'
+
+    def grab(self, region=None):
+        screenshot = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
+        return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2BGR)
+
+
+class FileCaptureBackend(CaptureBackend):
+    """Serves frames from image files, cycling through them; used for tests and replays"""
+    name = 'file'
+
+    def __init__(self, paths):
+        if isinstance(paths, str):
+            if os.path.isdir(paths):
+                paths = sorted(
+                    os.path.join(paths, p) for p in os.listdir(paths)
+                    if p.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp'))
+                )
+            else:
+                paths = [paths]
+        self.frames = []
+        for path in paths:
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError(f"Could not read capture fixture: {path}")
+            self.frames.append(frame)
+        if not self.frames:
+            raise ValueError("No capture fixtures found")
+        self.index = 0
+
+    def grab(self, region=None):
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        if region:
+            left, top, width, height = region
+            return frame[top:top + height, left:left + width]
+        return frame
+
+    def screen_size(self):
+        height, width = self.frames[0].shape[:2]
+        return width, height
+
+
+def create_capture_backend(name=None):
+    """Create the requested backend (or ALTQU_CAPTURE_BACKEND), preferring MSS"""
+    name = name or os.environ.get('ALTQU_CAPTURE_BACKEND', 'auto')
+
+    if name.startswith('file:'):
+        return FileCaptureBackend(name[len('file:'):])
+    if name in ('auto', 'mss'):
+        try:
+            return MSSCaptureBackend()
+        except Exception as e:
+            if name == 'mss':
+                print(f"MSS capture unavailable: {e}")
+    return PyAutoGUICaptureBackend()
@@ -1,10 +1,11 @@
 import json
 import os
 from datetime import datetime
-import pygetwindow as gw
 import pyautogui
 import pytesseract
 from PIL import Image
+from core.analysis_model import ScreenAnalysis, to_json_value
+from core.window_tracker import window_tracker
 
 class ContextManager:
     def __init__(self):
@@ -36,7 +37,7 @@ class ContextManager:
         interaction = {
             'timestamp': datetime.now().isoformat(),
             'user_input': user_input,
-            'response': assistant_response,
+            'response': to_json_value(assistant_response),
             'context': cleaned_context
         }
         
@@ -49,22 +50,21 @@ class ContextManager:
         self.save_context()
         
     def clean_context_for_json(self, context_info):
-        """Remove non-JSON serializable objects from context"""
+        """Convert an analysis (or plain dict) to JSON values, leaving out screenshots"""
+        if isinstance(context_info, ScreenAnalysis):
+            return context_info.to_json()
         if not isinstance(context_info, dict):
             return {}
         
         cleaned = {}
         for key, value in context_info.items():
             if key == 'screenshot':
-                # Don't save screenshots - they're not JSON serializable
+                # Don't save screenshots
                 continue
-            elif isinstance(value, (str, int, float, bool, list, dict)):
-                cleaned[key] = value
-            elif hasattr(value, '__dict__'):
-                # Convert objects to string representation
-                cleaned[key] = str(value)
-            else:
-                cleaned[key] = str(value)
+            try:
+                cleaned[key] = to_json_value(value)
+            except TypeError as e:
+                print(f"Skipping context field {key}: {e}")
         
         return cleaned
     
@@ -74,21 +74,16 @@ class ContextManager:
     def get_current_screen_context(self):
         """Get current screen context"""
         try:
-            # Get active window
-            active_window = gw.getActiveWindow()
-            if active_window:
+            # Active window from the tracker's cache instead of a window-system query
+            active_window = window_tracker.current()
+            if active_window['bounds']:
                 window_info = {
-                    'title': active_window.title,
-                    'app': active_window.title.split(' - ')[-1] if ' - ' in active_window.title else active_window.title
+                    'title': active_window['title'],
+                    'app': active_window['app_name']
                 }
                 
                 # Take screenshot of active window
-                screenshot = pyautogui.screenshot(region=(
-                    active_window.left,
-                    active_window.top,
-                    active_window.width,
-                    active_window.height
-                ))
+                screenshot = pyautogui.screenshot(region=active_window['bounds'])
                 
                 # Extract text from screenshot (optional, requires tesseract)
                 try:
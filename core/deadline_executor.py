@@ -0,0 +1,114 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from core.tracing import tracer
+
+
+class DeadlineRun(threading.Event):
+    """Cancel flag of one race; set once the LLM side has lost.
+
+    run_id tags everything the LLM side emits so consumers can tell runs apart.
+    """
+
+    def __init__(self, run_id):
+        super().__init__()
+        self.run_id = run_id
+
+
+class DeadlineExecutor:
+    """Races the LLM against the rule-based interpretation under a latency SLO.
+
+    The rule-based answer is computed immediately. The LLM answer wins if it
+    arrives within `slo_ms`; otherwise a confident rule-based answer is
+    committed and the LLM call is told to stop (its result is discarded).
+    """
+
+    def __init__(self, slo_ms=None, min_fallback_confidence=0.8, hard_timeout_ms=30000, log_file=None):
+        self.slo_ms = float(slo_ms or os.environ.get('ALTQU_LLM_SLO_MS', 2500))
+        self.min_fallback_confidence = min_fallback_confidence
+        self.hard_timeout_ms = hard_timeout_ms
+        self.log_file = log_file or os.environ.get('ALTQU_DECISION_LOG')
+        self.decisions = deque(maxlen=200)
+        self.counts = {'llm': 0, 'fallback_fast': 0, 'fallback_timeout': 0, 'llm_late': 0}
+        self.run_ids = itertools.count(1)
+
+    def run(self, llm_call, fallback_call, label=''):
+        """llm_call(cancel_event) and fallback_call() both return a command dict (or None)
+
+        cancel_event is a DeadlineRun; the LLM side should stop streaming and
+        drop its output once it is set.
+        """
+        started = time.perf_counter()
+        cancel_event = DeadlineRun(next(self.run_ids))
+        done = threading.Event()
+        outcome = {'result': None}
+
+        def run_llm():
+            try:
+                outcome['result'] = llm_call(cancel_event)
+            except Exception as e:
+                print(f"LLM call failed: {e}")
+            finally:
+                done.set()
+
+        threading.Thread(target=run_llm, name='altqu-llm', daemon=True).start()
+
+        with tracer.span('deadline_race', slo_ms=self.slo_ms, run_id=cancel_event.run_id) as span:
+            try:
+                fallback = fallback_call()
+            except BaseException:
+                # Nobody will wait for the LLM now; stop it before it streams into the UI
+                cancel_event.set()
+                raise
+            fallback_confidence = (fallback or {}).get('confidence', 0.0)
+            fallback_ms = (time.perf_counter() - started) * 1000
+
+            remaining = max(0.0, self.slo_ms / 1000 - (time.perf_counter() - started))
+            if done.wait(remaining) and outcome['result'] is not None:
+                decision, result = 'llm', outcome['result']
+            elif fallback is not None and fallback_confidence >= self.min_fallback_confidence:
+                decision, result = 'fallback_fast', fallback
+                cancel_event.set()
+            else:
+                # Fast answer too uncertain: keep waiting for the LLM up to the hard cap
+                remaining = max(0.0, self.hard_timeout_ms / 1000 - (time.perf_counter() - started))
+                if done.wait(remaining) and outcome['result'] is not None:
+                    decision, result = 'llm_late', outcome['result']
+                else:
+                    decision, result = 'fallback_timeout', fallback
+                    cancel_event.set()
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            span.update(decision=decision, fallback_confidence=fallback_confidence, elapsed_ms=round(elapsed_ms, 1))
+
+        self.log_decision({
+            'timestamp': time.time(),
+            'label': label,
+            'run_id': cancel_event.run_id,
+            'decision': decision,
+            'elapsed_ms': round(elapsed_ms, 1),
+            'fallback_ms': round(fallback_ms, 2),
+            'fallback_type': (fallback or {}).get('type'),
+            'fallback_confidence': fallback_confidence,
+            'result_type': (result or {}).get('type'),
+            'slo_ms': self.slo_ms
+        })
+        return result
+
+    def log_decision(self, decision):
+        self.decisions.append(decision)
+        self.counts[decision['decision']] = self.counts.get(decision['decision'], 0) + 1
+        if self.log_file:
+            try:
+                with open(self.log_file, 'a') as f:
+                    f.write(json.dumps(decision) + '\n')
+            except Exception as e:
+                print(f"Error writing decision log: {e}")
+
+    def metrics(self):
+        values = {f'decisions_{name}': count for name, count in self.counts.items()}
+        values['slo_ms'] = self.slo_ms
+        return values
@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+
+# Accessibility roles grouped into the analysis' element kinds
+ROLE_KINDS = {
+    'buttons': ('push button', 'toggle button', 'check box', 'radio button', 'menu item', 'link', 'combo box', 'page tab'),
+    'text_fields': ('text', 'entry', 'password text', 'spin button'),
+    'images': ('image', 'icon')
+}
+# Everything above except images, plus rows that are usually activatable
+CLICKABLE_ROLES = set(ROLE_KINDS['buttons'] + ROLE_KINDS['text_fields'] + ('list item', 'table cell', 'tree item'))
+KIND_OF_ROLE = {role: kind for kind, roles in ROLE_KINDS.items() for role in roles}
+
+# Events after which a cached tree for the emitting application is stale
+ATSPI_EVENTS = (
+    'object:children-changed',
+    'object:property-change:accessible-name',
+    'object:state-changed:showing',
+    'object:state-changed:visible',
+    'object:visible-data-changed'
+)
+
+
+class ElementSource:
+    """Provides UI elements for the active window without looking at pixels.
+
+    elements(window) returns {'buttons', 'text_fields', 'images', 'clickable'}
+    lists of element dicts in screen coordinates, or None when the window
+    exposes nothing and pixel detection has to be used instead.
+    """
+    name = 'none'
+
+    def elements(self, window):
+        return None
+
+    def metrics(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class CacheEntry:
+    __slots__ = ('window', 'app', 'generation', 'elements')
+
+    def __init__(self, window, app, generation, elements):
+        self.window = window
+        self.app = app
+        self.generation = generation
+        self.elements = elements
+
+
+class ATSPIElementSource(ElementSource):
+    """Widgets from the AT-SPI accessibility bus (GTK, Qt, Firefox, Chromium, LibreOffice)
+
+    The tree of each window is walked once and cached until the window's
+    tracker info changes (focus, title, bounds) or its application emits an
+    accessibility event that changes what is shown.
+
+    libatspi is not thread-safe: Atspi.event_main dispatches events on its
+    own thread while walks come from analysis threads, so every call into
+    the library holds `_bus`, including the event handler.
+    """
+    name = 'atspi'
+
+    def __init__(self, max_nodes=4000, max_windows=16):
+        import gi
+        gi.require_version('Atspi', '2.0')
+        from gi.repository import Atspi
+        self.Atspi = Atspi
+        self.max_nodes = max_nodes
+        self.max_windows = max_windows
+        self.desktop = Atspi.get_desktop(0)
+        if self.desktop is None:
+            raise RuntimeError("accessibility bus not available")
+        self.cache = {}
+        # Per-application counter bumped by accessibility events
+        self.generations = {}
+        self.hits = 0
+        self.walks = 0
+        self.fallbacks = 0
+        self.events = 0
+        self.walk_time = 0.0
+        self._lock = threading.Lock()
+        self._bus = threading.RLock()
+        self.listener = Atspi.EventListener.new(self.on_event)
+        for event in ATSPI_EVENTS:
+            self.listener.register(event)
+        self._thread = threading.Thread(target=Atspi.event_main, name='altqu-atspi', daemon=True)
+        self._thread.start()
+
+    def on_event(self, event):
+        try:
+            with self._bus:
+                app = event.source.get_application()
+        except Exception:
+            return
+        with self._lock:
+            self.events += 1
+            self.generations[app] = self.generations.get(app, 0) + 1
+
+    def elements(self, window):
+        window_id = window.get('window_id')
+        if window_id is None:
+            return None
+        with self._lock:
+            entry = self.cache.get(window_id)
+            # Tracker info is replaced on every change, so identity means unchanged
+            if entry is not None and entry.window is window and entry.generation == self.generations.get(entry.app, 0):
+                self.hits += 1
+                return entry.elements
+
+        started = time.perf_counter()
+        with self._bus:
+            frame, app = self.find_frame(window)
+            with self._lock:
+                # Read before walking so events during the walk invalidate the result
+                generation = self.generations.get(app, 0)
+            elements = self.collect(frame) if frame is not None else None
+        with self._lock:
+            self.walks += 1
+            self.walk_time += time.perf_counter() - started
+            if elements is None:
+                self.fallbacks += 1
+            self.cache.pop(window_id, None)
+            self.cache[window_id] = CacheEntry(window, app, generation, elements)
+            while len(self.cache) > self.max_windows:
+                self.cache.pop(next(iter(self.cache)))
+        return elements
+
+    def find_frame(self, window):
+        """The top-level accessible matching the window's title; (frame, application)"""
+        title = window.get('title', '')
+        fallback = (None, None)
+        for i in range(self.desktop.get_child_count()):
+            app = self.desktop.get_child_at_index(i)
+            if app is None:
+                continue
+            try:
+                for j in range(app.get_child_count()):
+                    frame = app.get_child_at_index(j)
+                    if frame is None or frame.get_name() != title:
+                        continue
+                    # Several windows can share a title; the active one wins
+                    if frame.get_state_set().contains(self.Atspi.StateType.ACTIVE):
+                        return frame, app
+                    fallback = (frame, app)
+            except Exception:
+                # Applications can vanish mid-walk
+                continue
+        return fallback
+
+    def collect(self, frame):
+        """Visible widgets below `frame`, grouped by kind; None if none are exposed"""
+        Atspi = self.Atspi
+        found = {kind: [] for kind in ROLE_KINDS}
+        found['clickable'] = []
+        stack = [frame]
+        visited = 0
+        while stack and visited < self.max_nodes:
+            node = stack.pop()
+            visited += 1
+            try:
+                if not node.get_state_set().contains(Atspi.StateType.SHOWING):
+                    continue
+                role = node.get_role_name()
+                kind = KIND_OF_ROLE.get(role)
+                if kind is not None or role in CLICKABLE_ROLES:
+                    element = self.element_for(node, role)
+                    if element is not None:
+                        if kind is not None:
+                            found[kind].append(element)
+                        if role in CLICKABLE_ROLES:
+                            found['clickable'].append(element)
+                # Children pushed in reverse so they come out in reading order
+                for i in range(node.get_child_count() - 1, -1, -1):
+                    child = node.get_child_at_index(i)
+                    if child is not None:
+                        stack.append(child)
+            except Exception:
+                continue
+        if not any(found.values()):
+            return None
+        return found
+
+    def element_for(self, node, role):
+        extents = node.get_extents(self.Atspi.CoordType.SCREEN)
+        if extents.width <= 0 or extents.height <= 0:
+            return None
+        x, y, w, h = extents.x, extents.y, extents.width, extents.height
+        return {
+            'position': (x + w // 2, y + h // 2),
+            'bounds': (x, y, w, h),
+            'area': float(w * h),
+            'confidence': 1.0,
+            'text': node.get_name() or '',
+            'role': role
+        }
+
+    def metrics(self):
+        return {
+            'source': self.name,
+            'hits': self.hits,
+            'walks': self.walks,
+            'fallbacks': self.fallbacks,
+            'events': self.events,
+            'walk_ms': round(1000 * self.walk_time / self.walks, 2) if self.walks else 0.0
+        }
+
+    def close(self):
+        try:
+            with self._bus:
+                for event in ATSPI_EVENTS:
+                    self.listener.deregister(event)
+                self.Atspi.event_quit()
+        except Exception as e:
+            print(f"AT-SPI shutdown failed: {e}")
+
+
+def create_element_source(name=None):
+    """Create the requested source (or ALTQU_ELEMENT_SOURCE); 'cv' disables accessibility lookups"""
+    name = name or os.environ.get('ALTQU_ELEMENT_SOURCE', 'auto')
+
+    if name in ('auto', 'atspi'):
+        try:
+            return ATSPIElementSource()
+        except Exception as e:
+            if name == 'atspi':
+                print(f"AT-SPI element source unavailable: {e}")
+    return ElementSource()
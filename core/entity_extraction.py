@@ -0,0 +1,281 @@
+import re
+from collections import defaultdict
+import numpy as np
+
+# One alternation evaluated in a single left-to-right scan; the outer group
+# name of each match is its entity kind
+ENTITY_PATTERN = re.compile(r'''
+    (?P<price>
+        [$€£¥]\s?\d+(?:,\d{3})*(?:\.\d{1,2})?
+      | \b\d+(?:[.,]\d{2})\s?(?:USD|EUR|GBP)\b
+    )
+  | (?P<duration>
+        \b(?:\d{1,2}:)?[0-5]?\d:[0-5]\d\b
+    )
+  | (?P<rating>
+        \b[0-5](?:[.,]\d)?\s*(?:out\s+of\s+5(?:\s+stars)?|/\s*5\b|stars?\b|★)
+      | ★+\s*[0-5][.,]\d\b
+    )
+  | (?P<reviews>
+        \b\d[\d,]*(?:\.\d+)?\s*[kKmM]?\s+(?:global\s+)?(?:ratings?|reviews?)\b
+      | \(\d[\d,]*(?:\.\d+)?[kKmM]?\)
+    )
+''', re.VERBOSE | re.IGNORECASE)
+
+# Text around an h:mm that makes it a time of day ("at 10:30", "Mon 10:30", "10:30 PM")
+TIME_BEFORE = re.compile(
+    r'(?:\bat|@|\b(?:today|tomorrow|yesterday|(?:mon|tues?|wed(?:nes)?|thu(?:rs?)?|fri|sat(?:ur)?|sun)(?:day)?)\b,?'
+    r'|\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4})\s*$',
+    re.IGNORECASE
+)
+TIME_AFTER = re.compile(r"^\s*(?:[ap]\.?m\b\.?|o'clock|uhr\b|h\b)", re.IGNORECASE)
+# Longest duration accepted; track lists, podcasts and videos stay well below this
+MAX_DURATION_SECONDS = 10 * 3600
+
+# A whole OCR line of the form "Title - Artist" (spaced hyphen or a real dash)
+SONG_LINE = re.compile(r'^\s*(?P<title>[^\s\-–—].{0,80}?)\s+[-–—]\s+(?P<artist>[^\s\-–—].{0,60}?)\s*$')
+
+NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?')
+SUFFIX_SCALE = {'k': 1e3, 'm': 1e6}
+
+
+def parse_price(text):
+    digits = re.sub(r'[^\d.,]', '', text)
+    # "1,299.00" / "1 299" -> thousands separators; "12,99 EUR" -> decimal comma
+    if re.search(r',\d{2}$', digits) and '.' not in digits:
+        digits = digits.replace(',', '.')
+    return float(digits.replace(',', '') or 0)
+
+
+def parse_rating(text):
+    match = re.search(r'[0-5](?:[.,]\d)?', text)
+    return float(match.group().replace(',', '.')) if match else None
+
+
+def parse_count(text):
+    match = NUMBER.search(text)
+    if not match:
+        return None
+    value = float(match.group().replace(',', ''))
+    tail = text[match.end():].strip().lower()
+    return int(value * SUFFIX_SCALE.get(tail[:1], 1))
+
+
+def parse_duration(text):
+    seconds = 0
+    for part in text.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+PARSERS = {
+    'price': parse_price,
+    'rating': parse_rating,
+    'reviews': parse_count,
+    'duration': parse_duration
+}
+
+
+class Entity:
+    __slots__ = ('kind', 'value', 'text', 'start', 'end', 'line', 'position')
+
+    def __init__(self, kind, value, text, start, end, line, position):
+        self.kind = kind
+        self.value = value
+        self.text = text
+        self.start = start
+        self.end = end
+        self.line = line
+        self.position = position
+
+    def __repr__(self):
+        return f'Entity({self.kind}={self.value!r} @{self.position or self.start})'
+
+
+class PageText:
+    """OCR lines joined into one string, with each line's offset and screen position"""
+
+    def __init__(self, lines, positions):
+        self.lines = lines
+        self.positions = positions
+        self.offsets = np.zeros(len(lines), dtype=np.int64)
+        total = 0
+        for i, line in enumerate(lines):
+            self.offsets[i] = total
+            total += len(line) + 1
+        self.text = '\n'.join(lines)
+
+    @classmethod
+    def from_analysis(cls, text_boxes=None, screen_text=''):
+        boxes = list(text_boxes or [])
+        if boxes:
+            return cls([box.get('text', '') for box in boxes], [box.get('position') for box in boxes])
+        lines = [line for line in screen_text.splitlines() if line.strip()] or [screen_text]
+        return cls(lines, [None] * len(lines))
+
+    def line_at(self, offset):
+        return int(np.searchsorted(self.offsets, offset, side='right') - 1)
+
+    def context(self, start, end, width=50):
+        return self.text[max(0, start - width):end + width].replace('\n', ' ')
+
+
+class EntityExtractor:
+    """Prices, ratings, review counts, durations and artist-title pairs in one pass over the page"""
+
+    def __init__(self, link_distance=120):
+        # Screen-space distance within which a rating/review count belongs to a price
+        self.link_distance = link_distance
+
+    def extract(self, page):
+        """All entities in reading order; cost is linear in the page length"""
+        entities = []
+        for match in ENTITY_PATTERN.finditer(page.text):
+            kind = match.lastgroup
+            try:
+                value = PARSERS[kind](match.group(kind))
+            except (ValueError, TypeError):
+                continue
+            if value is None:
+                continue
+            if kind == 'duration' and not self.plausible_duration(page.text, match.start(), match.end(), value):
+                continue
+            line = page.line_at(match.start())
+            entities.append(Entity(kind, value, match.group(kind), match.start(), match.end(), line, page.positions[line]))
+        return entities
+
+    def products(self, text_boxes=None, screen_text=''):
+        """One product per price, linked to the nearest rating and review count"""
+        page = PageText.from_analysis(text_boxes, screen_text)
+        entities = self.extract(page)
+        prices = [e for e in entities if e.kind == 'price']
+        if not prices:
+            return []
+
+        linked = {kind: self.link(prices, [e for e in entities if e.kind == kind], page) for kind in ('rating', 'reviews')}
+        products = []
+        for i, price in enumerate(prices):
+            rating = linked['rating'][i]
+            reviews = linked['reviews'][i]
+            products.append({
+                'id': i,
+                'price': price.text,
+                'price_value': price.value,
+                'rating': rating.value if rating else None,
+                'reviews': reviews.value if reviews else None,
+                'title': self.title_for(price, page),
+                'position': price.position,
+                'text_context': page.context(price.start, price.end)
+            })
+        return products
+
+    def songs(self, text_boxes=None, screen_text=''):
+        """Artist-title pairs from whole OCR lines, with the duration on the same row"""
+        page = PageText.from_analysis(text_boxes, screen_text)
+        entities = self.extract(page)
+        durations = [e for e in entities if e.kind == 'duration']
+        by_line = defaultdict(list)
+        for entity in entities:
+            by_line[entity.line].append(entity)
+        songs = []
+        for line_index, line in enumerate(page.lines):
+            line_entities = by_line.get(line_index, ())
+            # Prices or ratings mean it is not a track row; a trailing duration is fine
+            if any(e.kind != 'duration' for e in line_entities):
+                continue
+            offset = int(page.offsets[line_index])
+            for entity in reversed(line_entities):
+                line = line[:entity.start - offset] + line[entity.end - offset:]
+            match = SONG_LINE.match(line)
+            if not match:
+                continue
+            title, artist = match.group('title').strip(), match.group('artist').strip()
+            if not any(c.isalpha() for c in title) or not any(c.isalpha() for c in artist):
+                continue
+            songs.append({
+                'title': title,
+                'artist': artist,
+                'position': page.positions[line_index],
+                'line': line_index
+            })
+
+        # Durations sit at the right end of the same row (or later on the same text line)
+        if songs and durations:
+            rows = self.anchor_coordinates([s['line'] for s in songs], [s['position'] for s in songs], page)
+            times = self.anchor_coordinates([d.line for d in durations], [d.position for d in durations], page)
+            same_row = np.abs(rows[:, None, 1] - times[None, :, 1])
+            after = times[None, :, 0] >= rows[:, None, 0]
+            same_row = np.where(after, same_row, np.inf)
+            nearest = same_row.argmin(axis=1)
+            for song, index, gap in zip(songs, nearest, same_row[np.arange(len(songs)), nearest]):
+                if gap <= 12:
+                    song['duration'] = durations[index].text
+                    song['duration_seconds'] = durations[index].value
+        return songs
+
+    def plausible_duration(self, text, start, end, seconds):
+        """False for times of day and dates that happen to look like m:ss"""
+        if seconds <= 0 or seconds > MAX_DURATION_SECONDS:
+            return False
+        if TIME_BEFORE.search(text[max(0, start - 16):start]) or TIME_AFTER.match(text[end:end + 8]):
+            return False
+        return True
+
+    def link(self, anchors, candidates, page):
+        """For each anchor, the closest candidate within link_distance (or None); vectorized"""
+        if not candidates:
+            return [None] * len(anchors)
+        a = self.anchor_coordinates([e.line for e in anchors], [e.position for e in anchors], page)
+        c = self.anchor_coordinates([e.line for e in candidates], [e.position for e in candidates], page)
+        distance = np.abs(a[:, None, :] - c[None, :, :]).sum(axis=2)
+        nearest = distance.argmin(axis=1)
+        best = distance[np.arange(len(anchors)), nearest]
+        return [candidates[j] if d <= self.link_distance else None for j, d in zip(nearest, best)]
+
+    def anchor_coordinates(self, lines, positions, page):
+        """(N, 2) screen positions; without OCR boxes, lines stand in for rows"""
+        if all(p is not None for p in positions):
+            return np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        # ~20px per text line keeps link_distance meaningful for plain text
+        return np.stack([np.zeros(len(lines)), np.asarray(lines, dtype=np.float64) * 20], axis=1)
+
+    def title_for(self, price, page):
+        """Nearest preceding line that is mostly words: usually the product name"""
+        for line_index in range(price.line, max(-1, price.line - 4), -1):
+            line = page.lines[line_index].strip()
+            if line_index == price.line:
+                line = line[:price.start - int(page.offsets[line_index])].strip()
+            letters = sum(c.isalpha() for c in line)
+            if len(line) >= 12 and letters / len(line) > 0.6:
+                return line
+        return ''
+
+
+def rank_products(products, prior_weight=50):
+    """Indexes of products, best first: Bayesian-averaged rating, then more reviews, then lower price"""
+    if not products:
+        return []
+    ratings = np.array([p['rating'] if p.get('rating') is not None else np.nan for p in products], dtype=np.float64)
+    reviews = np.array([p.get('reviews') or 0 for p in products], dtype=np.float64)
+    prices = np.array([p.get('price_value') or 0 for p in products], dtype=np.float64)
+
+    prior = np.nanmean(ratings) if np.isfinite(ratings).any() else 0.0
+    known = np.nan_to_num(ratings, nan=prior)
+    # Few reviews pull the rating towards the page average
+    score = (reviews * known + prior_weight * prior) / (reviews + prior_weight)
+    return list(np.lexsort((prices, -reviews, -score)))
+
+
+def rank_songs(songs, indicators=('official', 'remix', 'feat', 'ft', 'radio edit')):
+    """Indexes of songs, best first: popularity indicators, then clickable ones, then reading order"""
+    if not songs:
+        return []
+    texts = [f"{s['title']} {s['artist']}".lower() for s in songs]
+    hits = np.array([[indicator in text for indicator in indicators] for text in texts], dtype=np.int32).sum(axis=1)
+    clickable = np.array([s.get('position') is not None for s in songs], dtype=np.int32)
+    order = np.arange(len(songs))
+    return list(np.lexsort((order, -clickable, -hits)))
+
+
+# Shared extractor; stateless apart from configuration
+entity_extractor = EntityExtractor()
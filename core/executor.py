@@ -8,6 +8,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
 import time
+from core.app_index import app_index
 
 class CommandExecutor:
     def __init__(self):
@@ -48,42 +49,12 @@ class CommandExecutor:
             print(f"Command execution error: {e}")
             
     def launch_application(self, app_name):
-        """Launch applications across platforms"""
+        """Launch applications through the application index"""
         if not app_name:
             return
-            
-        app_name = app_name.lower()
-        system = platform.system().lower()
-        
-        app_commands = {
-            'vscode': {
-                'windows': 'code',
-                'darwin': 'code',
-                'linux': 'code'
-            },
-            'notepad': {
-                'windows': 'notepad',
-                'darwin': 'open -a TextEdit',
-                'linux': 'gedit'
-            },
-            'calculator': {
-                'windows': 'calc',
-                'darwin': 'open -a Calculator',
-                'linux': 'gnome-calculator'
-            },
-            'terminal': {
-                'windows': 'cmd',
-                'darwin': 'open -a Terminal',
-                'linux': 'gnome-terminal'
-            }
-        }
         
-        if app_name in app_commands and system in app_commands[app_name]:
-            command = app_commands[app_name][system]
-            subprocess.run(command.split(), shell=True)
-        else:
-            # Try direct execution
-            subprocess.run([app_name], shell=True)
+        if not app_index.launch(app_name):
+            print(f"No installed application matches '{app_name}'")
             
     def perform_web_search(self, query):
         """Perform web search"""
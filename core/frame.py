@@ -0,0 +1,133 @@
+import threading
+import cv2
+import numpy as np
+
+
+class BufferPool:
+    """Recycles derived image buffers between frames to bound allocations"""
+
+    def __init__(self, max_per_shape=4):
+        self.max_per_shape = max_per_shape
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            buffers = self._free.get(key)
+            if buffers:
+                return buffers.pop()
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buffer):
+        key = (buffer.shape, buffer.dtype.str)
+        with self._lock:
+            buffers = self._free.setdefault(key, [])
+            if len(buffers) < self.max_per_shape:
+                buffers.append(buffer)
+
+
+class Frame:
+    """One captured image with lazily computed, shared representations.
+
+    Every representation (BGR, RGB, grayscale, edge maps, pyramid levels)
+    is computed at most once per frame, so detectors and OCR in the same
+    analysis never repeat a full-image pass.
+    """
+
+    def __init__(self, image, pool=None):
+        # Accepts BGR or BGRA (as returned by the capture backends)
+        self.raw = image
+        self.pool = pool or default_pool
+        self._bgr = None
+        self._rgb = None
+        self._gray = None
+        self._edges = {}
+        self._pyramid = {}
+        self._pooled = []
+
+    @property
+    def width(self):
+        return self.raw.shape[1]
+
+    @property
+    def height(self):
+        return self.raw.shape[0]
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @property
+    def bgr(self):
+        if self._bgr is None:
+            if self.raw.ndim == 2:
+                self._bgr = cv2.cvtColor(self.raw, cv2.COLOR_GRAY2BGR)
+            elif self.raw.shape[2] == 4:
+                self._bgr = cv2.cvtColor(self.raw, cv2.COLOR_BGRA2BGR)
+            else:
+                self._bgr = self.raw
+        return self._bgr
+
+    @property
+    def rgb(self):
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB, dst=self._acquire((self.height, self.width, 3)))
+        return self._rgb
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            if self.raw.ndim == 2:
+                self._gray = self.raw
+            else:
+                code = cv2.COLOR_BGRA2GRAY if self.raw.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+                self._gray = cv2.cvtColor(self.raw, code, dst=self._acquire((self.height, self.width)))
+        return self._gray
+
+    def edges(self, low=100, high=200):
+        """Canny edge map of the grayscale image, cached per threshold pair"""
+        key = (low, high)
+        if key not in self._edges:
+            self._edges[key] = cv2.Canny(self.gray, low, high, edges=self._acquire((self.height, self.width)))
+        return self._edges[key]
+
+    def pyramid(self, level):
+        """Grayscale image downsampled `level` times with pyrDown"""
+        if level <= 0:
+            return self.gray
+        if level not in self._pyramid:
+            previous = self.pyramid(level - 1)
+            h, w = previous.shape[:2]
+            self._pyramid[level] = cv2.pyrDown(previous, dst=self._acquire(((h + 1) // 2, (w + 1) // 2)))
+        return self._pyramid[level]
+
+    def crop(self, bounds):
+        """View of the BGR image inside (x, y, w, h)"""
+        x, y, w, h = bounds
+        return self.bgr[y:y + h, x:x + w]
+
+    def release(self):
+        """Hand derived buffers back to the pool; the frame must not be used afterwards"""
+        for buffer in self._pooled:
+            self.pool.release(buffer)
+        self._pooled = []
+        self._rgb = None
+        self._gray = None
+        self._edges = {}
+        self._pyramid = {}
+
+    def _acquire(self, shape):
+        buffer = self.pool.acquire(shape)
+        self._pooled.append(buffer)
+        return buffer
+
+
+def as_frame(image):
+    """Wrap a NumPy image in a Frame unless it already is one"""
+    if isinstance(image, Frame):
+        return image
+    return Frame(np.asarray(image))
+
+
+default_pool = BufferPool()
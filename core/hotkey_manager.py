@@ -1,42 +1,78 @@
 import keyboard
 import threading
 import time
+from core.tracing import tracer
 
 class HotkeyManager:
-    def __init__(self, callback):
+    def __init__(self, callback, prefetch_callback=None, prefetch_cancel_callback=None, coalesce_window=0.4):
         self.callback = callback
-        self.is_active = False
+        # Called when the Alt modifier goes down / comes back up without an activation
+        self.prefetch_callback = prefetch_callback
+        self.prefetch_cancel_callback = prefetch_cancel_callback
+        self.coalesce_window = coalesce_window
         self.hotkey_combination = "alt+q"
-        
+        self.modifier_key = "alt"
+        self.last_activation = 0
+        self.coalesced_presses = 0
+        self.modifier_down = False
+        self.activated_since_modifier = False
+        self._lock = threading.Lock()
+
     def setup_hotkeys(self):
         """Setup global hotkeys using keyboard library"""
         try:
             keyboard.add_hotkey(self.hotkey_combination, self.activate_assistant)
+            if self.prefetch_callback:
+                keyboard.on_press_key(self.modifier_key, self._modifier_pressed)
+                keyboard.on_release_key(self.modifier_key, self._modifier_released)
             print(f"Hotkey {self.hotkey_combination} registered successfully")
             return True
         except Exception as e:
             print(f"Failed to register hotkey: {e}")
             return False
-            
+
     def activate_assistant(self):
         """Activate assistant - this runs in background thread"""
-        if not self.is_active:
-            self.is_active = True
-            try:
-                # Call the callback (which should use root.after() for thread safety)
+        now = time.perf_counter()
+        with self._lock:
+            self.activated_since_modifier = True
+            # Coalesce bursts (key repeat, double presses) into one activation
+            if now - self.last_activation < self.coalesce_window:
+                self.coalesced_presses += 1
+                self.last_activation = now
+                return
+            self.last_activation = now
+
+        try:
+            # Call the callback (which must hand UI work to the Tk thread)
+            with tracer.span('hotkey', hotkey=self.hotkey_combination):
                 self.callback()
+        except Exception as e:
+            print(f"Error activating assistant: {e}")
+
+    def _modifier_pressed(self, event):
+        # Auto-repeat sends a stream of press events while Alt is held
+        if self.modifier_down:
+            return
+        self.modifier_down = True
+        self.activated_since_modifier = False
+        try:
+            self.prefetch_callback()
+        except Exception as e:
+            print(f"Error starting prefetch: {e}")
+
+    def _modifier_released(self, event):
+        self.modifier_down = False
+        if not self.activated_since_modifier and self.prefetch_cancel_callback:
+            try:
+                self.prefetch_cancel_callback()
             except Exception as e:
-                print(f"Error activating assistant: {e}")
-            finally:
-                # Reset after a short delay
-                threading.Timer(0.5, self._reset_active_state).start()
-                
-    def _reset_active_state(self):
-        self.is_active = False
-        
+                print(f"Error cancelling prefetch: {e}")
+
     def stop_hotkeys(self):
         """Stop listening for hotkeys"""
         try:
             keyboard.unhook_all_hotkeys()
+            keyboard.unhook_all()
         except:
             pass
@@ -1,5 +1,6 @@
 import pyautogui
 import time
+import platform
 import subprocess
 import webbrowser
 from selenium import webdriver
@@ -7,6 +8,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 import cv2
 import numpy as np
+from core.app_index import app_index
+from core.entity_extraction import entity_extractor, rank_products, rank_songs
+from core.tracing import tracer
 
 class IntelligentExecutor:
     def __init__(self):
@@ -15,41 +19,26 @@ class IntelligentExecutor:
         pyautogui.PAUSE = 0.1  # Reduce pause time for better performance
         
         self.browser_driver = None
+        self.task_planner = None
+        self.macros = None
+        tracer.register_metrics('apps', app_index.metrics)
         self.setup_browser()
+    
+    def set_task_planner(self, task_planner):
+        self.task_planner = task_planner
+    
+    def set_macros(self, macros):
+        self.macros = macros
         
-    def extract_product_info(self, screen_text):
-        """Extract product information from screen text"""
-        # Simple product extraction - look for price patterns
-        import re
-        
-        price_patterns = re.findall(r'\$[\d,]+\.?\d*', screen_text)
-        
-        products = []
-        for i, price in enumerate(price_patterns):
-            products.append({
-                'id': i,
-                'price': price,
-                'text_context': screen_text[max(0, screen_text.find(price)-50):screen_text.find(price)+50]
-            })
-        
-        return products
+    def extract_product_info(self, screen_text, text_boxes=None):
+        """Products (price, rating, review count, title, position) found on screen"""
+        return entity_extractor.products(text_boxes, screen_text)
 
     def find_best_product(self, products):
-        """Find the best product based on simple heuristics"""
+        """Best-rated product, weighting ratings by review count"""
         if not products:
             return None
-        
-        # Simple heuristic: look for highest rated or best value
-        best_product = products[0]
-        
-        for product in products:
-            # Look for rating indicators in context
-            context = product.get('text_context', '').lower()
-            if 'star' in context or 'rating' in context or 'review' in context:
-                best_product = product
-                break
-        
-        return best_product
+        return products[rank_products(products)[0]]
 
     def general_screen_analysis(self, screen_text):
         """General screen analysis for unknown contexts"""
@@ -110,31 +99,38 @@ class IntelligentExecutor:
             print(f"Browser setup failed: {e}")
     
     def execute_intelligent_command(self, command_data, screen_analysis):
-        """Execute commands with proper error handling"""
+        """Execute commands with proper error handling; returns False if the command failed"""
         command_type = command_data.get('type')
+        if self.macros is not None:
+            # Record the command (and its anchors) before it changes the screen
+            self.macros.observe(command_data)
         
         try:
             if command_type == 'screen_click':
-                self.intelligent_click(command_data, screen_analysis)
+                result = self.intelligent_click(command_data, screen_analysis)
             elif command_type == 'screen_type':
-                self.intelligent_type(command_data, screen_analysis)
+                result = self.intelligent_type(command_data, screen_analysis)
             elif command_type == 'app_search_open':
-                self.intelligent_app_open(command_data)
+                result = self.intelligent_app_open(command_data)
             elif command_type == 'analyze_and_recommend':
-                self.analyze_and_recommend(command_data, screen_analysis)
+                result = self.analyze_and_recommend(command_data, screen_analysis)
             elif command_type == 'web_intelligent':
-                self.intelligent_web_interaction(command_data)
+                result = self.intelligent_web_interaction(command_data)
             elif command_type == 'multi_step_task':
-                self.execute_multi_step_task(command_data, screen_analysis)
+                result = self.execute_multi_step_task(command_data, screen_analysis)
+            elif command_type == 'key_press':
+                result = self.key_press(command_data)
             else:
                 # Fallback to basic execution
-                self.basic_execution_fallback(command_data)
+                result = self.basic_execution_fallback(command_data)
+            return result is not False
                 
         except pyautogui.FailSafeException:
             print("PyAutoGUI fail-safe triggered. Command execution stopped for safety.")
             print("Move mouse away from screen corners to continue using the assistant.")
         except Exception as e:
             print(f"Intelligent execution error: {e}")
+        return False
 
     def intelligent_click(self, command_data, screen_analysis):
         """Click with proper fail-safe handling"""
@@ -152,8 +148,10 @@ class IntelligentExecutor:
                 pyautogui.click()
             except pyautogui.FailSafeException:
                 print("Click cancelled due to fail-safe trigger")
+                return False
         else:
             print("No coordinates found for click target")
+            return False
     
     def intelligent_type(self, command_data, screen_analysis):
         """Type text intelligently"""
@@ -171,44 +169,49 @@ class IntelligentExecutor:
             pyautogui.typewrite(text_to_type, interval=0.05)
     
     def intelligent_app_open(self, command_data):
-        """Open apps with fail-safe handling"""
+        """Launch apps directly from the application index"""
         app_name = command_data.get('app_to_search', '')
         
         if app_name:
+            entry = app_index.launch(app_name)
+            if entry:
+                print(f"Opened {entry['name']}")
+                return
+            if platform.system() != 'Windows':
+                print(f"No installed application matches '{app_name}'")
+                return False
+            
+            # Store apps are not on PATH; fall back to Start-menu search
             try:
                 print(f"Opening {app_name} using Windows search...")
-                
-                # Press Windows key
                 pyautogui.press('win')
                 time.sleep(0.5)
-                
-                # Type app name
-                pyautogui.typewrite(app_name, interval=0.1)
-                time.sleep(1)
-                
-                # Press Enter to open first result
+                pyautogui.typewrite(app_name, interval=0.02)
+                time.sleep(0.5)
                 pyautogui.press('enter')
             except pyautogui.FailSafeException:
                 print("App opening cancelled due to fail-safe trigger")
+                return False
     
     def analyze_and_recommend(self, command_data, screen_analysis):
         """Analyze screen content and make intelligent recommendations"""
         current_app = screen_analysis.get('current_app', {}).get('app_name', '')
         screen_text = screen_analysis.get('text_content', '')
+        text_boxes = screen_analysis.get('text_boxes')
         
         if 'spotify' in current_app.lower():
-            self.spotify_intelligent_analysis(screen_text)
+            self.spotify_intelligent_analysis(screen_text, text_boxes)
         elif 'amazon' in screen_text.lower():
-            self.amazon_intelligent_analysis(screen_text)
+            self.amazon_intelligent_analysis(screen_text, text_boxes)
         else:
             self.general_screen_analysis(screen_text)
     
-    def spotify_intelligent_analysis(self, screen_text):
+    def spotify_intelligent_analysis(self, screen_text, text_boxes=None):
         """Intelligent Spotify analysis"""
         print("Analyzing Spotify content...")
         
         # Extract song information from screen text
-        songs = self.extract_song_info(screen_text)
+        songs = self.extract_song_info(screen_text, text_boxes)
         
         if songs:
             # Simple heuristic: look for songs with high play counts or familiar artists
@@ -218,59 +221,34 @@ class IntelligentExecutor:
             # Try to click on the recommended song
             self.click_on_song(best_song)
     
-    def amazon_intelligent_analysis(self, screen_text):
+    def amazon_intelligent_analysis(self, screen_text, text_boxes=None):
         """Intelligent Amazon product analysis"""
         print("Analyzing Amazon products...")
         
         # Extract product information
-        products = self.extract_product_info(screen_text)
+        products = self.extract_product_info(screen_text, text_boxes)
         
         if products:
             best_product = self.find_best_product(products)
             print(f"Recommended product: {best_product}")
     
-    def extract_song_info(self, screen_text):
-        """Extract song information from Spotify screen"""
-        # Simple regex patterns for song extraction
-        import re
-        
-        # Look for patterns like "Song Name - Artist"
-        song_patterns = re.findall(r'([A-Za-z0-9\s]+)\s*-\s*([A-Za-z0-9\s]+)', screen_text)
-        
-        songs = []
-        for match in song_patterns:
-            songs.append({
-                'title': match[0].strip(),
-                'artist': match[1].strip()
-            })
-        
-        return songs
+    def extract_song_info(self, screen_text, text_boxes=None):
+        """Title/artist pairs (with duration and position when available) from a track list"""
+        return entity_extractor.songs(text_boxes, screen_text)
     
     def find_best_song(self, songs):
         """Find the best song using simple heuristics"""
-        # Simple scoring based on common popular artists/words
-        popular_indicators = ['official', 'remix', 'feat', 'ft', 'radio edit']
-        
-        best_song = None
-        best_score = 0
-        
-        for song in songs:
-            score = 0
-            song_text = f"{song['title']} {song['artist']}".lower()
-            
-            for indicator in popular_indicators:
-                if indicator in song_text:
-                    score += 1
-            
-            if score > best_score:
-                best_score = score
-                best_song = song
-        
-        return best_song or songs[0] if songs else None
+        if not songs:
+            return None
+        return songs[rank_songs(songs)[0]]
     
     def click_on_song(self, song):
         """Try to click on a specific song"""
-        if song:
+        if song and song.get('position'):
+            # Position comes from the OCR box the title was read from
+            pyautogui.click(*song['position'])
+            print(f"Clicked on song: {song['title']}")
+        elif song:
             # Take a new screenshot and try to find the song
             screenshot = pyautogui.screenshot()
             
@@ -287,8 +265,29 @@ class IntelligentExecutor:
             except:
                 print(f"Could not locate song: {song['title']}")
     
+    def key_press(self, command_data):
+        """Press a key or key combination such as 'enter' or 'ctrl+l'"""
+        key = command_data.get('key', '')
+        if key:
+            keys = [k.strip() for k in key.lower().split('+') if k.strip()]
+            if len(keys) > 1:
+                pyautogui.hotkey(*keys)
+            elif keys:
+                pyautogui.press(keys[0])
+    
     def execute_multi_step_task(self, command_data, screen_analysis):
         """Execute complex multi-step tasks"""
+        # Typed plan from a single LLM call; verified step by step
+        if command_data.get('steps') and self.task_planner:
+            completed = self.task_planner.execute_plan(
+                command_data.get('goal', ''),
+                command_data['steps'],
+                screen_analysis,
+                self
+            )
+            print("Plan completed" if completed else "Plan stopped before completion")
+            return completed
+        
         steps = command_data.get('multi_steps', [])
         
         for i, step in enumerate(steps):
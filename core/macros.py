@@ -0,0 +1,427 @@
+import base64
+import json
+import os
+import re
+import threading
+import time
+import cv2
+import numpy as np
+from core.tracing import tracer
+from core.window_tracker import window_tracker
+
+# Executor commands a macro can replay, and the fields each one needs
+REPLAY_FIELDS = {
+    'app_search_open': ('app_to_search',),
+    'screen_click': ('coordinates', 'target_element'),
+    'screen_type': ('text_to_type', 'coordinates'),
+    'key_press': ('key',),
+    'web_intelligent': ('url',),
+    'web_search': ('query',)
+}
+# Fields whose recorded value may come from the command text and becomes a parameter
+PARAM_FIELDS = ('text_to_type', 'query')
+# Commands that only orchestrate others; their inner commands are recorded instead
+CONTAINER_TYPES = ('multi_step_task',)
+
+# Window title of the chat window; it is focused while commands run
+ASSISTANT_WINDOW_TITLE = "AI Assistant"
+
+
+def normalize_phrase(text):
+    return re.sub(r'\s+', ' ', text).strip().rstrip('.!?').strip()
+
+
+def encode_image(gray):
+    ok, data = cv2.imencode('.png', gray)
+    return base64.b64encode(data.tobytes()).decode('ascii') if ok else None
+
+
+def decode_image(text):
+    return cv2.imdecode(np.frombuffer(base64.b64decode(text), dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+class Recording:
+    """Commands executed for one user request, with the anchors seen before each"""
+
+    def __init__(self, phrase):
+        self.phrase = phrase
+        self.steps = []
+        # Steps up to here passed plan verification
+        self.confirmed = 0
+        self.replayable = True
+
+
+class MacroLibrary:
+    """Records successful command sequences and replays them without analysis or inference.
+
+    A recording is compiled into a macro whose trigger is the command text,
+    with typed text and search queries that appear in it turned into
+    parameters ("search lofi beats on spotify" -> "search {p0} on spotify").
+    Replay checks cheap anchors before each step: the active app (from the
+    window tracker), a small template crop around click targets, or, for
+    clicks whose content depends on a parameter, that the area has changed
+    and settled. A failed anchor deletes the macro; the command then takes
+    the normal path and is recorded again.
+
+    Only task-planner runs are recorded, and only when every step passed
+    verification and the last step had a real success condition; a command
+    that merely did not raise proves nothing about where it clicked.
+
+    macros.json holds typed text that is not a parameter and small
+    grayscale crops of the screen, unencrypted, in the working directory.
+    The library is therefore off unless ALTQU_MACROS=1.
+    """
+
+    def __init__(self, screen_intelligence, path='macros.json', max_macros=100, template_size=(64, 32),
+                 match_threshold=0.85, anchor_timeout=4.0):
+        self.screen_intelligence = screen_intelligence
+        self.path = path
+        self.max_macros = max_macros
+        self.template_size = template_size
+        self.match_threshold = match_threshold
+        self.anchor_timeout = anchor_timeout
+        self.macros = {}
+        self.compiled = {}
+        # Decoded template crops, keyed by their encoded form
+        self.templates = {}
+        self.recording = None
+        self.replaying = False
+        self.replays = 0
+        self.invalidations = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self.load()
+        tracer.register_metrics('macros', self.metrics)
+
+    def load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self.macros = json.load(f).get('macros', {})
+            except Exception as e:
+                print(f"Error loading macros: {e}")
+                self.macros = {}
+        self.compiled = {pattern: re.compile(pattern, re.IGNORECASE) for pattern in self.macros}
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({'version': 1, 'macros': self.macros}, f)
+        except Exception as e:
+            print(f"Error saving macros: {e}")
+
+    # Recording
+
+    def start_recording(self, user_input):
+        self.recording = Recording(normalize_phrase(user_input))
+
+    def observe(self, command):
+        """Called by the executor before it runs a command"""
+        recording = self.recording
+        if recording is None or self.replaying:
+            return
+        kind = command.get('type')
+        if kind in CONTAINER_TYPES:
+            return
+        if kind not in REPLAY_FIELDS or (kind == 'screen_click' and not command.get('coordinates')):
+            # Depends on what is on screen (recommendations, text-only targets)
+            recording.replayable = False
+            return
+
+        step = {
+            'command': {'type': kind, **{f: command[f] for f in REPLAY_FIELDS[kind] if command.get(f) is not None}},
+            'params': {},
+            'before': [],
+            'after': []
+        }
+        window = window_tracker.current()
+        if kind != 'app_search_open' and window['app_name'] not in ('Unknown', ASSISTANT_WINDOW_TITLE):
+            step['before'].append({'kind': 'window', 'app_name': window['app_name']})
+        if kind == 'screen_click':
+            anchor = self.capture_template(command['coordinates'])
+            if anchor is not None:
+                step['before'].append(anchor)
+        recording.steps.append(step)
+
+    def observe_success(self, success):
+        """Plan verification that held after the last command becomes a post-step anchor"""
+        recording = self.recording
+        if recording is None or self.replaying or not recording.steps:
+            return
+        after = recording.steps[-1]['after']
+        if success.get('window_title_contains'):
+            after.append({'kind': 'title', 'value': success['window_title_contains']})
+        if success.get('text_visible'):
+            after.append({'kind': 'text', 'value': success['text_visible']})
+        recording.confirmed = len(recording.steps)
+
+    def discard_unverified(self):
+        """Drop commands of a plan step that failed verification; the repaired plan replaces them"""
+        recording = self.recording
+        if recording is not None and not self.replaying:
+            del recording.steps[recording.confirmed:]
+
+    def finish_recording(self, ok):
+        """Compile and store the recording if every step's success was verified"""
+        recording, self.recording = self.recording, None
+        if not ok or recording is None or not recording.replayable or not recording.steps:
+            return None
+        if recording.confirmed != len(recording.steps) or not recording.steps[-1]['after']:
+            # Unverified commands (single LLM actions, legacy step lists) are never compiled
+            return None
+        macro = self.compile(recording)
+        if macro is None:
+            return None
+        with self._lock:
+            self.macros.pop(macro['pattern'], None)
+            self.macros[macro['pattern']] = macro
+            self.compiled[macro['pattern']] = re.compile(macro['pattern'], re.IGNORECASE)
+            while len(self.macros) > self.max_macros:
+                # Least recently used first
+                stale = min(self.macros, key=lambda p: self.macros[p]['last_used'])
+                self.macros.pop(stale)
+                self.compiled.pop(stale, None)
+            self.recorded += 1
+        self.save()
+        return macro
+
+    def compile(self, recording):
+        phrase = recording.phrase
+        steps = json.loads(json.dumps(recording.steps))
+
+        # Recorded values that occur in the command text become parameters
+        spans = []
+        values = {}
+        first_param_step = None
+        for index, step in enumerate(steps):
+            for field in PARAM_FIELDS:
+                value = step['command'].get(field)
+                if not isinstance(value, str) or not value.strip():
+                    continue
+                key = value.strip().lower()
+                if key not in values:
+                    match = re.search(r'(?<!\w)' + re.escape(value.strip()) + r'(?!\w)', phrase, re.IGNORECASE)
+                    if not match or any(match.start() < end and start < match.end() for start, end, _ in spans):
+                        continue
+                    values[key] = f'p{len(values)}'
+                    spans.append((match.start(), match.end(), values[key]))
+                step['params'][field] = values[key]
+                del step['command'][field]
+                if first_param_step is None:
+                    first_param_step = index
+            for anchor in step['after']:
+                if anchor['kind'] == 'text' and anchor['value'].strip().lower() in values:
+                    anchor['param'] = values[anchor.pop('value').strip().lower()]
+
+        pattern = []
+        position = 0
+        for start, end, name in sorted(spans):
+            pattern.append(self.literal_pattern(phrase[position:start]))
+            pattern.append(f'(?P<{name}>.+?)')
+            position = end
+        pattern.append(self.literal_pattern(phrase[position:]))
+        literal = phrase
+        for start, end, _ in sorted(spans, reverse=True):
+            literal = literal[:start] + literal[end:]
+        if not re.search(r'\w', literal):
+            # A trigger made only of parameters would match every command
+            return None
+
+        # Clicks after a parameterized step land on content that depends on it
+        if first_param_step is not None:
+            for step in steps[first_param_step + 1:]:
+                for i, anchor in enumerate(step['before']):
+                    if anchor['kind'] == 'template':
+                        step['before'][i] = {'kind': 'changed', 'bounds': anchor['bounds'], 'since': first_param_step}
+
+        now = time.time()
+        return {
+            'phrase': phrase,
+            'pattern': '^' + ''.join(pattern) + r'[.!?]*$',
+            'params': sorted(set(values.values())),
+            'steps': steps,
+            'created': now,
+            'last_used': now,
+            'uses': 0
+        }
+
+    def literal_pattern(self, text):
+        words = text.split()
+        if not words:
+            return r'\s*' if text else ''
+        inner = r'\s+'.join(re.escape(word) for word in words)
+        lead = r'\s+' if text[:1].isspace() else ''
+        trail = r'\s+' if text[-1:].isspace() else ''
+        return lead + inner + trail
+
+    # Replay
+
+    def match(self, user_input):
+        """(macro, params) for the best macro matching the command, or None"""
+        phrase = normalize_phrase(user_input)
+        best = None
+        with self._lock:
+            for pattern, macro in self.macros.items():
+                found = self.compiled[pattern].match(phrase)
+                if not found:
+                    continue
+                # Fewer parameters = more specific trigger
+                if best is None or len(macro['params']) < len(best[0]['params']):
+                    best = (macro, found.groupdict())
+        return best
+
+    def run(self, user_input, executor):
+        """Replay the matching macro; False if none matched or an anchor failed"""
+        found = self.match(user_input)
+        if found is None:
+            return False
+        macro, params = found
+        with tracer.span('macro_replay', steps=len(macro['steps']), params=len(params)) as span:
+            self.replaying = True
+            try:
+                ok, reason = self.replay(macro, params, executor)
+            except Exception as e:
+                ok, reason = False, str(e)
+            finally:
+                self.replaying = False
+            span.set('ok', ok)
+        if ok:
+            with self._lock:
+                macro['uses'] += 1
+                macro['last_used'] = time.time()
+                self.replays += 1
+            self.save()
+            return True
+        self.invalidate(macro, reason)
+        return False
+
+    def replay(self, macro, params, executor):
+        steps = macro['steps']
+        snapshots = {}
+        for index, step in enumerate(steps):
+            # Remember how areas looked before the step whose results they show
+            for later in steps[index + 1:]:
+                for anchor in later['before']:
+                    if anchor['kind'] == 'changed' and anchor['since'] == index:
+                        snapshots[id(anchor)] = self.grab_gray(anchor['bounds'])
+
+            command = dict(step['command'])
+            for field, name in step['params'].items():
+                command[field] = params[name]
+            for anchor in step['before']:
+                ok, position = self.check_anchor(anchor, params, snapshots.get(id(anchor)))
+                if not ok:
+                    return False, f"step {index + 1}: {anchor['kind']} anchor did not match"
+                if position is not None and command.get('coordinates'):
+                    # The target moved slightly; click where it was found
+                    command['coordinates'] = position
+            if not executor.execute_intelligent_command(command, None):
+                return False, f"step {index + 1}: {command['type']} failed"
+            for anchor in step['after']:
+                ok, _ = self.check_anchor(anchor, params, None)
+                if not ok:
+                    return False, f"step {index + 1}: {anchor['kind']} check failed"
+        return True, ''
+
+    def check_anchor(self, anchor, params, snapshot):
+        """Wait for one anchor; returns (ok, adjusted click position or None)"""
+        kind = anchor['kind']
+        if kind == 'text':
+            text = params.get(anchor['param'], '') if 'param' in anchor else anchor['value']
+            return self.screen_intelligence.wait_for_text(text, self.anchor_timeout) is not None, None
+
+        deadline = time.perf_counter() + self.anchor_timeout
+        previous = None
+        while True:
+            if kind == 'window':
+                if window_tracker.current()['app_name'] == anchor['app_name']:
+                    return True, None
+            elif kind == 'title':
+                if anchor['value'].lower() in window_tracker.current()['title'].lower():
+                    return True, None
+            elif kind == 'template':
+                position = self.find_template(anchor)
+                if position is not None:
+                    return True, position
+            elif kind == 'changed':
+                current = self.grab_gray(anchor['bounds'])
+                if current is not None and snapshot is not None and previous is not None:
+                    changed = cv2.absdiff(current, snapshot).mean() > 4.0
+                    settled = cv2.absdiff(current, previous).mean() < 1.0
+                    if changed and settled:
+                        return True, None
+                previous = current
+            else:
+                return False, None
+            if time.perf_counter() >= deadline:
+                return False, None
+            time.sleep(0.03 if kind in ('window', 'title') else 0.08)
+
+    def invalidate(self, macro, reason):
+        print(f"Macro '{macro['phrase']}' is stale ({reason}); removing it")
+        with self._lock:
+            self.macros.pop(macro['pattern'], None)
+            self.compiled.pop(macro['pattern'], None)
+            self.invalidations += 1
+        self.save()
+
+    # Anchors
+
+    def template_bounds(self, position, padding=0):
+        width, height = self.template_size
+        return (int(position[0]) - width // 2 - padding, int(position[1]) - height // 2 - padding,
+                width + 2 * padding, height + 2 * padding)
+
+    def grab_gray(self, bounds):
+        si = self.screen_intelligence
+        virtual_bounds = si.capture_backend.virtual_bounds()
+        clipped = si.clip_region(tuple(bounds), virtual_bounds)
+        if clipped is None or tuple(clipped) != tuple(bounds):
+            # Partly off screen: comparisons against the recorded crop would be wrong
+            return None
+        image = si.capture_backend.grab(clipped)
+        if image.ndim == 2:
+            return np.ascontiguousarray(image)
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(image, code)
+
+    def capture_template(self, position):
+        bounds = self.template_bounds(position)
+        try:
+            gray = self.grab_gray(bounds)
+        except Exception as e:
+            print(f"Macro template capture failed: {e}")
+            return None
+        if gray is None or gray.std() < 2.0:
+            # Flat areas match anywhere; they prove nothing about the screen
+            return None
+        return {'kind': 'template', 'bounds': list(bounds), 'image': encode_image(gray)}
+
+    def find_template(self, anchor):
+        """Center of the recorded crop if it is still near its recorded place"""
+        template = self.templates.get(anchor['image'])
+        if template is None:
+            template = self.templates[anchor['image']] = decode_image(anchor['image'])
+        x, y, w, h = anchor['bounds']
+        padding = 24
+        area = self.grab_gray((x - padding, y - padding, w + 2 * padding, h + 2 * padding))
+        if area is None:
+            area = self.grab_gray((x, y, w, h))
+            padding = 0
+            if area is None:
+                return None
+        scores = cv2.matchTemplate(area, template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, location = cv2.minMaxLoc(scores)
+        if best < self.match_threshold:
+            return None
+        return (x - padding + location[0] + w // 2, y - padding + location[1] + h // 2)
+
+    def metrics(self):
+        return {
+            'macros': len(self.macros),
+            'recorded': self.recorded,
+            'replays': self.replays,
+            'invalidations': self.invalidations
+        }
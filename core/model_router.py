@@ -0,0 +1,100 @@
+import os
+import re
+import threading
+
+# Words that signal reasoning over screen content or several actions
+COMPLEX_MARKERS = [
+    'best', 'compare', 'cheapest', 'recommend', 'analyze', 'analyse', 'summarize', 'find',
+    'which', 'why', 'then', 'after', 'each', 'all', 'every', 'until', 'explain'
+]
+
+SIMPLE_PATTERN = re.compile(r'^(open|launch|start|close|search|google|type|click|press)\b')
+
+
+class ModelRouter:
+    """Picks the smallest local model that fits the command and the latency budget"""
+
+    def __init__(self, client, models=None, latency_budget_ms=None, min_confidence=0.6):
+        self.client = client
+        # Ordered from smallest/fastest to largest
+        models = models or os.environ.get('ALTQU_MODELS', 'llama3.2:1b,llama3').split(',')
+        self.models = [m.strip() for m in models if m.strip()]
+        self.latency_budget_ms = float(latency_budget_ms or os.environ.get('ALTQU_LATENCY_BUDGET_MS', 4000))
+        self.min_confidence = min_confidence
+        self.stats = {m: {'count': 0, 'mean_ms': None, 'failures': 0} for m in self.models}
+        self._available = None
+        self._lock = threading.Lock()
+
+    def available_models(self):
+        """Configured models that are actually pulled; checked once"""
+        if self._available is None:
+            try:
+                response = self.client.list()
+                installed = set()
+                for model in response.get('models', []):
+                    name = model.get('model') or model.get('name', '')
+                    installed.add(name)
+                    installed.add(name.split(':')[0] if name.endswith(':latest') else name)
+                self._available = [m for m in self.models if m in installed] or self.models[-1:]
+            except Exception as e:
+                print(f"Model listing failed, using {self.models[-1]}: {e}")
+                self._available = self.models[-1:]
+        return self._available
+
+    def complexity(self, user_input):
+        """Rough 0..1 estimate of how much reasoning a command needs"""
+        text = user_input.lower().strip()
+        words = text.split()
+        score = min(len(words) / 20.0, 0.5)
+        score += 0.15 * sum(1 for marker in COMPLEX_MARKERS if re.search(rf'\b{marker}\b', text))
+        score += 0.1 * (text.count(',') + text.count(' and '))
+        if SIMPLE_PATTERN.match(text) and len(words) <= 4:
+            score -= 0.3
+        return max(0.0, min(1.0, score))
+
+    def choose(self, user_input):
+        """Model for a first attempt at `user_input`"""
+        models = self.available_models()
+        # Spread the tiers evenly over the complexity range
+        index = min(int(self.complexity(user_input) * len(models)), len(models) - 1)
+
+        # Step down while the expected latency would blow the budget
+        while index > 0:
+            mean_ms = self.stats[models[index]]['mean_ms']
+            if mean_ms is None or mean_ms <= self.latency_budget_ms:
+                break
+            index -= 1
+        return models[index]
+
+    def escalate(self, model):
+        """Next larger model after a low-confidence or invalid answer, or None"""
+        models = self.available_models()
+        if model not in models:
+            return None
+        index = models.index(model)
+        return models[index + 1] if index + 1 < len(models) else None
+
+    def needs_escalation(self, parsed_response):
+        if parsed_response is None:
+            return True
+        confidence = parsed_response.get('confidence')
+        return confidence is not None and confidence < self.min_confidence
+
+    def record(self, model, elapsed_ms, ok=True):
+        """Update the per-model latency average (EWMA) and failure count"""
+        with self._lock:
+            stat = self.stats.setdefault(model, {'count': 0, 'mean_ms': None, 'failures': 0})
+            stat['count'] += 1
+            stat['mean_ms'] = elapsed_ms if stat['mean_ms'] is None else 0.7 * stat['mean_ms'] + 0.3 * elapsed_ms
+            if not ok:
+                stat['failures'] += 1
+
+    def metrics(self):
+        values = {'latency_budget_ms': self.latency_budget_ms}
+        for model, stat in self.stats.items():
+            key = re.sub(r'[^a-zA-Z0-9_]', '_', model)
+            values[f'{key}_requests'] = stat['count']
+            values[f'{key}_failures'] = stat['failures']
+            if stat['mean_ms'] is not None:
+                values[f'{key}_mean_ms'] = round(stat['mean_ms'], 1)
+        return values
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+
+def exact_hash(tile):
+    """Content hash of a grayscale tile (shape included so crops never collide)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(tile.shape, dtype=np.int32).tobytes())
+    digest.update(np.ascontiguousarray(tile).tobytes())
+    return 'x' + digest.hexdigest()
+
+
+def perceptual_hash(tile):
+    """64-bit difference hash; tolerant to anti-aliasing and subpixel shifts"""
+    small = cv2.resize(tile, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = int(np.packbits(bits).view('>u8')[0])
+    # Bucket by aspect so different-width lines with similar gradients stay apart
+    height, width = tile.shape[:2]
+    return f'p{value:016x}-{round(width / max(height, 1), 1)}'
+
+
+def disk_cache_path():
+    """Where the persistent tier lives, or None to keep the cache in memory.
+
+    Cached tiles hold whatever text was on screen, so the disk tier is
+    opt-in: ALTQU_OCR_CACHE_PATH names the file, or ALTQU_OCR_CACHE=disk
+    puts it under the user cache directory.
+    """
+    path = os.environ.get('ALTQU_OCR_CACHE_PATH')
+    if path:
+        return path
+    if os.environ.get('ALTQU_OCR_CACHE') == 'disk':
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        return os.path.join(cache_home, 'altqu', 'ocr_cache.sqlite3')
+    return None
+
+
+class OCRCache:
+    """Recognized text per image tile: in-memory LRU, optionally backed by a size-bounded SQLite store"""
+
+    def __init__(self, path=None, memory_entries=4096, disk_entries=50000, hash_mode='exact'):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.hash_function = perceptual_hash if hash_mode == 'perceptual' else exact_hash
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self.miss_cost_ms = 0.0
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        self.open()
+
+    def open(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+            # Owner-only from the start; sqlite would create it with the umask
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            os.chmod(self.path, 0o600)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS ocr_tiles ('
+                'key TEXT PRIMARY KEY, text TEXT NOT NULL, confidence REAL NOT NULL, last_used REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS ocr_tiles_last_used ON ocr_tiles (last_used)')
+            self._db.commit()
+        except Exception as e:
+            print(f"OCR cache disk store unavailable: {e}")
+            self._db = None
+
+    def key(self, tile):
+        return self.hash_function(tile)
+
+    def get(self, key):
+        """Return (text, confidence) or None"""
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self._hit()
+                return self.memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute('SELECT text, confidence FROM ocr_tiles WHERE key = ?', (key,)).fetchone()
+                    if row:
+                        self._db.execute('UPDATE ocr_tiles SET last_used = ? WHERE key = ?', (time.time(), key))
+                        value = (row[0], row[1])
+                        self._remember(key, value)
+                        self._hit()
+                        return value
+                except Exception as e:
+                    print(f"OCR cache read failed: {e}")
+
+            self.misses += 1
+            return None
+
+    def put(self, key, text, confidence):
+        with self._lock:
+            self._remember(key, (text, confidence))
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO ocr_tiles (key, text, confidence, last_used) VALUES (?, ?, ?, ?)',
+                    (key, text, float(confidence), time.time())
+                )
+                self._writes += 1
+                if self._writes % 256 == 0:
+                    self._evict()
+                self._db.commit()
+            except Exception as e:
+                print(f"OCR cache write failed: {e}")
+
+    def record_recognition_cost(self, elapsed_ms, tiles):
+        """Track mean recognition cost per tile so hits can be converted to saved time"""
+        if tiles:
+            per_tile = elapsed_ms / tiles
+            self.miss_cost_ms = per_tile if not self.miss_cost_ms else 0.8 * self.miss_cost_ms + 0.2 * per_tile
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'saved_ms': round(self.saved_ms, 1),
+            'memory_entries': len(self.memory)
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def _hit(self):
+        self.hits += 1
+        self.saved_ms += self.miss_cost_ms
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self):
+        count = self._db.execute('SELECT COUNT(*) FROM ocr_tiles').fetchone()[0]
+        if count > self.disk_entries:
+            self._db.execute(
+                'DELETE FROM ocr_tiles WHERE key IN (SELECT key FROM ocr_tiles ORDER BY last_used LIMIT ?)',
+                (count - self.disk_entries,)
+            )
@@ -0,0 +1,274 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+import psutil
+
+
+class OCRWorkerError(Exception):
+    """The worker crashed, timed out or reported a failure"""
+
+
+def attach_shared_memory(name):
+    """Open an existing segment without handing its lifetime to this process"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    segment = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        # Before 3.13 attaching registers the segment for unlinking at exit
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def to_plain(results):
+    """easyocr results with numpy scalars turned into plain, cheaply pickled types"""
+    return [
+        ([[int(x), int(y)] for x, y in box], str(text), float(confidence))
+        for box, text, confidence in results
+    ]
+
+
+def worker_main(languages, conn):
+    """Worker process: load the model once, then serve jobs until told to stop"""
+    import easyocr
+    reader = easyocr.Reader(list(languages))
+    conn.send(('ready', os.getpid()))
+
+    segment = None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message[0] == 'stop':
+            break
+
+        method, segment_name, shape, dtype, kwargs = message
+        try:
+            if segment is None or segment.name != segment_name:
+                if segment is not None:
+                    segment.close()
+                segment = attach_shared_memory(segment_name)
+            image = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+            if method == 'recognize':
+                results = reader.recognize(image, **kwargs)
+            else:
+                results = reader.readtext(image, **kwargs)
+            conn.send(('ok', to_plain(results)))
+            del image
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+    if segment is not None:
+        segment.close()
+
+
+class OCRWorker:
+    """One recognizer process plus the shared-memory segment frames are copied into"""
+
+    def __init__(self, context, languages):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(languages, child_conn),
+            name='altqu-ocr-worker',
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.jobs = 0
+        self.segment = None
+
+    def wait_ready(self, timeout):
+        if self.ready:
+            return
+        if not self.conn.poll(timeout):
+            raise OCRWorkerError('worker did not finish loading the model in time')
+        try:
+            self.conn.recv()
+        except EOFError:
+            raise OCRWorkerError('worker exited while loading the model')
+        self.ready = True
+
+    def frame_buffer(self, nbytes):
+        # Grow only; the same segment is reused for every job on this worker
+        if self.segment is None or self.segment.size < nbytes:
+            self.release_segment()
+            self.segment = shared_memory.SharedMemory(create=True, size=max(nbytes, 1 << 20))
+        return self.segment
+
+    def rss_bytes(self):
+        try:
+            return psutil.Process(self.process.pid).memory_info().rss
+        except Exception:
+            return 0
+
+    def release_segment(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = None
+
+    def stop(self, timeout=2.0):
+        try:
+            self.conn.send(('stop',))
+        except Exception:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout)
+        self.conn.close()
+        self.release_segment()
+
+
+class OCRWorkerPool:
+    """EasyOCR in separate processes, so its GIL time and PyTorch memory stay out of the UI.
+
+    Frames go through shared memory; only boxes and strings are pickled.
+    A worker is replaced after `max_jobs` jobs or when its resident memory
+    passes `max_rss_mb`, and a crashed or hung worker is replaced without
+    affecting the caller beyond one failed job.
+    """
+
+    def __init__(self, workers=1, languages=('en',), max_jobs=500, max_rss_mb=2048, job_timeout=30.0, load_timeout=120.0):
+        self.size = max(1, workers)
+        self.languages = tuple(languages)
+        self.max_jobs = max_jobs
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.job_timeout = job_timeout
+        self.load_timeout = load_timeout
+        # Never fork a process that has Tk, torch threads and X connections
+        self.context = multiprocessing.get_context('spawn')
+        self.idle = queue.Queue()
+        self.workers = []
+        self.recycled = 0
+        self.crashes = 0
+        self.jobs = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        for _ in range(self.size):
+            self.idle.put(self.spawn())
+
+    def spawn(self):
+        worker = OCRWorker(self.context, self.languages)
+        with self._lock:
+            self.workers.append(worker)
+        return worker
+
+    def retire(self, worker):
+        with self._lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        worker.stop()
+
+    def recognize(self, image, horizontal_list, free_list=None, batch_size=16):
+        return self.run('recognize', image, {
+            'horizontal_list': horizontal_list,
+            'free_list': free_list or [],
+            'batch_size': batch_size
+        })
+
+    def readtext(self, image, **kwargs):
+        return self.run('readtext', image, kwargs)
+
+    def run(self, method, image, kwargs):
+        if self.closed:
+            raise OCRWorkerError('OCR pool is closed')
+        image = np.ascontiguousarray(image)
+        worker = self.idle.get()
+        healthy = False
+        try:
+            worker.wait_ready(self.load_timeout)
+            segment = worker.frame_buffer(image.nbytes)
+            np.ndarray(image.shape, dtype=image.dtype, buffer=segment.buf)[...] = image
+            worker.conn.send((method, segment.name, image.shape, image.dtype.str, kwargs))
+
+            if not worker.conn.poll(self.job_timeout):
+                raise OCRWorkerError(f'OCR job exceeded {self.job_timeout:g}s')
+            status, payload = worker.conn.recv()
+            healthy = True
+            if status != 'ok':
+                raise OCRWorkerError(payload)
+            return payload
+        except (EOFError, OSError) as e:
+            raise OCRWorkerError(f'OCR worker died: {e}')
+        finally:
+            self.jobs += 1
+            worker.jobs += 1
+            self.check_in(worker, healthy)
+
+    def check_in(self, worker, healthy):
+        """Return the worker to the pool, or replace it if it crashed, hung or grew too big"""
+        if self.closed:
+            self.retire(worker)
+            return
+        if not healthy:
+            self.crashes += 1
+        elif worker.jobs < self.max_jobs and worker.rss_bytes() < self.max_rss_bytes:
+            self.idle.put(worker)
+            return
+        else:
+            self.recycled += 1
+
+        # The replacement loads its model while the old process shuts down
+        self.idle.put(self.spawn())
+        threading.Thread(target=self.retire, args=(worker,), name='altqu-ocr-recycle', daemon=True).start()
+
+    def metrics(self):
+        with self._lock:
+            workers = list(self.workers)
+        return {
+            'workers': len(workers),
+            'jobs': self.jobs,
+            'recycled': self.recycled,
+            'crashes': self.crashes,
+            'rss_mb': round(sum(w.rss_bytes() for w in workers) / (1024 * 1024), 1)
+        }
+
+    def close(self):
+        self.closed = True
+        with self._lock:
+            workers = list(self.workers)
+        for worker in workers:
+            self.retire(worker)
+
+
+class InProcessOCR:
+    """Same interface as OCRWorkerPool, running EasyOCR in this process (ALTQU_OCR_WORKERS=0)"""
+
+    def __init__(self, languages=('en',)):
+        import easyocr
+        self.reader = easyocr.Reader(list(languages))
+        # The recognizer is shared by the per-monitor workers
+        self._lock = threading.Lock()
+
+    def recognize(self, image, horizontal_list, free_list=None, batch_size=16):
+        with self._lock:
+            return self.reader.recognize(image, horizontal_list=horizontal_list, free_list=free_list or [], batch_size=batch_size)
+
+    def readtext(self, image, **kwargs):
+        with self._lock:
+            return self.reader.readtext(image, **kwargs)
+
+    def metrics(self):
+        return {'workers': 0}
+
+    def close(self):
+        pass
+
+
+def create_ocr_engine(workers=None, **kwargs):
+    """Worker pool by default; ALTQU_OCR_WORKERS=0 keeps OCR in-process"""
+    if workers is None:
+        workers = int(os.environ.get('ALTQU_OCR_WORKERS', 1))
+    if workers <= 0:
+        return InProcessOCR()
+    kwargs.setdefault('max_jobs', int(os.environ.get('ALTQU_OCR_MAX_JOBS', 500)))
+    kwargs.setdefault('max_rss_mb', int(os.environ.get('ALTQU_OCR_MAX_RSS_MB', 2048)))
+    return OCRWorkerPool(workers=workers, **kwargs)
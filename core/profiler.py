@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, thread_prefix='altqu-', output_dir='profiles'):
+        self.interval = interval
+        self.thread_prefix = thread_prefix
+        self.output_dir = output_dir
+        self.stacks = Counter()
+        self.sample_count = 0
+        self.last_report = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration, on_complete=None):
+        """Sample worker threads for `duration` seconds, then write the report"""
+        with self._lock:
+            if self.is_running():
+                return False
+            self.stacks = Counter()
+            self.sample_count = 0
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(duration, on_complete),
+                name='profiler',
+                daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self, duration, on_complete):
+        started = time.time()
+        deadline = time.perf_counter() + duration
+        while not self._stop_event.is_set() and time.perf_counter() < deadline:
+            self.sample()
+            time.sleep(self.interval)
+
+        report = self.write_report(started)
+        self.last_report = report
+        if on_complete:
+            try:
+                on_complete(report)
+            except Exception as e:
+                print(f"Profiler callback failed: {e}")
+
+    def sample(self):
+        """Take one stack sample of every matching worker thread"""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, '')
+            if not name.startswith(self.thread_prefix):
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(name)
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.sample_count += 1
+
+    def top_functions(self, limit=15):
+        """Leaf functions with the most samples (self time)"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def write_report(self, started):
+        """Write a collapsed-stack file (flamegraph.pl / speedscope input) plus a summary"""
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started))
+            collapsed_path = os.path.join(self.output_dir, f'profile-{stamp}.collapsed')
+            summary_path = os.path.join(self.output_dir, f'profile-{stamp}.txt')
+
+            with open(collapsed_path, 'w') as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+
+            total = sum(self.stacks.values()) or 1
+            with open(summary_path, 'w') as f:
+                f.write(f"Samples: {self.sample_count} ticks, {sum(self.stacks.values())} thread stacks\n")
+                f.write("Top functions (self samples):\n")
+                for function, count in self.top_functions():
+                    f.write(f"{count:6d} {100.0 * count / total:5.1f}%  {function}\n")
+
+            print(f"Profile written to {collapsed_path}")
+            return {'collapsed': collapsed_path, 'summary': summary_path, 'samples': self.sample_count}
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            return None
+
+
+def parse_duration(text, default=30.0):
+    """Parse '30', '30s', '2m' or '500ms' into seconds"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(ms|s|m)?\s*', text or '')
+    if not match:
+        return default
+    value = float(match.group(1))
+    unit = match.group(2) or 's'
+    return value / 1000 if unit == 'ms' else value * 60 if unit == 'm' else value
+
+
+# Shared profiler toggled from the chat UI or ALTQU_PROFILE
+profiler = SamplingProfiler()
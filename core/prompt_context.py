@@ -0,0 +1,132 @@
+import math
+import re
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'the', 'to', 'of', 'in', 'on', 'for', 'is', 'it', 'this', 'that', 'me',
+    'my', 'i', 'you', 'please', 'can', 'with', 'at', 'from', 'be', 'do', 'go', 'now'
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9$][a-z0-9'$.,]*")
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters or ~0.75 words per token, whichever is larger)"""
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 1.33))
+
+
+def tokenize(text):
+    return [w.strip('.,') for w in WORD_PATTERN.findall(text.lower()) if w.strip('.,') not in STOP_WORDS]
+
+
+class PromptContextBuilder:
+    """Packs the most relevant screen content into a fixed token budget"""
+
+    def __init__(self, token_budget=400, min_confidence=0.3, max_elements=12):
+        self.token_budget = token_budget
+        self.min_confidence = min_confidence
+        self.max_elements = max_elements
+
+    def build(self, user_input, screen_analysis):
+        """Return {'text': ..., 'tokens': ..., 'lines_used': ..., 'lines_dropped': ...}"""
+        screen_analysis = screen_analysis or {}
+        budget = self.token_budget
+        sections = []
+
+        app = screen_analysis.get('current_app') or {}
+        header = f"Current app: {app.get('app_name', 'Unknown')} ({app.get('title', 'Unknown')})"
+        sections.append(header)
+        budget -= estimate_tokens(header)
+
+        elements = self.summarize_elements(screen_analysis)
+        if elements and estimate_tokens(elements) <= budget // 3:
+            sections.append(elements)
+            budget -= estimate_tokens(elements)
+
+        text_header = "Visible text (most relevant first, [x,y] screen position):"
+        budget -= estimate_tokens(text_header)
+
+        candidates = self.rank_lines(user_input, screen_analysis)
+        used = []
+        for score, line in candidates:
+            cost = estimate_tokens(line)
+            if cost > budget:
+                continue
+            used.append(line)
+            budget -= cost
+
+        if used:
+            sections.append(text_header + '\n' + '\n'.join(used))
+
+        text = '\n'.join(sections)
+        return {
+            'text': text,
+            'tokens': estimate_tokens(text),
+            'lines_used': len(used),
+            'lines_dropped': len(candidates) - len(used)
+        }
+
+    def rank_lines(self, user_input, screen_analysis):
+        """Score OCR lines by lexical overlap with the command and proximity to UI elements"""
+        query = set(tokenize(user_input))
+        anchors = [
+            e['position'] for e in (
+                screen_analysis.get('clickable_areas', []) +
+                screen_analysis.get('ui_elements', {}).get('buttons', []) +
+                screen_analysis.get('ui_elements', {}).get('text_fields', [])
+            )
+        ]
+
+        boxes = screen_analysis.get('text_boxes')
+        if not boxes:
+            # Older analyses only carry flat text; rank it in fixed-size chunks
+            words = screen_analysis.get('text_content', '').split()
+            boxes = [{'text': ' '.join(words[i:i + 12]), 'confidence': 1.0} for i in range(0, len(words), 12)]
+
+        ranked = []
+        seen = set()
+        for order, box in enumerate(boxes):
+            text = box.get('text', '').strip()
+            if not self.is_meaningful(text, box.get('confidence', 1.0)) or text.lower() in seen:
+                continue
+            seen.add(text.lower())
+
+            words = tokenize(text)
+            overlap = len(query.intersection(words)) + 0.5 * sum(
+                1 for q in query for w in words if len(q) > 3 and q != w and (q in w or w in q)
+            )
+            score = 3.0 * overlap + box.get('confidence', 1.0)
+
+            position = box.get('position')
+            if position and anchors:
+                distance = min(abs(position[0] - x) + abs(position[1] - y) for x, y in anchors)
+                score += 1.0 / (1.0 + distance / 50.0)
+
+            # Stable tie-break keeps reading order for equally relevant lines
+            score -= order * 1e-4
+
+            line = f"[{position[0]},{position[1]}] {text}" if position else text
+            ranked.append((score, line))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+
+    def is_meaningful(self, text, confidence):
+        """Drop low-confidence OCR and fragments that are mostly symbols"""
+        if len(text) < 2 or confidence < self.min_confidence:
+            return False
+        alnum = sum(c.isalnum() for c in text)
+        return alnum / len(text) >= 0.5
+
+    def summarize_elements(self, screen_analysis):
+        ui_elements = screen_analysis.get('ui_elements', {})
+        parts = []
+        for kind in ('text_fields', 'buttons'):
+            labels = [
+                f"[{e['position'][0]},{e['position'][1]}]" + (f" {e.get('text')!r}" if e.get('text') else '')
+                for e in ui_elements.get(kind, [])[:self.max_elements]
+            ]
+            if labels:
+                parts.append(f"{kind}: " + ' '.join(labels))
+        return 'Detected ' + '; '.join(parts) if parts else ''
@@ -0,0 +1,103 @@
+import os
+import threading
+
+# Operating points from best quality to cheapest. target_pixels is the
+# analysis resolution, max_ocr_tiles caps uncached text lines recognized per
+# analysis, contour_factor multiplies the fast detectors' contour limits.
+QUALITY_LEVELS = (
+    {'name': 'max', 'target_pixels': 4000000, 'max_ocr_tiles': 400, 'ocr_batch_size': 32, 'contour_factor': 3},
+    {'name': 'high', 'target_pixels': 2500000, 'max_ocr_tiles': 250, 'ocr_batch_size': 32, 'contour_factor': 2},
+    {'name': 'balanced', 'target_pixels': 1500000, 'max_ocr_tiles': 150, 'ocr_batch_size': 16, 'contour_factor': 1},
+    {'name': 'fast', 'target_pixels': 1000000, 'max_ocr_tiles': 80, 'ocr_batch_size': 16, 'contour_factor': 1},
+    {'name': 'low', 'target_pixels': 600000, 'max_ocr_tiles': 40, 'ocr_batch_size': 8, 'contour_factor': 1},
+    {'name': 'minimal', 'target_pixels': 350000, 'max_ocr_tiles': 20, 'ocr_batch_size': 8, 'contour_factor': 1}
+)
+
+STAGES = ('capture', 'ocr', 'ui_detection')
+
+
+class QualityController:
+    """Feedback loop that picks the analysis operating point for a latency target.
+
+    Every uncached analysis reports its stage timings. An exponentially
+    weighted average of the total is compared with the target: two slow
+    samples in a row step down one level, a run of samples well under the
+    target steps back up. The gap between the two thresholds keeps it from
+    oscillating between neighbouring levels.
+    """
+
+    def __init__(self, target_ms=None, level=None, alpha=0.3, slow_samples=2, fast_samples=5, headroom=0.65):
+        self.target_ms = float(target_ms or os.environ.get('ALTQU_ANALYSIS_TARGET_MS', 300))
+        # ALTQU_QUALITY=<level name> pins an operating point and disables adaptation
+        pinned = level or os.environ.get('ALTQU_QUALITY', 'auto')
+        names = [point['name'] for point in QUALITY_LEVELS]
+        self.adaptive = pinned not in names
+        self.level = names.index(pinned) if not self.adaptive else names.index('balanced')
+        self.alpha = alpha
+        self.slow_samples = slow_samples
+        self.fast_samples = fast_samples
+        self.headroom = headroom
+        self.latency_ms = None
+        self.stage_ms = {stage: None for stage in STAGES}
+        self.slow_streak = 0
+        self.fast_streak = 0
+        self.samples = 0
+        self.changes = 0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Settings of the active operating point; read once per analysis"""
+        return QUALITY_LEVELS[self.level]
+
+    def observe(self, stage_ms):
+        """Feed one analysis' stage timings (ms); returns the (possibly new) settings"""
+        total = sum(stage_ms.get(stage, 0.0) for stage in STAGES)
+        with self._lock:
+            self.samples += 1
+            self.latency_ms = total if self.latency_ms is None else self.alpha * total + (1 - self.alpha) * self.latency_ms
+            for stage in STAGES:
+                if stage in stage_ms:
+                    previous = self.stage_ms[stage]
+                    value = stage_ms[stage]
+                    self.stage_ms[stage] = value if previous is None else self.alpha * value + (1 - self.alpha) * previous
+            if not self.adaptive:
+                return self.current()
+
+            if self.latency_ms > self.target_ms:
+                self.slow_streak += 1
+                self.fast_streak = 0
+            elif self.latency_ms < self.target_ms * self.headroom:
+                self.fast_streak += 1
+                self.slow_streak = 0
+            else:
+                self.slow_streak = self.fast_streak = 0
+
+            if self.slow_streak >= self.slow_samples and self.level < len(QUALITY_LEVELS) - 1:
+                self.set_level(self.level + 1)
+            elif self.fast_streak >= self.fast_samples and self.level > 0:
+                self.set_level(self.level - 1)
+            return self.current()
+
+    def set_level(self, level):
+        self.level = level
+        self.changes += 1
+        self.slow_streak = self.fast_streak = 0
+        # Measurements at the old level no longer describe this one
+        self.latency_ms = None
+
+    def operating_point(self):
+        """Current level, its settings and the measured latencies"""
+        point = dict(self.current())
+        point.update(
+            adaptive=self.adaptive,
+            target_ms=self.target_ms,
+            latency_ms=round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            **{f'{stage}_ms': round(value, 1) if value is not None else None for stage, value in self.stage_ms.items()}
+        )
+        return point
+
+    def metrics(self):
+        point = self.operating_point()
+        # 0 = best quality; the endpoint only exports numbers
+        point.update(level=self.level, samples=self.samples, changes=self.changes)
+        return point
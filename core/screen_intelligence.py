@@ -3,73 +3,486 @@ import numpy as np
 import pyautogui
 import pytesseract
 from PIL import Image
-import easyocr
 import base64
 import requests
 import json
 import re
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from core.analysis_model import ELEMENT_KINDS, ElementArray, ScreenAnalysis
+from core.capture_backends import create_capture_backend
+from core.element_sources import create_element_source
+from core.frame import Frame, as_frame
+from core.ocr_cache import OCRCache, disk_cache_path
+from core.ocr_pool import create_ocr_engine
+from core.quality_controller import QualityController
+from core.screen_watch import ScreenWatcher
+from core.text_regions import propose_text_regions, pad_region, region_coverage
+from core.tracing import tracer
+from core.window_tracker import window_tracker, extract_app_name
+
+# Window title of our own chat window; never use it as the capture region
+ASSISTANT_WINDOW_TITLE = "AI Assistant"
+
+class AnalysisCancelled(Exception):
+    """Raised between stages when a newer analysis supersedes this one"""
 
 class ScreenIntelligence:
-    def __init__(self):
-        self.ocr_reader = easyocr.Reader(['en'])
+    def __init__(self, capture_mode=None, target_pixels=None, focus_radius=None, capture_backend=None, ocr_cache=None, monitor_policy=None, ocr_engine=None, element_source=None, quality=None):
+        # EasyOCR runs in worker processes; frames are handed over via shared memory
+        self.ocr = ocr_engine or create_ocr_engine()
+        tracer.register_metrics('ocr_workers', self.ocr.metrics)
+        tracer.register_metrics('windows', window_tracker.metrics)
+        self.ocr_cache = ocr_cache or OCRCache(path=disk_cache_path())
+        tracer.register_metrics('ocr_cache', self.ocr_cache.stats)
+        self.capture_backend = capture_backend or create_capture_backend()
+        # Accessibility tree first; pixel detection only for windows that expose nothing
+        self.element_source = element_source or create_element_source()
+        tracer.register_metrics('elements', self.element_source.metrics)
+        # Strong reference to the latest capture; analyses only hold it weakly
         self.last_screenshot = None
         self.screen_elements = {}
+        
+        # 'roi' captures the active window, 'full' the whole virtual screen,
+        # 'monitors' analyzes each selected monitor in parallel
+        self.capture_mode = capture_mode or os.environ.get('ALTQU_CAPTURE_MODE', 'roi')
+        # Which monitors 'monitors' mode analyzes: 'active', 'cursor' or 'all'
+        self.monitor_policy = monitor_policy or os.environ.get('ALTQU_MONITOR_POLICY', 'active')
+        # Resolution, OCR tile cap and detector limits chosen to hold the latency target
+        self.quality = quality or QualityController()
+        tracer.register_metrics('quality', self.quality.metrics)
+        # Fixed pixel budget overriding the controller's; larger captures are scaled down to fit
+        self.target_pixels = target_pixels
+        # Optional square half-size around the mouse cursor to focus on (0 = off)
+        self.focus_radius = int(focus_radius or os.environ.get('ALTQU_FOCUS_RADIUS', 0))
+        # Last analysis per captured region, reused while the pixels are unchanged
+        self.region_cache = OrderedDict()
+        self.region_cache_size = 8
+        self.region_cache_lock = threading.Lock()
+        # Background watch loop; started by the first watch_* call
+        self.watcher = ScreenWatcher(self)
       
-    def capture_and_analyze_screen(self):
-        """Optimized screen analysis with error handling"""
+    def capture_and_analyze_screen(self, should_cancel=None, proceed=None):
+        """Optimized screen analysis with error handling; returns None if cancelled
+
+        proceed(), if given, is called after capture and the region-cache
+        lookup and blocks until the expensive stages may run; returning False
+        abandons the analysis. Prefetches use it to capture early without
+        paying for OCR until an activation claims them.
+        """
         try:
-            screenshot = pyautogui.screenshot()
-            
-            # Resize for faster processing
-            original_size = screenshot.size
-            screenshot = screenshot.resize((original_size[0] // 3, original_size[1] // 3))
+            current_app = self.identify_current_application()
             
-            cv_image = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+            if self.capture_mode == 'monitors':
+                return self.analyze_monitors(current_app, should_cancel, proceed)
             
-            analysis = {
-                'screenshot': screenshot,
-                'text_content': self.extract_text_fast(screenshot),  # Faster text extraction
-                'ui_elements': self.detect_ui_elements_fast(cv_image),  # Simplified detection
-                'clickable_areas': self.find_clickable_elements_fast(cv_image),  # Faster detection
-                'current_app': self.identify_current_application(),
-                'screen_layout': self.analyze_screen_layout(cv_image)
-            }
+            region = self.get_capture_region(current_app)
+            partial = self.analyze_region(region, should_cancel, current_app, proceed)
+            self.last_screenshot = partial['screenshot']
             
-            return analysis
+            return ScreenAnalysis(
+                text_content=partial['text_content'],
+                text_boxes=partial['text_boxes'],
+                ui_elements=partial['ui_elements'],
+                clickable_areas=partial['clickable_areas'],
+                current_app=current_app,
+                screen_layout=self.layout_for_size(*partial['image_size']),
+                capture_region=partial['capture_region'],
+                scale=partial['scale'],
+                screenshot=partial['screenshot']
+            )
+        except AnalysisCancelled:
+            return None
         except Exception as e:
             print(f"Screen analysis failed: {e}")
             return self.get_fallback_analysis()
 
+    def watch_text(self, text, callback=None, queue=None, loop=None, region=None, once=True, regex=False):
+        """Notify when `text` appears on screen (optionally inside region); returns a watch id.
+
+        Events are dicts with 'text', 'position' and 'watch_id', passed to
+        callback(event) on the watch thread and/or put on an asyncio queue
+        (pass its loop so the put happens on the loop's thread).
+        """
+        return self.watcher.add('text', text, regex=regex, region=region, callback=callback, queue=queue, loop=loop, once=once)
+    
+    def watch_window(self, title, callback=None, queue=None, loop=None, once=True, regex=False):
+        """Notify when the active window's title or app name starts matching `title`"""
+        return self.watcher.add('window', title, regex=regex, callback=callback, queue=queue, loop=loop, once=once)
+    
+    def unwatch(self, watch_id):
+        return self.watcher.remove(watch_id)
+    
+    def wait_for_text(self, text, timeout, region=None, regex=False):
+        """Block until `text` is visible; returns the event or None on timeout"""
+        return self.watcher.wait_for('text', text, timeout, regex=regex, region=region)
+    
+    def wait_for_window(self, title, timeout, regex=False):
+        return self.watcher.wait_for('window', title, timeout, regex=regex)
+    
+    def check_cancelled(self, should_cancel):
+        if should_cancel is not None and should_cancel():
+            raise AnalysisCancelled()
+
+    def analyze_region(self, region, should_cancel=None, window=None, proceed=None):
+        """Capture and analyze one screen region; element coordinates come back in screen space.
+
+        `window` is the active window as seen when the analysis started; its
+        accessibility tree is used for the elements if it overlaps the region.
+        See capture_and_analyze_screen for `proceed`.
+        """
+        settings = self.quality.current()
+        stage_ms = {}
+        started = time.perf_counter()
+        with tracer.span('capture', mode=self.capture_mode, backend=self.capture_backend.name, quality=settings['name']) as span:
+            if region is None:
+                region = self.capture_backend.virtual_bounds()
+            image = self.capture_backend.grab(region)
+            original_size = (image.shape[1], image.shape[0])
+            
+            # Unchanged display: reuse the previous results for this region
+            signature = self.image_signature(image)
+            with self.region_cache_lock:
+                cached = self.region_cache.get(region)
+                if cached and cached[0] == signature:
+                    self.region_cache.move_to_end(region)
+            span.set('cache_hit', bool(cached and cached[0] == signature))
+            if cached and cached[0] == signature:
+                # Cached results carry no pixels
+                return dict(cached[1], screenshot=None)
+            
+            # Scale to the pixel budget instead of a fixed factor
+            scale = self.compute_scale(original_size[0], original_size[1], settings['target_pixels'])
+            if scale < 1.0:
+                image = cv2.resize(
+                    image,
+                    (max(1, int(original_size[0] * scale)), max(1, int(original_size[1] * scale))),
+                    interpolation=cv2.INTER_AREA
+                )
+            
+            # One shared Frame: every detector and OCR reuses its conversions
+            frame = Frame(image)
+            screenshot = frame.bgr
+            span.update(region=region, original_size=original_size, image_size=frame.size, scale=round(scale, 3))
+        stage_ms['capture'] = (time.perf_counter() - started) * 1000
+        
+        try:
+            # Waiting here is not analysis time; stage timings exclude it
+            if proceed is not None and not proceed():
+                raise AnalysisCancelled()
+            self.check_cancelled(should_cancel)
+            started = time.perf_counter()
+            with tracer.span('ocr') as span:
+                # Recognize proposed text lines only
+                text_boxes = self.extract_text_boxes(frame, settings['ocr_batch_size'], settings['max_ocr_tiles'])
+                text_content = self.clean_extracted_text(' '.join(box['text'] for box in text_boxes))
+                span.update(chars=len(text_content), boxes=len(text_boxes))
+            self.check_cancelled(should_cancel)
+        except AnalysisCancelled:
+            frame.release()
+            raise
+        stage_ms['ocr'] = (time.perf_counter() - started) * 1000
+        
+        started = time.perf_counter()
+        with tracer.span('ui_detection') as span:
+            accessible = None
+            if self.window_overlaps(window, region):
+                accessible = self.element_source.elements(window)
+            if accessible is not None:
+                # Real widgets, already in screen coordinates
+                ui_elements = {kind: ElementArray.from_dicts(self.elements_in_region(accessible.get(kind, []), region), with_text=True)
+                               for kind in ELEMENT_KINDS}
+                clickable_areas = ElementArray.from_dicts(self.elements_in_region(accessible['clickable'], region), with_text=True)
+            else:
+                factor = settings['contour_factor']
+                ui_elements = self.detect_ui_elements_fast(frame, scale, factor)  # Simplified detection
+                clickable_areas = self.find_clickable_elements_fast(frame, scale, factor)  # Faster detection
+                # Packed element records, reported in screen space so they can be clicked
+                ui_elements = {kind: self.map_elements_to_screen(ElementArray.from_dicts(ui_elements.get(kind, [])), region, scale)
+                               for kind in ELEMENT_KINDS}
+                clickable_areas = self.map_elements_to_screen(ElementArray.from_dicts(clickable_areas), region, scale)
+            span.update(
+                source=self.element_source.name if accessible is not None else 'cv',
+                buttons=len(ui_elements['buttons']),
+                text_fields=len(ui_elements['text_fields']),
+                clickable=len(clickable_areas)
+            )
+        stage_ms['ui_detection'] = (time.perf_counter() - started) * 1000
+        # Cache hits returned earlier; only real work steers the controller
+        self.quality.observe(stage_ms)
+        
+        text_boxes = self.map_elements_to_screen(ElementArray.from_dicts(text_boxes, with_text=True), region, scale)
+        
+        # Derived buffers go back to the pool for the next capture
+        frame.release()
+        
+        partial = {
+            'image_size': (screenshot.shape[1], screenshot.shape[0]),
+            'text_content': text_content,
+            'text_boxes': text_boxes,
+            'ui_elements': ui_elements,
+            'clickable_areas': clickable_areas,
+            'capture_region': region,
+            'scale': scale
+        }
+        with self.region_cache_lock:
+            self.region_cache[region] = (signature, partial)
+            while len(self.region_cache) > self.region_cache_size:
+                self.region_cache.popitem(last=False)
+        return dict(partial, screenshot=screenshot)
+    
+    def analyze_monitors(self, current_app, should_cancel=None, proceed=None):
+        """Analyze the monitors chosen by monitor_policy in parallel and merge them"""
+        monitors = self.capture_backend.monitors()
+        selected = self.select_monitors(monitors, current_app)
+        
+        with ThreadPoolExecutor(max_workers=len(selected), thread_name_prefix='altqu-monitor') as pool:
+            partials = list(pool.map(lambda index: self.analyze_region(monitors[index], should_cancel, current_app, proceed), selected))
+        
+        ui_elements = {
+            kind: ElementArray.concatenate(p['ui_elements'][kind] for p in partials)
+            for kind in ELEMENT_KINDS
+        }
+        
+        left, top, width, height = self.capture_backend.virtual_bounds()
+        screenshot = partials[0]['screenshot'] if len(partials) == 1 else None
+        self.last_screenshot = screenshot
+        return ScreenAnalysis(
+            text_content=' '.join(p['text_content'] for p in partials if p['text_content']),
+            text_boxes=ElementArray.concatenate(p['text_boxes'] for p in partials),
+            ui_elements=ui_elements,
+            clickable_areas=ElementArray.concatenate(p['clickable_areas'] for p in partials),
+            current_app=current_app,
+            screen_layout={
+                'screen_size': (width, height),
+                'origin': (left, top),
+                'monitors': [
+                    {'index': i, 'bounds': monitor, 'analyzed': i in selected}
+                    for i, monitor in enumerate(monitors)
+                ],
+                'regions': {f'monitor_{i}': monitors[i] for i in selected}
+            },
+            capture_region=(left, top, width, height) if len(selected) > 1 else monitors[selected[0]],
+            scale=min(p['scale'] for p in partials),
+            screenshot=screenshot
+        )
+    
+    def select_monitors(self, monitors, current_app):
+        """Indexes of the monitors to analyze under the current policy"""
+        if self.monitor_policy == 'all' or len(monitors) == 1:
+            return list(range(len(monitors)))
+        
+        point = None
+        bounds = current_app.get('bounds')
+        if self.monitor_policy == 'active' and bounds and current_app.get('title') != ASSISTANT_WINDOW_TITLE:
+            point = (bounds[0] + bounds[2] // 2, bounds[1] + bounds[3] // 2)
+        if point is None:
+            point = pyautogui.position()
+        
+        index = self.monitor_at(monitors, point)
+        return [index if index is not None else 0]
+    
+    def monitor_at(self, monitors, point):
+        x, y = point
+        for i, (left, top, width, height) in enumerate(monitors):
+            if left <= x < left + width and top <= y < top + height:
+                return i
+        return None
+    
+    def image_signature(self, image):
+        """Exact fingerprint of a capture at full resolution.
+
+        Screen captures are noise-free, so any changed pixel (a typed
+        character, a one-line status update) must invalidate the cached
+        analysis; hashing the raw buffer costs a few ms per megapixel.
+        """
+        return hashlib.blake2b(memoryview(np.ascontiguousarray(image)).cast('B'), digest_size=16).hexdigest()
+
+    def get_capture_region(self, current_app):
+        """Pick the (left, top, width, height) region to capture, or None for full screen"""
+        if self.capture_mode != 'roi':
+            return None
+        
+        try:
+            bounds_limit = self.capture_backend.virtual_bounds()
+            
+            if self.focus_radius:
+                x, y = pyautogui.position()
+                region = (x - self.focus_radius, y - self.focus_radius, 2 * self.focus_radius, 2 * self.focus_radius)
+            else:
+                bounds = current_app.get('bounds')
+                if not bounds or current_app.get('title') == ASSISTANT_WINDOW_TITLE:
+                    # No usable window: fall back to the monitor under the cursor
+                    monitors = self.capture_backend.monitors()
+                    index = self.monitor_at(monitors, pyautogui.position())
+                    return monitors[index] if index is not None and len(monitors) > 1 else None
+                region = bounds
+            
+            return self.clip_region(region, bounds_limit)
+        except Exception as e:
+            print(f"Capture region lookup failed: {e}")
+            return None
+    
+    def clip_region(self, region, bounds_limit):
+        """Clip a region to the virtual screen; returns None if nothing is left"""
+        left, top, width, height = region
+        limit_left, limit_top, limit_width, limit_height = bounds_limit
+        right = min(left + width, limit_left + limit_width)
+        bottom = min(top + height, limit_top + limit_height)
+        left = max(limit_left, left)
+        top = max(limit_top, top)
+        if right - left < 16 or bottom - top < 16:
+            return None
+        return (left, top, right - left, bottom - top)
+    
+    def compute_scale(self, width, height, target_pixels=None):
+        """Downscale factor that brings width*height within the pixel budget"""
+        budget = self.target_pixels or target_pixels
+        pixels = width * height
+        if not budget or pixels <= budget:
+            return 1.0
+        return (budget / pixels) ** 0.5
+    
+    def map_elements_to_screen(self, elements, region, scale):
+        """Convert an ElementArray from image to screen coordinates"""
+        return elements.map_to_screen(region[0], region[1], scale)
+
+    def window_overlaps(self, window, region):
+        """Whether a tracked window (not our own) intersects the captured region"""
+        if not window or window.get('window_id') is None or window.get('title') == ASSISTANT_WINDOW_TITLE:
+            return False
+        bounds = window.get('bounds')
+        if not bounds:
+            return False
+        left, top, width, height = region
+        return (bounds[0] < left + width and left < bounds[0] + bounds[2] and
+                bounds[1] < top + height and top < bounds[1] + bounds[3])
+    
+    def elements_in_region(self, elements, region):
+        """Elements whose center lies inside region (left, top, width, height)"""
+        left, top, width, height = region
+        return [e for e in elements
+                if left <= e['position'][0] < left + width and top <= e['position'][1] < top + height]
+    
     def extract_text_fast(self, screenshot):
         """Faster text extraction using only one OCR method"""
         try:
-            # Use only EasyOCR for better performance
-            easyocr_results = self.ocr_reader.readtext(np.array(screenshot))
-            text = ' '.join([result[1] for result in easyocr_results])
+            text = ' '.join(box['text'] for box in self.extract_text_boxes(screenshot))
             return self.clean_extracted_text(text)
         except Exception as e:
             print(f"Fast OCR failed: {e}")
             return ""
 
+    def extract_text_boxes(self, screenshot, batch_size=16, max_tiles=None):
+        """OCR only the proposed text-line regions, batched through the recognizer.
+
+        max_tiles caps how many uncached regions are recognized; the largest
+        are kept and the rest are left out of this analysis.
+        """
+        frame = as_frame(screenshot)
+        try:
+            with tracer.span('ocr_proposals') as span:
+                regions = propose_text_regions(frame.gray)
+                span.update(regions=len(regions), coverage=round(region_coverage(regions, frame.width, frame.height), 3))
+            if not regions:
+                return []
+            
+            regions = [pad_region(r, 2, frame.width, frame.height) for r in regions]
+            recognized = [None] * len(regions)
+            
+            # Unchanged toolbars, menus and chrome come straight from the cache
+            keys = []
+            misses = []
+            for i, (x, y, w, h) in enumerate(regions):
+                key = self.ocr_cache.key(frame.gray[y:y + h, x:x + w])
+                keys.append(key)
+                cached = self.ocr_cache.get(key)
+                if cached is None:
+                    misses.append(i)
+                else:
+                    recognized[i] = cached
+            
+            if max_tiles is not None and len(misses) > max_tiles:
+                skipped = sorted(misses, key=lambda i: regions[i][2] * regions[i][3], reverse=True)[max_tiles:]
+                for i in skipped:
+                    recognized[i] = ('', 0.0)
+                misses = sorted(set(misses) - set(skipped))
+            
+            with tracer.span('ocr_recognize', tiles=len(regions), cache_hits=len(regions) - len(misses)):
+                if misses:
+                    started = time.perf_counter()
+                    fresh = self.recognize_regions(frame.gray, [regions[i] for i in misses], batch_size)
+                    self.ocr_cache.record_recognition_cost((time.perf_counter() - started) * 1000, len(misses))
+                    for i, value in zip(misses, fresh):
+                        recognized[i] = value
+                        self.ocr_cache.put(keys[i], value[0], value[1])
+            
+            results = [
+                (region, text, confidence)
+                for region, (text, confidence) in zip(regions, recognized)
+            ]
+        except Exception as e:
+            print(f"Text region OCR failed, using full-frame OCR: {e}")
+            try:
+                full_results = self.ocr.readtext(frame.rgb)
+                results = [(self.box_to_bounds(box), text, confidence) for box, text, confidence in full_results]
+            except Exception as e:
+                print(f"Fast OCR failed: {e}")
+                return []
+        
+        text_boxes = []
+        for (x, y, w, h), text, confidence in results:
+            if not text.strip():
+                continue
+            text_boxes.append({
+                'text': text,
+                'confidence': float(confidence),
+                'position': (x + w//2, y + h//2),
+                'bounds': (x, y, w, h)
+            })
+        return text_boxes
+    
+    def recognize_regions(self, gray, regions, batch_size):
+        """Recognize text in each region; returns (text, confidence) aligned with `regions`"""
+        # easyocr boxes are [x_min, x_max, y_min, y_max]; skips the CRAFT detector
+        horizontal_list = [[x, x + w, y, y + h] for x, y, w, h in regions]
+        results = self.ocr.recognize(gray, horizontal_list, batch_size=batch_size)
+        
+        # easyocr may drop or reorder boxes, so match results back by overlap
+        recognized = [('', 0.0)] * len(regions)
+        for box, text, confidence in results:
+            bx, by, bw, bh = self.box_to_bounds(box)
+            best, best_overlap = None, 0
+            for i, (x, y, w, h) in enumerate(regions):
+                overlap = max(0, min(x + w, bx + bw) - max(x, bx)) * max(0, min(y + h, by + bh) - max(y, by))
+                if overlap > best_overlap:
+                    best, best_overlap = i, overlap
+            if best is not None:
+                recognized[best] = (text, float(confidence))
+        return recognized
+    
+    def box_to_bounds(self, box):
+        """Convert an easyocr corner list to (x, y, w, h)"""
+        xs = [int(p[0]) for p in box]
+        ys = [int(p[1]) for p in box]
+        return (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
     def get_fallback_analysis(self):
         """Fallback analysis when screen capture fails"""
-        return {
-            'screenshot': None,
-            'text_content': "",
-            'ui_elements': {'buttons': [], 'text_fields': [], 'images': []},
-            'clickable_areas': [],
-            'current_app': self.identify_current_application(),
-            'screen_layout': {'screen_size': (0, 0), 'regions': {}}
-        }
+        return ScreenAnalysis(current_app=self.identify_current_application())
         
-    def detect_ui_elements_fast(self, cv_image):
+    def detect_ui_elements_fast(self, cv_image, scale=1.0, contour_factor=1):
         """Faster UI element detection with simplified processing"""
         try:
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            frame = as_frame(cv_image)
             
             # Simplified detection for better performance
-            buttons = self.find_buttons_fast(gray)
-            text_fields = self.find_text_fields_fast(gray)
+            buttons = self.find_buttons_fast(frame, scale, contour_factor)
+            text_fields = self.find_text_fields_fast(frame, scale, contour_factor)
             
             return {
                 'buttons': buttons,
@@ -80,17 +493,18 @@ class ScreenIntelligence:
             print(f"Fast UI element detection failed: {e}")
             return {'buttons': [], 'text_fields': [], 'images': []}
 
-    def find_buttons_fast(self, gray_image):
-        """Simplified button detection"""
+    def find_buttons_fast(self, gray_image, scale=1.0, contour_factor=1):
+        """Simplified button detection; area limits are in screen pixels, scaled to the image"""
         try:
+            area_scale = scale * scale
             # Use simpler edge detection
-            edges = cv2.Canny(gray_image, 100, 200)
+            edges = as_frame(gray_image).edges(100, 200)
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             buttons = []
-            for contour in contours[:10]:  # Limit to first 10 for performance
+            for contour in contours[:10 * contour_factor]:  # Limit for performance
                 area = cv2.contourArea(contour)
-                if 200 < area < 3000:  # Reasonable button sizes
+                if 200 * area_scale < area < 3000 * area_scale:  # Reasonable button sizes
                     x, y, w, h = cv2.boundingRect(contour)
                     buttons.append({
                         'position': (x + w//2, y + h//2),
@@ -103,16 +517,18 @@ class ScreenIntelligence:
             print(f"Fast button detection failed: {e}")
             return []
 
-    def find_text_fields_fast(self, gray_image):
+    def find_text_fields_fast(self, gray_image, scale=1.0, contour_factor=1):
         """Simplified text field detection"""
         try:
-            # Basic rectangle detection
-            contours, _ = cv2.findContours(gray_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            area_scale = scale * scale
+            # Outlines come from the edge map; findContours needs a binary image
+            edges = as_frame(gray_image).edges(30, 100)
+            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             text_fields = []
-            for contour in contours[:5]:  # Limit for performance
+            for contour in contours[:5 * contour_factor]:  # Limit for performance
                 area = cv2.contourArea(contour)
-                if 500 < area < 5000:
+                if 500 * area_scale < area < 5000 * area_scale:
                     x, y, w, h = cv2.boundingRect(contour)
                     aspect_ratio = w / h
                     if aspect_ratio > 1.5:  # Wide rectangles
@@ -127,18 +543,18 @@ class ScreenIntelligence:
             print(f"Fast text field detection failed: {e}")
             return []
 
-    def find_clickable_elements_fast(self, cv_image):
+    def find_clickable_elements_fast(self, cv_image, scale=1.0, contour_factor=1):
         """Faster clickable element detection"""
         try:
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            
-            # Simplified contour detection
-            contours, _ = cv2.findContours(gray, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            area_scale = scale * scale
+            # Same cached edge map as the button pass; contours need a binary image
+            edges = as_frame(cv_image).edges(100, 200)
+            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             clickable_elements = []
-            for contour in contours[:15]:  # Limit for performance
+            for contour in contours[:15 * contour_factor]:  # Limit for performance
                 area = cv2.contourArea(contour)
-                if 50 < area < 8000:
+                if 50 * area_scale < area < 8000 * area_scale:
                     x, y, w, h = cv2.boundingRect(contour)
                     clickable_elements.append({
                         'position': (x + w//2, y + h//2),
@@ -156,16 +572,17 @@ class ScreenIntelligence:
     
     def extract_all_text(self, screenshot):
         """Extract all text from screen using multiple OCR methods"""
+        frame = as_frame(screenshot)
         try:
             # Method 1: Tesseract
-            tesseract_text = pytesseract.image_to_string(screenshot)
+            tesseract_text = pytesseract.image_to_string(frame.rgb)
         except Exception as e:
             print(f"Tesseract OCR failed: {e}")
             tesseract_text = ""
         
         try:
             # Method 2: EasyOCR (better for various fonts)
-            easyocr_results = self.ocr_reader.readtext(np.array(screenshot))
+            easyocr_results = self.ocr.readtext(frame.rgb)
             easyocr_text = ' '.join([result[1] for result in easyocr_results])
         except Exception as e:
             print(f"EasyOCR failed: {e}")
@@ -195,12 +612,12 @@ class ScreenIntelligence:
     def detect_ui_elements(self, cv_image):
         """Detect buttons, text fields, and other UI elements"""
         try:
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            frame = as_frame(cv_image)
             
             # Detect buttons using template matching and contours
-            buttons = self.find_buttons(gray)
-            text_fields = self.find_text_fields(gray)
-            images = self.find_images(cv_image)
+            buttons = self.find_buttons(frame)
+            text_fields = self.find_text_fields(frame)
+            images = self.find_images(frame)
             
             return {
                 'buttons': buttons,
@@ -215,7 +632,7 @@ class ScreenIntelligence:
         """Find button-like elements"""
         try:
             # Use edge detection to find rectangular shapes
-            edges = cv2.Canny(gray_image, 50, 150)
+            edges = as_frame(gray_image).edges(50, 150)
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             buttons = []
@@ -240,7 +657,7 @@ class ScreenIntelligence:
         """Find text input fields"""
         try:
             # Look for rectangular areas that might be text fields
-            edges = cv2.Canny(gray_image, 30, 100)
+            edges = as_frame(gray_image).edges(30, 100)
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             text_fields = []
@@ -265,7 +682,7 @@ class ScreenIntelligence:
         """Find image elements on screen"""
         try:
             # Simple image detection based on color variance
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            gray = as_frame(cv_image).gray
             
             # Find areas with high variance (likely images)
             kernel = np.ones((5,5), np.uint8)
@@ -283,10 +700,10 @@ class ScreenIntelligence:
             clickable_elements = []
             
             # Use computer vision to find clickable areas
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            edges = as_frame(cv_image).edges(50, 150)
             
             # Find contours that might be clickable
-            contours, _ = cv2.findContours(gray, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             for contour in contours:
                 area = cv2.contourArea(contour)
@@ -306,54 +723,25 @@ class ScreenIntelligence:
     def analyze_screen_layout(self, cv_image):
         """Analyze the overall screen layout"""
         try:
-            height, width = cv_image.shape[:2]
-            
-            return {
-                'screen_size': (width, height),
-                'regions': {
-                    'top': (0, 0, width, height//4),
-                    'middle': (0, height//4, width, height//2),
-                    'bottom': (0, 3*height//4, width, height//4)
-                }
-            }
+            return self.layout_for_size(*as_frame(cv_image).size)
         except Exception as e:
             print(f"Screen layout analysis failed: {e}")
             return {'screen_size': (0, 0), 'regions': {}}
     
+    def layout_for_size(self, width, height):
+        return {
+            'screen_size': (width, height),
+            'regions': {
+                'top': (0, 0, width, height//4),
+                'middle': (0, height//4, width, height//2),
+                'bottom': (0, 3*height//4, width, height//4)
+            }
+        }
+    
     def identify_current_application(self):
-        """Identify what application is currently active"""
-        try:
-            import pygetwindow as gw
-            active_window = gw.getActiveWindow()
-            if active_window:
-                return {
-                    'title': active_window.title,
-                    'app_name': self.extract_app_name(active_window.title),
-                    'bounds': (active_window.left, active_window.top, active_window.width, active_window.height)
-                }
-        except Exception as e:
-            print(f"Application identification failed: {e}")
-            pass
-        return {'title': 'Unknown', 'app_name': 'Unknown', 'bounds': None}
+        """Active window from the window tracker's cache (no window-system query)"""
+        return window_tracker.current()
     
     def extract_app_name(self, window_title):
         """Extract application name from window title"""
-        common_apps = {
-            'spotify': 'Spotify',
-            'chrome': 'Google Chrome',
-            'firefox': 'Firefox',
-            'code': 'VS Code',
-            'notepad': 'Notepad',
-            'excel': 'Excel',
-            'word': 'Word',
-            'outlook': 'Outlook',
-            'discord': 'Discord',
-            'slack': 'Slack'
-        }
-        
-        title_lower = window_title.lower()
-        for key, app_name in common_apps.items():
-            if key in title_lower:
-                return app_name
-        
-        return window_title.split(' - ')[0] if ' - ' in window_title else window_title
+        return extract_app_name(window_title)
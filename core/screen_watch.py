@@ -0,0 +1,267 @@
+import itertools
+import re
+import threading
+import time
+import cv2
+import numpy as np
+from core.tracing import tracer
+from core.window_tracker import window_tracker
+
+
+class Watch:
+    """One registered condition and where to deliver its events"""
+
+    def __init__(self, watch_id, kind, pattern, region=None, callback=None, queue=None, loop=None, once=True):
+        self.id = watch_id
+        self.kind = kind
+        self.pattern = pattern
+        self.region = region
+        self.callback = callback
+        self.queue = queue
+        self.loop = loop
+        self.once = once
+        # Window watches fire on the transition into the matching state
+        self.matching = False
+
+    def matches(self, text):
+        return self.pattern.search(text) is not None
+
+    def covers(self, position):
+        if self.region is None or position is None:
+            return True
+        x, y = position
+        left, top, width, height = self.region
+        return left <= x < left + width and top <= y < top + height
+
+    def deliver(self, event):
+        if self.callback is not None:
+            try:
+                self.callback(event)
+            except Exception as e:
+                print(f"Watch callback failed: {e}")
+        if self.queue is not None:
+            # asyncio queues are not thread-safe; hand the put to their loop
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+            else:
+                self.queue.put_nowait(event)
+
+
+class ScreenWatcher:
+    """Background capture loop that checks registered watches against changed screen regions only.
+
+    Each tick diffs the new capture against the last one in `tile`-pixel
+    blocks; only dirty blocks are OCR'd, up to `max_pixels` per tick, and
+    the rest stay dirty for the next tick. The loop sleeps so that its busy
+    time stays under `max_duty` of wall time.
+
+    A new text watch (or new capture geometry) scans the whole capture in
+    one tick, outside both budgets: callers wait with timeouts of a few
+    seconds, which a budgeted rescan of a 4K or multi-monitor desktop
+    would exceed.
+    """
+
+    def __init__(self, screen_intelligence, interval=0.5, max_duty=0.15, tile=32, change_threshold=2.0, max_pixels=2100000):
+        self.screen_intelligence = screen_intelligence
+        self.interval = interval
+        self.max_duty = max_duty
+        self.tile = tile
+        self.change_threshold = change_threshold
+        self.max_pixels = max_pixels
+        self.watches = {}
+        self.ids = itertools.count(1)
+        self.previous = None
+        self.dirty = None
+        self.capture_bounds = None
+        self.rescan = False
+        # Set by a tick that did a full, unbudgeted scan
+        self.full_scan = False
+        self.full_scans = 0
+        self.last_title = None
+        self.ticks = 0
+        self.ocr_pixels = 0
+        self.busy_time = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        tracer.register_metrics('watch', self.metrics)
+        # Window watches are evaluated as soon as focus or a title changes
+        window_tracker.subscribe(self.on_window_change)
+
+    def add(self, kind, pattern, regex=False, **kwargs):
+        """Register a 'text' or 'window' watch; returns its id"""
+        if not regex:
+            pattern = re.escape(pattern)
+        watch = Watch(next(self.ids), kind, re.compile(pattern, re.IGNORECASE), **kwargs)
+        with self._lock:
+            self.watches[watch.id] = watch
+            if kind == 'text':
+                # New text watches must see what is already on screen
+                self.rescan = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run, name='altqu-watch', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return watch.id
+
+    def remove(self, watch_id):
+        with self._lock:
+            return self.watches.pop(watch_id, None) is not None
+
+    def wait_for(self, kind, pattern, timeout, regex=False, region=None):
+        """Block until a watch fires or `timeout` seconds pass; returns the event or None"""
+        fired = threading.Event()
+        result = {}
+
+        def on_event(event):
+            result['event'] = event
+            fired.set()
+
+        watch_id = self.add(kind, pattern, regex=regex, region=region, callback=on_event, once=True)
+        try:
+            fired.wait(timeout)
+        finally:
+            self.remove(watch_id)
+        return result.get('event')
+
+    def run(self):
+        while True:
+            with self._lock:
+                if not self.watches:
+                    self._thread = None
+                    self.previous = None
+                    self.dirty = None
+                    return
+            started = time.perf_counter()
+            try:
+                with tracer.span('watch_tick'):
+                    self.tick()
+            except Exception as e:
+                print(f"Screen watch tick failed: {e}")
+            busy = time.perf_counter() - started
+            self.busy_time += busy
+            self.ticks += 1
+            if self.full_scan:
+                # A watcher is waiting on this scan; don't make it pay the duty cycle
+                self.full_scan = False
+                idle = max(0.0, self.interval - busy)
+            else:
+                # Keep busy / (busy + idle) <= max_duty
+                idle = max(self.interval - busy, busy * (1.0 / self.max_duty - 1.0))
+            self._wake.wait(idle)
+            self._wake.clear()
+
+    def on_window_change(self, info):
+        if any(w.kind == 'window' for w in list(self.watches.values())):
+            self._wake.set()
+
+    def tick(self):
+        with self._lock:
+            watches = list(self.watches.values())
+        window_watches = [w for w in watches if w.kind == 'window']
+        text_watches = [w for w in watches if w.kind == 'text']
+        if window_watches:
+            self.check_windows(window_watches)
+        if text_watches:
+            self.check_text(text_watches)
+
+    def check_windows(self, watches):
+        app = self.screen_intelligence.identify_current_application()
+        title = f"{app.get('title', '')} {app.get('app_name', '')}"
+        self.last_title = title
+        for watch in watches:
+            matching = watch.matches(title)
+            if matching and not watch.matching:
+                self.fire(watch, {'kind': 'window', 'title': app.get('title', ''), 'app_name': app.get('app_name', '')})
+            watch.matching = matching
+
+    def check_text(self, watches):
+        backend = self.screen_intelligence.capture_backend
+        virtual_bounds = backend.virtual_bounds()
+        bounds = self.screen_intelligence.clip_region(self.watch_bounds(watches, virtual_bounds), virtual_bounds) or virtual_bounds
+        image = backend.grab(bounds)
+        code = cv2.COLOR_BGRA2GRAY if image.ndim == 3 and image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        gray = cv2.cvtColor(image, code) if image.ndim == 3 else image
+
+        # Partial tiles at the right/bottom edge count as whole tiles
+        rows, cols = -(-gray.shape[0] // self.tile), -(-gray.shape[1] // self.tile)
+        full = self.rescan or self.previous is None or self.previous.shape != gray.shape or bounds != self.capture_bounds
+        if full:
+            self.rescan = False
+            self.full_scan = True
+            self.full_scans += 1
+            # First frame (or new geometry): everything counts as changed
+            self.dirty = np.ones((rows, cols), dtype=np.uint8)
+        else:
+            # Mean absolute difference per tile, via an area resize
+            diff = cv2.absdiff(gray, self.previous)
+            changed = cv2.resize(diff, (cols, rows), interpolation=cv2.INTER_AREA) > self.change_threshold
+            self.dirty |= changed.astype(np.uint8)
+        self.previous = gray
+        self.capture_bounds = bounds
+
+        for x, y, w, h in self.take_dirty_regions(gray.shape, budget=None if full else self.max_pixels):
+            boxes = self.screen_intelligence.extract_text_boxes(np.ascontiguousarray(gray[y:y + h, x:x + w]))
+            self.ocr_pixels += w * h
+            for box in boxes:
+                position = (bounds[0] + x + box['position'][0], bounds[1] + y + box['position'][1])
+                for watch in watches:
+                    if watch.id in self.watches and watch.covers(position) and watch.matches(box['text']):
+                        self.fire(watch, {'kind': 'text', 'text': box['text'], 'position': position})
+
+    def take_dirty_regions(self, shape, budget=None):
+        """Pixel boxes around dirty tiles, largest first, within `budget` pixels (None = all of them)"""
+        if not self.dirty.any():
+            return []
+        # Merge touching tiles so text lines are not cut at tile borders
+        grown = cv2.dilate(self.dirty, np.ones((3, 3), np.uint8))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(grown, connectivity=8)
+        tile_boxes = sorted((tuple(stats[i][:4]) for i in range(1, count)), key=lambda b: b[2] * b[3], reverse=True)
+
+        regions = []
+        height, width = shape[:2]
+        unlimited = budget is None
+        if unlimited:
+            budget = height * width
+        for tx, ty, tw, th in tile_boxes:
+            x, y = tx * self.tile, ty * self.tile
+            w = min(tw * self.tile, width - x)
+            if not unlimited:
+                # Oversized areas (scrolling) are consumed in horizontal bands
+                th = min(th, max(1, budget // max(w * self.tile, 1)))
+            h = min(th * self.tile, height - y)
+            if regions and not unlimited and w * h > budget:
+                continue
+            regions.append((x, y, w, h))
+            budget -= w * h
+            self.dirty[ty:ty + th, tx:tx + tw] = 0
+            if budget <= 0 and not unlimited:
+                break
+        return regions
+
+    def watch_bounds(self, watches, virtual_bounds):
+        """Smallest capture covering every text watch (None region = whole screen)"""
+        if any(w.region is None for w in watches):
+            return virtual_bounds
+        left = min(w.region[0] for w in watches)
+        top = min(w.region[1] for w in watches)
+        right = max(w.region[0] + w.region[2] for w in watches)
+        bottom = max(w.region[1] + w.region[3] for w in watches)
+        return (left, top, right - left, bottom - top)
+
+    def fire(self, watch, event):
+        event.update(watch_id=watch.id, timestamp=time.time())
+        if watch.once:
+            with self._lock:
+                if self.watches.pop(watch.id, None) is None:
+                    return
+        watch.deliver(event)
+
+    def metrics(self):
+        return {
+            'watches': len(self.watches),
+            'ticks': self.ticks,
+            'full_scans': self.full_scans,
+            'ocr_pixels': self.ocr_pixels,
+            'busy_seconds': round(self.busy_time, 3)
+        }
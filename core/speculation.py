@@ -0,0 +1,131 @@
+import re
+import threading
+from collections import OrderedDict
+from core.tracing import tracer
+
+
+def normalize_command(text):
+    """Case/whitespace/trailing-punctuation insensitive form used to match speculations"""
+    text = re.sub(r'\s+', ' ', (text or '').strip().lower())
+    return text.rstrip('.!?')
+
+
+class SpeculativeInference:
+    """Runs LLM inference for the text being typed so the result is ready on Enter.
+
+    At most one inference runs at a time. A newer prefix replaces the queued
+    one and cancels the running one: every run carries its own cancel event,
+    which stops its streamed LLM request at the next chunk. Misses and
+    cancel() stop in-flight work the same way.
+    """
+
+    def __init__(self, ai_engine, min_chars=4, keep_results=4):
+        self.ai_engine = ai_engine
+        self.min_chars = min_chars
+        self.keep_results = keep_results
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.started = 0
+        self._running = None
+        self._pending = None
+        self._lock = threading.Lock()
+        tracer.register_metrics('speculation', self.stats)
+
+    def key(self, text, screen_analysis):
+        # A speculation only counts for the analysis it was computed against. id()
+        # is reused once an analysis is freed, so key on when it was taken instead.
+        timestamp = screen_analysis.get('timestamp') if screen_analysis is not None else None
+        return (normalize_command(text), timestamp)
+
+    def submit(self, text, screen_analysis):
+        """Speculate on `text`; cheap to call on every debounced keystroke"""
+        key = self.key(text, screen_analysis)
+        if len(key[0]) < self.min_chars:
+            return
+        with self._lock:
+            if key in self.results or (self._running and self._running['key'] == key):
+                return
+            run = {
+                'key': key, 'text': text, 'analysis': screen_analysis,
+                'event': threading.Event(), 'cancel': threading.Event(), 'result': None
+            }
+            if self._running:
+                # Only the latest prefix matters: replace the queued one and stop the stale request
+                self._pending = run
+                self._running['cancel'].set()
+                return
+            self._start(run)
+
+    def take(self, text, screen_analysis):
+        """Claim the speculation for `text`; None on a miss.
+
+        Otherwise returns wait(cancel_event) -> command or None, which returns
+        at once for a finished run and else blocks until the in-flight run
+        ends. It is meant to be the LLM side of a deadline race, so the SLO
+        still caps the wait; setting cancel_event stops the run.
+        """
+        key = self.key(text, screen_analysis)
+        with self._lock:
+            if key in self.results:
+                self.hits += 1
+                result = self.results.pop(key)
+                return lambda cancel_event: result
+            running = next((run for run in (self._running, self._pending) if run and run['key'] == key), None)
+            if running is None:
+                self.misses += 1
+                self._stop()
+                return None
+        return lambda cancel_event: self._wait(running, cancel_event)
+
+    def _wait(self, run, cancel_event):
+        while not run['event'].wait(0.05):
+            if cancel_event.is_set():
+                run['cancel'].set()
+                break
+        with self._lock:
+            self.results.pop(run['key'], None)
+            if run['result'] is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return run['result']
+
+    def cancel(self):
+        """Drop queued work and cached results (e.g. when the window is hidden)"""
+        with self._lock:
+            self._stop()
+            self.results.clear()
+
+    def stats(self):
+        return {'started': self.started, 'hits': self.hits, 'misses': self.misses}
+
+    def _stop(self):
+        self._pending = None
+        if self._running:
+            self._running['cancel'].set()
+
+    def _start(self, run):
+        self._running = run
+        self.started += 1
+        threading.Thread(target=self._run, args=(run,), name='altqu-speculate', daemon=True).start()
+
+    def _run(self, run):
+        try:
+            with tracer.span('speculative_inference', chars=len(run['text'])):
+                result = self.ai_engine.process_intelligent_command(run['text'], run['analysis'], run['cancel'])
+                if not run['cancel'].is_set():
+                    run['result'] = result
+        except Exception as e:
+            print(f"Speculative inference failed: {e}")
+        finally:
+            with self._lock:
+                if run['result'] is not None:
+                    self.results[run['key']] = run['result']
+                    while len(self.results) > self.keep_results:
+                        self.results.popitem(last=False)
+                run['event'].set()
+                self._running = None
+                pending, self._pending = self._pending, None
+                if pending and pending['key'] not in self.results:
+                    self._start(pending)
@@ -1,7 +1,15 @@
 import ollama
+import itertools
 import json
 import re
+import time
 from datetime import datetime
+from core.action_schema import RESPONSE_SCHEMA, ActionValidationError, validate_action, repair_json
+from core.deadline_executor import DeadlineExecutor
+from core.model_router import ModelRouter
+from core.prompt_context import PromptContextBuilder
+from core.task_planner import PLAN_FORMAT
+from core.tracing import tracer
 
 class SuperAIEngine:
     def __init__(self):
@@ -9,6 +17,14 @@ class SuperAIEngine:
         self.model_name = "llama3"
         self.conversation_history = []
         self.screen_intelligence = None
+        self.context_builder = PromptContextBuilder()
+        self.model_router = ModelRouter(self.client)
+        tracer.register_metrics('models', self.model_router.metrics)
+        self.deadline_executor = DeadlineExecutor()
+        tracer.register_metrics('deadline', self.deadline_executor.metrics)
+        # Optional callback(model, text_chunk, run) fed while a response is generated;
+        # run is the DeadlineRun the response belongs to (None outside a deadline race)
+        self.stream_listener = None
         
     def find_best_text_field(self, screen_analysis):
         """Find the best text field to interact with"""
@@ -66,10 +82,29 @@ class SuperAIEngine:
     def set_screen_intelligence(self, screen_intelligence):
         self.screen_intelligence = screen_intelligence
         
-    def process_intelligent_command(self, user_input, screen_analysis):
+    def process_with_deadline(self, user_input, screen_analysis, speculated=None):
+        """Race the LLM against the rule-based fallback; caps tail latency at the SLO
+
+        speculated(cancel_event), if given, is an already running inference for
+        this command; a fresh one is only started if it comes back empty.
+        """
+        def llm_call(cancel_event):
+            result = speculated(cancel_event) if speculated is not None else None
+            if result is None and not cancel_event.is_set():
+                result = self.process_intelligent_command(user_input, screen_analysis, cancel_event)
+            return result
+        
+        return self.deadline_executor.run(
+            llm_call,
+            lambda: self.intelligent_fallback(user_input, screen_analysis or {}),
+            label=user_input[:80]
+        )
+        
+    def process_intelligent_command(self, user_input, screen_analysis, cancel_event=None):
         """Process command with better JSON handling"""
         
-        context = self.build_intelligent_context(screen_analysis)
+        # Ranked screen content packed into a fixed token budget
+        screen_context = self.context_builder.build(user_input, screen_analysis)
         
         system_prompt = f"""You are a desktop AI assistant. Return ONLY valid JSON with this exact structure:
 
@@ -79,60 +114,179 @@ class SuperAIEngine:
         "app_to_search": "app_name_if_opening_app",
         "coordinates": [100, 200],
         "text_to_type": "text_if_typing",
+        "query": "search_query_if_web_search",
         "confidence": 0.9
     }}
 
-    Valid command types: app_search_open, screen_click, screen_type, web_search
+    Valid command types: app_search_open, screen_click, screen_type, web_search, multi_step_task
+
+    For tasks that need several actions, return the whole plan at once:
+    {PLAN_FORMAT}
 
     User wants: {user_input}
-    Current app: {context.get('current_app', {}).get('app_name', 'Unknown')}
+    {screen_context['text']}
 
     Return only the JSON object, no other text."""
 
+        parsed_response = self.request_tiered(system_prompt, user_input, screen_context, cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        if parsed_response is None:
+            return self.create_fallback_response(user_input)
+        if parsed_response.get('type') == 'multi_step_task':
+            parsed_response['goal'] = user_input
+        return parsed_response
+
+    def request_tiered(self, system_prompt, user_input, screen_context=None, cancel_event=None, check=None, purpose='command'):
+        """Start on the smallest model that fits; escalate on invalid or low-confidence answers"""
+        model = self.model_router.choose(user_input)
+        parsed_response = None
+        while model:
+            if cancel_event is not None and cancel_event.is_set():
+                # A faster answer was already committed; don't spend more model time
+                return None
+            parsed_response = self.request_action(model, system_prompt, user_input, screen_context, cancel_event, check, purpose)
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if not self.model_router.needs_escalation(parsed_response):
+                break
+            next_model = self.model_router.escalate(model)
+            if next_model:
+                print(f"Escalating from {model} to {next_model}")
+            model = next_model
+        return parsed_response
+
+    def request_action(self, model, system_prompt, user_input, screen_context=None, cancel_event=None, check=None,
+                       purpose='command'):
+        """One LLM round trip on `model`; returns a validated action or None
+
+        check(action), if given, validates further and raises ValueError to reject
+        the answer; a rejection counts against the model like invalid JSON.
+        """
+        started = time.perf_counter()
+        screen_context = screen_context or {}
         try:
-            response = self.client.chat(
-                model=self.model_name,
-                messages=[
+            with tracer.span(
+                'llm_request',
+                model=model,
+                purpose=purpose,
+                prompt_chars=len(system_prompt),
+                context_tokens=screen_context.get('tokens', 0),
+                context_lines=screen_context.get('lines_used', 0),
+                context_lines_dropped=screen_context.get('lines_dropped', 0)
+            ) as span:
+                response = self.structured_chat([
                     {'role': 'system', 'content': system_prompt},
                     {'role': 'user', 'content': user_input}
-                ]
-            )
-            
-            response_text = response['message']['content'].strip()
+                ], model, cancel_event)
+                if cancel_event is not None and cancel_event.is_set():
+                    # Lost the deadline race: the answer is discarded and says nothing about the model
+                    span.set('cancelled', True)
+                    return None
+                span.update(
+                    prompt_tokens=response.get('prompt_eval_count'),
+                    completion_tokens=response.get('eval_count')
+                )
             
-            # Clean the response to ensure valid JSON
-            response_text = self.clean_json_response(response_text)
+            with tracer.span('json_parse', model=model) as span:
+                parsed_response, outcome = self.parse_action(response['message']['content'])
+                if parsed_response is not None and check is not None:
+                    try:
+                        parsed_response = check(parsed_response)
+                    except ValueError as e:
+                        print(f"Response failed validation: {e}")
+                        parsed_response, outcome = None, 'invalid'
+                span.set('outcome', outcome)
             
-            # Parse JSON with better error handling
-            try:
-                parsed_response = json.loads(response_text)
-                return parsed_response
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing failed: {e}")
-                return self.create_fallback_response(user_input)
+            self.model_router.record(model, (time.perf_counter() - started) * 1000, parsed_response is not None)
+            return parsed_response
                 
         except Exception as e:
-            print(f"AI Engine error: {e}")
-            return self.create_fallback_response(user_input)
+            print(f"AI Engine error ({model}): {e}")
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            self.model_router.record(model, (time.perf_counter() - started) * 1000, False)
+            return None
 
-    def clean_json_response(self, response_text):
-        """Clean AI response to ensure valid JSON"""
-        # Remove any text before the first {
-        start_idx = response_text.find('{')
-        if start_idx != -1:
-            response_text = response_text[start_idx:]
-        
-        # Remove any text after the last }
-        end_idx = response_text.rfind('}')
-        if end_idx != -1:
-            response_text = response_text[:end_idx + 1]
+    def structured_chat(self, messages, model=None, cancel_event=None):
+        """Chat with decoding constrained to RESPONSE_SCHEMA"""
+        model = model or self.model_name
+        if self.stream_listener is not None:
+            return self.streamed_chat(messages, model, cancel_event)
+        try:
+            return self.client.chat(
+                model=model,
+                messages=messages,
+                format=RESPONSE_SCHEMA,
+                options={'temperature': 0}
+            )
+        except (TypeError, ollama.ResponseError) as e:
+            # Schema-constrained output needs an Ollama 0.5+ server; older ones only accept format='json'
+            print(f"Structured output unavailable, using JSON mode: {e}")
+            return self.client.chat(model=model, messages=messages, format='json')
+    
+    def streamed_chat(self, messages, model, cancel_event=None):
+        """Same as structured_chat, but forwards tokens to stream_listener as they arrive.
+
+        Stops reading (and closes the connection) as soon as cancel_event is set.
+        """
+        listener = self.stream_listener
+        try:
+            chunks = iter(self.client.chat(
+                model=model,
+                messages=messages,
+                format=RESPONSE_SCHEMA,
+                options={'temperature': 0},
+                stream=True
+            ))
+            # Streamed requests only report server errors once iterated
+            first = next(chunks, None)
+        except (TypeError, ollama.ResponseError) as e:
+            print(f"Structured output unavailable, using JSON mode: {e}")
+            chunks = iter(self.client.chat(model=model, messages=messages, format='json', stream=True))
+            first = next(chunks, None)
         
-        # Fix common JSON issues
-        response_text = response_text.replace("'", '"')  # Replace single quotes
-        response_text = re.sub(r',\s*}', '}', response_text)  # Remove trailing commas
-        response_text = re.sub(r',\s*]', ']', response_text)  # Remove trailing commas in arrays
+        content = []
+        response = {}
+        for chunk in itertools.chain([first] if first is not None else [], chunks):
+            if cancel_event is not None and cancel_event.is_set():
+                close = getattr(chunks, 'close', None)
+                if close is not None:
+                    close()
+                break
+            text = chunk['message']['content']
+            if text:
+                content.append(text)
+                try:
+                    listener(model, text, cancel_event)
+                except Exception as e:
+                    print(f"Stream listener failed: {e}")
+            if chunk.get('done'):
+                response = chunk
+        # Shape the result like a non-streamed response
+        return {
+            'message': {'role': 'assistant', 'content': ''.join(content)},
+            'prompt_eval_count': response.get('prompt_eval_count'),
+            'eval_count': response.get('eval_count')
+        }
+    
+    def parse_action(self, response_text):
+        """Decode and validate a response; returns (action or None, outcome)"""
+        response_text = response_text.strip()
+        try:
+            return validate_action(json.loads(response_text)), 'valid'
+        except json.JSONDecodeError:
+            pass
+        except ActionValidationError as e:
+            print(f"Response failed validation: {e}")
+            return None, 'invalid'
         
-        return response_text
+        # Last resort: cheap local repair of malformed JSON
+        try:
+            return validate_action(repair_json(response_text)), 'repaired'
+        except Exception as e:
+            print(f"JSON parsing failed: {e}")
+            return None, 'unparseable'
 
     def create_fallback_response(self, user_input):
         """Create a safe fallback response"""
@@ -143,18 +297,21 @@ class SuperAIEngine:
             return {
                 'type': 'app_search_open',
                 'app_to_search': app_name,
-                'reasoning': f'User wants to open {app_name}'
+                'reasoning': f'User wants to open {app_name}',
+                'confidence': 0.7
             }
         
         return {
             'type': 'web_search',
             'query': user_input,
-            'reasoning': 'Fallback to web search'
+            'reasoning': 'Fallback to web search',
+            'confidence': 0.3
         }
 
     
     def build_intelligent_context(self, screen_analysis):
         """Build comprehensive context from screen analysis"""
+        screen_analysis = screen_analysis or {}
         return {
             'current_app': screen_analysis.get('current_app', {}),
             'screen_text': screen_analysis.get('text_content', ''),
@@ -196,6 +353,10 @@ class SuperAIEngine:
             
             # Simple scoring based on proximity to relevant text
             score = self.calculate_relevance_score(target_description, screen_text, (x, y))
+            # Accessibility elements carry their own label; a match there is decisive
+            label = element.get('text')
+            if label:
+                score += 10 * self.calculate_relevance_score(target_description, label, (x, y))
             
             if score > best_score:
                 best_score = score
@@ -213,29 +374,35 @@ class SuperAIEngine:
                 return {
                     'type': 'analyze_and_recommend',
                     'reasoning': 'User wants to play the best song from visible options',
-                    'analysis': 'Analyzing visible songs on Spotify'
+                    'analysis': 'Analyzing visible songs on Spotify',
+                    'confidence': 0.8
                 }
         
         # Amazon intelligence
-        elif 'amazon' in screen_analysis.get('screen_text', '').lower():
+        if 'amazon' in screen_analysis.get('text_content', '').lower():
             if 'best product' in user_lower or 'find best' in user_lower:
                 return {
                     'type': 'analyze_and_recommend',
                     'reasoning': 'User wants to find the best product from visible options',
-                    'analysis': 'Analyzing visible products on Amazon'
+                    'analysis': 'Analyzing visible products on Amazon',
+                    'confidence': 0.8
                 }
         
         # App opening intelligence
-        elif 'open' in user_lower or 'launch' in user_lower:
+        if 'open' in user_lower or 'launch' in user_lower:
             app_name = self.extract_app_name_from_command(user_input)
+            # "open calculator" is unambiguous; "open the report I sent yesterday" is not
+            short_command = len(user_lower.split()) <= 3
             return {
                 'type': 'app_search_open',
                 'app_to_search': app_name,
-                'reasoning': f'User wants to open {app_name} using Windows search'
+                'reasoning': f'User wants to open {app_name} using Windows search',
+                'confidence': 0.9 if short_command and app_name != 'unknown' else 0.4
             }
         
         return {
             'type': 'web_search',
             'query': user_input,
-            'reasoning': 'Fallback to web search'
+            'reasoning': 'Fallback to web search',
+            'confidence': 0.3
         }
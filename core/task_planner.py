@@ -0,0 +1,242 @@
+import json
+import time
+from core.tracing import tracer
+from core.window_tracker import window_tracker
+
+# Allowed plan actions and the fields each one requires
+ACTION_FIELDS = {
+    'open_app': ['target'],
+    'click': ['target'],
+    'type': ['text'],
+    'press_key': ['key'],
+    'web_search': ['query'],
+    'wait': []
+}
+
+SUCCESS_CONDITIONS = ('window_title_contains', 'text_visible')
+
+PLAN_FORMAT = """{
+        "type": "multi_step_task",
+        "reasoning": "brief explanation",
+        "steps": [
+            {"action": "open_app", "target": "spotify", "success": {"window_title_contains": "spotify"}},
+            {"action": "click", "target": "Search", "success": {}},
+            {"action": "type", "text": "lofi beats", "success": {}},
+            {"action": "press_key", "key": "enter", "success": {"text_visible": "lofi"}}
+        ]
+    }
+    Plan actions: open_app(target), click(target text or coordinates [x, y]), type(text),
+    press_key(key, e.g. "enter" or "ctrl+l"), web_search(query), wait(seconds).
+    success is optional: window_title_contains and/or text_visible."""
+
+
+class PlanValidationError(ValueError):
+    pass
+
+
+class TaskPlanner:
+    """Executes an LLM-produced multi-step plan, re-consulting the LLM only when a step fails verification"""
+
+    def __init__(self, ai_engine, screen_intelligence=None, max_steps=12, max_repairs=2, verify_timeout=3.0):
+        self.ai_engine = ai_engine
+        self.screen_intelligence = screen_intelligence
+        self.max_steps = max_steps
+        self.max_repairs = max_repairs
+        self.verify_timeout = verify_timeout
+
+    def validate_plan(self, steps):
+        """Check a raw plan locally and return normalized step dicts"""
+        if not isinstance(steps, list) or not steps:
+            raise PlanValidationError("plan must be a non-empty list of steps")
+        if len(steps) > self.max_steps:
+            raise PlanValidationError(f"plan has {len(steps)} steps, limit is {self.max_steps}")
+
+        normalized = []
+        for i, step in enumerate(steps):
+            if not isinstance(step, dict):
+                raise PlanValidationError(f"step {i + 1} is not an object")
+            action = str(step.get('action', '')).strip().lower()
+            if action not in ACTION_FIELDS:
+                raise PlanValidationError(f"step {i + 1} has unknown action '{action}'")
+            for field in ACTION_FIELDS[action]:
+                if step.get(field) in (None, '', []):
+                    raise PlanValidationError(f"step {i + 1} ({action}) is missing '{field}'")
+
+            try:
+                seconds = min(float(step.get('seconds', 1) or 1), 10.0)
+            except (TypeError, ValueError):
+                raise PlanValidationError(f"step {i + 1} has invalid 'seconds'")
+
+            success = step.get('success') or {}
+            if not isinstance(success, dict):
+                success = {}
+            normalized.append({
+                'action': action,
+                'target': step.get('target'),
+                'text': step.get('text'),
+                'key': step.get('key'),
+                'query': step.get('query'),
+                'seconds': seconds,
+                'success': {k: str(v) for k, v in success.items() if k in SUCCESS_CONDITIONS and v}
+            })
+        return normalized
+
+    def execute_plan(self, goal, steps, screen_analysis, executor):
+        """Run every step; returns True when the whole plan completed"""
+        try:
+            steps = self.validate_plan(steps)
+        except PlanValidationError as e:
+            print(f"Invalid plan: {e}")
+            return False
+
+        repairs = 0
+        completed = []
+        index = 0
+        while index < len(steps):
+            step = steps[index]
+            print(f"Executing step {len(completed) + 1}: {self.describe(step)}")
+
+            with tracer.span('plan_step', action=step['action']) as span:
+                if completed and step['action'] == 'click' and not isinstance(step['target'], list):
+                    # Earlier steps changed the screen; text targets need a fresh look
+                    screen_analysis = self.refresh_analysis(screen_analysis)
+                command = self.to_command(step, screen_analysis)
+                if command is not None:
+                    executor.execute_intelligent_command(command, screen_analysis)
+                    ok, reason = self.verify(step)
+                elif step['action'] == 'wait':
+                    time.sleep(step['seconds'])
+                    ok, reason = self.verify(step)
+                else:
+                    ok, reason = False, f"target '{step['target']}' not found on screen"
+                span.set('verified', ok)
+
+            if ok:
+                if executor.macros is not None:
+                    executor.macros.observe_success(step['success'])
+                completed.append(step)
+                index += 1
+                continue
+
+            print(f"Step failed: {reason}")
+            if executor.macros is not None:
+                executor.macros.discard_unverified()
+            if repairs >= self.max_repairs:
+                return False
+            repairs += 1
+            new_steps = self.repair_plan(goal, completed, step, reason, steps[index + 1:])
+            if not new_steps:
+                return False
+            steps = completed + new_steps
+            index = len(completed)
+
+        return True
+
+    def to_command(self, step, screen_analysis):
+        """Translate a plan step into an IntelligentExecutor command"""
+        action = step['action']
+        if action == 'open_app':
+            return {'type': 'app_search_open', 'app_to_search': step['target']}
+        if action == 'click':
+            coordinates = self.locate_target(step['target'], screen_analysis)
+            if coordinates is None:
+                return None
+            return {'type': 'screen_click', 'coordinates': coordinates, 'target_element': str(step['target'])}
+        if action == 'type':
+            return {'type': 'screen_type', 'text_to_type': step['text']}
+        if action == 'press_key':
+            return {'type': 'key_press', 'key': step['key']}
+        if action == 'web_search':
+            return {'type': 'web_search', 'query': step['query']}
+        return None
+
+    def locate_target(self, target, screen_analysis):
+        """Resolve a click target to screen coordinates"""
+        if isinstance(target, (list, tuple)) and len(target) == 2:
+            return (int(target[0]), int(target[1]))
+
+        target_lower = str(target).lower()
+        best, best_length = None, None
+        for box in (screen_analysis or {}).get('text_boxes', []):
+            text = box.get('text', '').lower()
+            # Prefer the shortest OCR line containing the target (the label itself)
+            if target_lower in text and (best_length is None or len(text) < best_length):
+                best, best_length = box['position'], len(text)
+        return best
+
+    def verify(self, step):
+        """Poll the step's success conditions until they hold or the timeout expires"""
+        success = step['success']
+        if not success:
+            return True, ''
+
+        if self.screen_intelligence is not None:
+            return self.wait_for_conditions(success)
+
+        deadline = time.perf_counter() + self.verify_timeout
+        reason = ''
+        while True:
+            ok = True
+            if 'window_title_contains' in success:
+                title = self.active_window_title()
+                if success['window_title_contains'].lower() not in title.lower():
+                    ok, reason = False, f"active window is '{title}'"
+            if ok and 'text_visible' in success:
+                analysis = self.refresh_analysis(None)
+                if success['text_visible'].lower() not in (analysis or {}).get('text_content', '').lower():
+                    ok, reason = False, f"'{success['text_visible']}' not visible"
+            if ok or time.perf_counter() >= deadline:
+                return ok, reason
+            time.sleep(0.3)
+
+    def wait_for_conditions(self, success):
+        """Event-driven verify: screen watches check changed regions instead of full re-analyses"""
+        deadline = time.perf_counter() + self.verify_timeout
+        if 'window_title_contains' in success:
+            title = success['window_title_contains']
+            if not self.screen_intelligence.wait_for_window(title, max(0.0, deadline - time.perf_counter())):
+                return False, f"active window is '{self.active_window_title()}'"
+        if 'text_visible' in success:
+            text = success['text_visible']
+            if not self.screen_intelligence.wait_for_text(text, max(0.0, deadline - time.perf_counter())):
+                return False, f"'{text}' not visible"
+        return True, ''
+
+    def repair_plan(self, goal, completed, failed_step, reason, remaining):
+        """Single LLM call asking for replacement steps after a verification failure"""
+        prompt = f"""You are fixing a desktop automation plan. Return ONLY JSON: {{"type": "multi_step_task", "steps": [...]}}
+    using the same step format as before.
+    {PLAN_FORMAT}
+
+    Goal: {goal}
+    Completed steps: {json.dumps(completed)}
+    Failed step: {json.dumps(failed_step)}
+    Failure: {reason}
+    Remaining planned steps: {json.dumps(remaining)}
+    Return the steps that still need to run, starting with a replacement for the failed step."""
+
+        def check(action):
+            if action.get('type') != 'multi_step_task':
+                raise PlanValidationError(f"expected multi_step_task, got {action.get('type')}")
+            return dict(action, steps=self.validate_plan(action.get('steps')))
+
+        # Same tiering, schema-constrained decoding and validation as commands;
+        # an invalid replacement plan escalates to the next model
+        repaired = self.ai_engine.request_tiered(prompt, goal, check=check, purpose='plan_repair')
+        if repaired is None:
+            print("Plan repair failed: no valid replacement steps")
+            return None
+        return repaired['steps']
+
+    def refresh_analysis(self, screen_analysis):
+        if self.screen_intelligence is None:
+            return screen_analysis
+        return self.screen_intelligence.capture_and_analyze_screen()
+
+    def active_window_title(self):
+        title = window_tracker.current()['title']
+        return '' if title == 'Unknown' else title
+
+    def describe(self, step):
+        detail = step.get('target') or step.get('text') or step.get('key') or step.get('query') or step.get('seconds')
+        return f"{step['action']} {detail}"
@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+
+def propose_text_regions(gray, min_height=6, max_height=120, min_width=8, merge_gap=12):
+    """Propose text-line rectangles (x, y, w, h) on a grayscale image.
+
+    A morphological gradient highlights glyph strokes, Otsu binarises it,
+    a wide closing joins characters into lines and connected components
+    give the candidate boxes. Flat regions (wallpaper, empty panels,
+    photos without edges) produce no components and are never OCR'd.
+    """
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(connected, connectivity=8)
+
+    boxes = []
+    for x, y, w, h, area in stats[1:count]:
+        if h < min_height or h > max_height or w < min_width:
+            continue
+        # Text lines are wider than tall and reasonably dense with strokes
+        if w < h * 0.8 or area < 0.2 * w * h:
+            continue
+        boxes.append((int(x), int(y), int(w), int(h)))
+
+    return merge_regions(boxes, merge_gap)
+
+
+def merge_regions(boxes, gap):
+    """Merge boxes on the same line whose horizontal gap is at most `gap`"""
+    if not boxes:
+        return []
+
+    boxes = sorted(boxes, key=lambda b: (b[1], b[0]))
+    merged = []
+    for x, y, w, h in boxes:
+        for i, (mx, my, mw, mh) in enumerate(merged):
+            same_line = min(y + h, my + mh) - max(y, my) > 0.5 * min(h, mh)
+            close = x <= mx + mw + gap and mx <= x + w + gap
+            if same_line and close:
+                nx, ny = min(x, mx), min(y, my)
+                merged[i] = (nx, ny, max(x + w, mx + mw) - nx, max(y + h, my + mh) - ny)
+                break
+        else:
+            merged.append((x, y, w, h))
+    return merged
+
+
+def pad_region(box, pad, width, height):
+    """Grow a box by `pad` pixels, clipped to the image"""
+    x, y, w, h = box
+    x0, y0 = max(0, x - pad), max(0, y - pad)
+    x1, y1 = min(width, x + w + pad), min(height, y + h + pad)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def region_coverage(boxes, width, height):
+    """Fraction of the image covered by the proposed boxes (upper bound, overlaps counted twice)"""
+    if not width or not height:
+        return 0.0
+    return float(np.sum([w * h for _, _, w, h in boxes])) / (width * height)
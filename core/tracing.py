@@ -0,0 +1,212 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Span:
+    def __init__(self, tracer, name, trace_id, parent_id, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+        self.error = None
+
+    def set(self, key, value):
+        """Attach an attribute (image size, token counts, cache hits...)"""
+        self.attributes[key] = value
+
+    def update(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.tracer._push(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        self.tracer._pop(self)
+        self.tracer._record(self)
+        return False
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start_time,
+            'duration_ms': round(self.duration_ms or 0.0, 3),
+            'thread': threading.current_thread().name,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class Tracer:
+    def __init__(self, buffer_size=2048):
+        self.spans = deque(maxlen=buffer_size)
+        self.stats = {}
+        self.trace_file = None
+        self.metrics_server = None
+        self.metric_sources = {}
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, trace_file=None, metrics_port=None):
+        """Enable JSON-lines output and/or the localhost metrics endpoint"""
+        if trace_file:
+            self.trace_file = trace_file
+        if metrics_port:
+            self.start_metrics_server(int(metrics_port))
+
+    def register_metrics(self, name, callback):
+        """Expose numeric values from callback() (a dict) on the metrics endpoint"""
+        self.metric_sources[name] = callback
+
+    def add_listener(self, callback):
+        """Call callback(record) for every finished span, on the thread that ran it"""
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def span(self, name, trace_id=None, **attributes):
+        """Open a span; nested spans on the same thread share the trace id"""
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if trace_id is None:
+            trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        return Span(self, name, trace_id, parent.span_id if parent else None, attributes)
+
+    def current_trace_id(self):
+        stack = self._stack()
+        return stack[-1].trace_id if stack else None
+
+    def recent_spans(self, limit=100, name=None):
+        with self._lock:
+            spans = [s for s in self.spans if name is None or s['name'] == name]
+        return spans[-limit:]
+
+    def summary(self):
+        """Per-stage count, mean and max latency in milliseconds"""
+        with self._lock:
+            return {
+                name: {
+                    'count': stat['count'],
+                    'errors': stat['errors'],
+                    'mean_ms': round(stat['total_ms'] / stat['count'], 3) if stat['count'] else 0.0,
+                    'max_ms': round(stat['max_ms'], 3)
+                }
+                for name, stat in self.stats.items()
+            }
+
+    def render_prometheus(self):
+        """Render stage statistics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP altqu_stage_duration_seconds Time spent per pipeline stage',
+            '# TYPE altqu_stage_duration_seconds summary'
+        ]
+        with self._lock:
+            stats = {name: dict(stat) for name, stat in self.stats.items()}
+        for name, stat in sorted(stats.items()):
+            lines.append(f'altqu_stage_duration_seconds_sum{{stage="{name}"}} {stat["total_ms"] / 1000:.6f}')
+            lines.append(f'altqu_stage_duration_seconds_count{{stage="{name}"}} {stat["count"]}')
+        lines.append('# TYPE altqu_stage_errors_total counter')
+        for name, stat in sorted(stats.items()):
+            lines.append(f'altqu_stage_errors_total{{stage="{name}"}} {stat["errors"]}')
+        for source, callback in sorted(self.metric_sources.items()):
+            try:
+                values = callback()
+            except Exception as e:
+                print(f"Metrics source {source} failed: {e}")
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'altqu_{source}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def start_metrics_server(self, port):
+        """Serve /metrics on localhost in a daemon thread"""
+        if self.metrics_server:
+            return self.metrics_server
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = tracer.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.metrics_server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+            threading.Thread(target=self.metrics_server.serve_forever, daemon=True).start()
+            print(f"Metrics endpoint listening on http://127.0.0.1:{port}/metrics")
+        except Exception as e:
+            print(f"Failed to start metrics endpoint: {e}")
+            self.metrics_server = None
+        return self.metrics_server
+
+    def shutdown(self):
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server = None
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _push(self, span):
+        self._stack().append(span)
+
+    def _pop(self, span):
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+
+    def _record(self, span):
+        record = span.to_dict()
+        with self._lock:
+            self.spans.append(record)
+            stat = self.stats.setdefault(span.name, {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stat['count'] += 1
+            stat['total_ms'] += span.duration_ms
+            stat['max_ms'] = max(stat['max_ms'], span.duration_ms)
+            if span.error:
+                stat['errors'] += 1
+            if self.trace_file:
+                try:
+                    with open(self.trace_file, 'a') as f:
+                        f.write(json.dumps(record, default=str) + '\n')
+                except Exception as e:
+                    print(f"Error writing trace: {e}")
+        for listener in list(self.listeners):
+            try:
+                listener(record)
+            except Exception as e:
+                print(f"Span listener failed: {e}")
+
+
+# Shared tracer used by every pipeline stage
+tracer = Tracer()
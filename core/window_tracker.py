@@ -0,0 +1,232 @@
+import platform
+import re
+import select
+import threading
+import time
+from functools import lru_cache
+
+# Title keywords -> display name, checked in this order
+COMMON_APPS = {
+    'spotify': 'Spotify',
+    'chrome': 'Google Chrome',
+    'firefox': 'Firefox',
+    'code': 'VS Code',
+    'notepad': 'Notepad',
+    'excel': 'Excel',
+    'word': 'Word',
+    'outlook': 'Outlook',
+    'discord': 'Discord',
+    'slack': 'Slack'
+}
+
+APP_PATTERN = re.compile('|'.join(f'(?P<{key}>{re.escape(key)})' for key in COMMON_APPS), re.IGNORECASE)
+
+UNKNOWN_WINDOW = {'title': 'Unknown', 'app_name': 'Unknown', 'bounds': None, 'window_id': None}
+
+
+@lru_cache(maxsize=1024)
+def extract_app_name(window_title):
+    """Application name for a window title; one regex scan, memoized per title"""
+    found = {match.lastgroup for match in APP_PATTERN.finditer(window_title)}
+    for key, app_name in COMMON_APPS.items():
+        if key in found:
+            return app_name
+    return window_title.split(' - ')[0] if ' - ' in window_title else window_title
+
+
+def window_info(window_id, title, bounds):
+    return {'title': title, 'app_name': extract_app_name(title), 'bounds': bounds, 'window_id': window_id}
+
+
+class X11WindowSource:
+    """Focus, title and geometry changes from X11 property/structure notifications"""
+
+    name = 'x11'
+
+    def __init__(self):
+        from Xlib import X, display
+        self.X = X
+        self.display = display.Display()
+        self.root = self.display.screen().root
+        self.atoms = {
+            name: self.display.intern_atom(name)
+            for name in ('_NET_ACTIVE_WINDOW', '_NET_WM_NAME', 'WM_NAME', 'UTF8_STRING')
+        }
+        self.root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.display.flush()
+        self.active_id = None
+
+    def active_window(self):
+        """(window_id, title, bounds) of the focused window, subscribing to its changes"""
+        prop = self.root.get_full_property(self.atoms['_NET_ACTIVE_WINDOW'], self.X.AnyPropertyType)
+        window_id = int(prop.value[0]) if prop and len(prop.value) else 0
+        if not window_id:
+            return None
+        window = self.display.create_resource_object('window', window_id)
+        if window_id != self.active_id:
+            window.change_attributes(event_mask=self.X.PropertyChangeMask | self.X.StructureNotifyMask)
+            self.display.flush()
+            self.active_id = window_id
+        return window_id, self.title(window), self.bounds(window)
+
+    def title(self, window):
+        prop = window.get_full_property(self.atoms['_NET_WM_NAME'], self.atoms['UTF8_STRING'])
+        if prop and prop.value:
+            value = prop.value
+            return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+        return window.get_wm_name() or ''
+
+    def bounds(self, window):
+        geometry = window.get_geometry()
+        origin = self.root.translate_coords(window, 0, 0)
+        return (origin.x, origin.y, geometry.width, geometry.height)
+
+    def wait(self, timeout):
+        """Block until something relevant changed (True) or timeout (False)"""
+        if not self.display.pending_events():
+            readable, _, _ = select.select([self.display.fileno()], [], [], timeout)
+            if not readable:
+                return False
+        changed = False
+        relevant = {self.atoms['_NET_ACTIVE_WINDOW'], self.atoms['_NET_WM_NAME'], self.atoms['WM_NAME']}
+        while self.display.pending_events():
+            event = self.display.next_event()
+            if event.type == self.X.PropertyNotify and event.atom in relevant:
+                changed = True
+            elif event.type in (self.X.ConfigureNotify, self.X.DestroyNotify):
+                changed = True
+        return changed
+
+
+class PollingWindowSource:
+    """pygetwindow fallback for platforms without a change-notification source"""
+
+    name = 'polling'
+
+    def __init__(self, interval=0.25):
+        import pygetwindow
+        self.gw = pygetwindow
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def active_window(self):
+        window = self.gw.getActiveWindow()
+        if not window:
+            return None
+        window_id = getattr(window, '_hWnd', None) or window.title
+        return window_id, window.title, (window.left, window.top, window.width, window.height)
+
+    def wait(self, timeout):
+        # Every poll may be a change; the tracker compares against its cache
+        self.stop_event.wait(min(timeout, self.interval))
+        return True
+
+
+class WindowTracker:
+    """Active-window metadata kept current in the background; current() is a dict read.
+
+    Uses X11 notifications when python-xlib and an X display are available,
+    polling pygetwindow otherwise. Per-window info (app name, bounds) is
+    computed once per change and shared by every consumer.
+    """
+
+    def __init__(self, poll_interval=0.25):
+        self.poll_interval = poll_interval
+        self.info = UNKNOWN_WINDOW
+        self.windows = {}
+        self.listeners = []
+        self.source = None
+        self.changes = 0
+        self.last_error = None
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Cached active-window info; treat as read-only"""
+        if self._thread is None:
+            self.start()
+        return self.info
+
+    def subscribe(self, callback):
+        """callback(info) on the tracker thread whenever focus, title or bounds change"""
+        self.listeners.append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.source = self.create_source()
+            if self.source is None:
+                # No window system access at all; current() stays UNKNOWN_WINDOW
+                self._thread = False
+                return
+            self.refresh()
+            self._running = True
+            self._thread = threading.Thread(target=self.run, name='altqu-windows', daemon=True)
+            self._thread.start()
+
+    def create_source(self):
+        if platform.system() == 'Linux':
+            try:
+                return X11WindowSource()
+            except Exception as e:
+                print(f"X11 window events unavailable, polling instead: {e}")
+        try:
+            return PollingWindowSource(self.poll_interval)
+        except Exception as e:
+            print(f"Window tracking unavailable: {e}")
+            return None
+
+    def run(self):
+        while self._running:
+            try:
+                if self.source.wait(1.0):
+                    self.refresh()
+            except Exception as e:
+                print(f"Window tracker error: {e}")
+                time.sleep(self.poll_interval)
+
+    def refresh(self):
+        """Re-read the active window; notify listeners only if something changed"""
+        try:
+            active = self.source.active_window()
+        except Exception as e:
+            # Report each distinct failure once instead of on every poll
+            if str(e) != self.last_error:
+                print(f"Active window lookup failed: {e}")
+                self.last_error = str(e)
+            active = None
+        if active is None:
+            info = UNKNOWN_WINDOW
+        else:
+            window_id, title, bounds = active
+            info = self.windows.get(window_id)
+            if info is None or info['title'] != title or info['bounds'] != bounds:
+                info = window_info(window_id, title, bounds)
+                self.windows[window_id] = info
+                # Bound the table to recently focused windows
+                if len(self.windows) > 256:
+                    self.windows.pop(next(iter(self.windows)))
+        if info is self.info:
+            return False
+        self.info = info
+        self.changes += 1
+        for listener in list(self.listeners):
+            try:
+                listener(info)
+            except Exception as e:
+                print(f"Window listener failed: {e}")
+        return True
+
+    def stop(self):
+        self._running = False
+        if self.source is not None and self.source.name == 'polling':
+            self.source.stop_event.set()
+
+    def metrics(self):
+        return {'changes': self.changes, 'known_windows': len(self.windows)}
+
+
+# Shared tracker; started on the first current() call
+window_tracker = WindowTracker()
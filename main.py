@@ -5,15 +5,27 @@ import time
 import tkinter as tk
 from core.super_ai_engine import SuperAIEngine
 from core.intelligent_executor import IntelligentExecutor
+from core.macros import MacroLibrary
 from core.context_manager import ContextManager
 from core.hotkey_manager import HotkeyManager
+from core.analysis_scheduler import AnalysisScheduler
 from core.screen_intelligence import ScreenIntelligence
+from core.task_planner import TaskPlanner
+from core.profiler import profiler, parse_duration
+from core.tracing import tracer
+from core.window_tracker import window_tracker
 from ui.chat_interface import ChatInterface
 
 class SuperIntelligentDesktopAssistant:
     def __init__(self):
         print("Initializing Super Intelligent Desktop AI Assistant...")
         
+        # Optional tracing outputs (JSON-lines file, localhost metrics endpoint)
+        tracer.configure(
+            trace_file=os.environ.get('ALTQU_TRACE_FILE'),
+            metrics_port=os.environ.get('ALTQU_METRICS_PORT')
+        )
+        
         # Initialize Tkinter root first
         self.root = tk.Tk()
         self.root.withdraw()
@@ -24,6 +36,11 @@ class SuperIntelligentDesktopAssistant:
         self.ai_engine = SuperAIEngine()
         self.ai_engine.set_screen_intelligence(self.screen_intelligence)
         self.executor = IntelligentExecutor()
+        self.executor.set_task_planner(TaskPlanner(self.ai_engine, self.screen_intelligence))
+        # Recorded command sequences, replayed without analysis or inference.
+        # Opt-in: macros.json stores typed text and screen crops in plaintext
+        if os.environ.get('ALTQU_MACROS') == '1':
+            self.executor.set_macros(MacroLibrary(self.screen_intelligence))
         
         self.chat_interface = ChatInterface(
             self.ai_engine,
@@ -33,7 +50,22 @@ class SuperIntelligentDesktopAssistant:
             self.screen_intelligence  # Pass screen intelligence
         )
         
-        self.hotkey_manager = HotkeyManager(self.show_assistant)
+        # Single owner of in-flight screen analyses (prefetch, supersede, deliver)
+        self.analysis_scheduler = AnalysisScheduler(
+            self.screen_intelligence,
+            self.chat_interface.post_screen_analysis
+        )
+        self.chat_interface.set_analysis_scheduler(self.analysis_scheduler)
+        
+        self.hotkey_manager = HotkeyManager(
+            self.show_assistant,
+            prefetch_callback=self.analysis_scheduler.prefetch,
+            prefetch_cancel_callback=self.analysis_scheduler.cancel_prefetch
+        )
+        
+        # Field profiling without a code change: ALTQU_PROFILE=30s
+        if os.environ.get('ALTQU_PROFILE'):
+            profiler.start(parse_duration(os.environ['ALTQU_PROFILE']))
         
         # Setup hotkeys
         if self.hotkey_manager.setup_hotkeys():
@@ -48,20 +80,11 @@ class SuperIntelligentDesktopAssistant:
         
     def show_assistant(self):
         """Show the chat interface immediately and perform screen analysis asynchronously"""
-        # Show interface immediately - FAST!
-        self.root.after(0, self.chat_interface.show_interface)
-        
-        # Perform screen analysis in background thread
-        def analyze_screen():
-            try:
-                screen_analysis = self.screen_intelligence.capture_and_analyze_screen()
-                # Update the interface with analysis results when ready
-                self.root.after(0, lambda: self.chat_interface.set_current_screen_analysis(screen_analysis))
-            except Exception as e:
-                print(f"Screen analysis error: {e}")
+        # Show interface on the next UI tick - FAST!
+        self.chat_interface.post_show()
         
-        # Start analysis in background thread
-        threading.Thread(target=analyze_screen, daemon=True).start()
+        # Adopt the analysis prefetched on Alt-down, or start one in the background
+        self.analysis_scheduler.request(trace_id=tracer.current_trace_id())
         
     def run(self):
         """Run the main application"""
@@ -86,6 +109,13 @@ class SuperIntelligentDesktopAssistant:
     def shutdown(self):
         """Clean shutdown"""
         self.hotkey_manager.stop_hotkeys()
+        self.chat_interface.close()
+        tracer.shutdown()
+        self.screen_intelligence.ocr_cache.close()
+        self.screen_intelligence.ocr.close()
+        self.screen_intelligence.element_source.close()
+        window_tracker.stop()
+        profiler.stop()
         if self.executor.browser_driver:
             self.executor.browser_driver.quit()
         self.root.quit()
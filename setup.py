@@ -19,6 +19,7 @@ def main():
         "keyboard",
         "pygetwindow",
         "pyautogui", 
+        "mss",
         "selenium",
         "webdriver-manager",
         "pytesseract",
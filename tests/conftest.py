@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules are imported as core.* / ui.*, the way main.py sees them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
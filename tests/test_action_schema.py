@@ -0,0 +1,58 @@
+import pytest
+from core.action_schema import ActionValidationError, repair_json, validate_action
+
+
+def test_valid_action_is_normalized():
+    action = validate_action({
+        'type': 'screen_click',
+        'coordinates': [100.7, 200.2],
+        'confidence': 1.7,
+        'reasoning': ''
+    })
+    assert action['coordinates'] == (100, 200)
+    assert action['confidence'] == 1.0
+    # Empty strings are dropped rather than passed to the executor
+    assert 'reasoning' not in action
+
+
+def test_click_accepts_target_instead_of_coordinates():
+    action = validate_action({'type': 'screen_click', 'target_element': 'Play'})
+    assert action['target_element'] == 'Play'
+
+
+@pytest.mark.parametrize('data', [
+    {'type': 'app_search_open'},
+    {'type': 'app_search_open', 'app_to_search': ''},
+    {'type': 'screen_click'},
+    {'type': 'multi_step_task', 'steps': []},
+    {'type': 'delete_everything'},
+    {'reasoning': 'no type'},
+    {'type': 'screen_click', 'coordinates': [1, 2, 3]},
+    {'type': 'web_search', 'query': 'x', 'confidence': True},
+    {'type': 'multi_step_task', 'steps': [{'action': 'format_disk'}]},
+])
+def test_invalid_actions_are_rejected(data):
+    with pytest.raises(ActionValidationError):
+        validate_action(data)
+
+
+def test_repair_strips_fences_prose_and_trailing_commas():
+    text = 'Sure! Here it is:\n```json\n{"type": "web_search", "query": "lofi {beats}",}\n```'
+    assert repair_json(text) == {'type': 'web_search', 'query': 'lofi {beats}'}
+
+
+def test_repair_accepts_python_literals():
+    text = "{'type': 'key_press', 'key': 'enter', 'confidence': 0.9, 'extra': None, 'ok': True}"
+    assert repair_json(text) == {'type': 'key_press', 'key': 'enter', 'confidence': 0.9, 'extra': None, 'ok': True}
+
+
+def test_repair_leaves_literal_words_inside_strings_alone():
+    text = "{'type': 'screen_type', 'text_to_type': \"a true story, null and void\", 'done': false}"
+    repaired = repair_json(text)
+    assert repaired['text_to_type'] == 'a true story, null and void'
+    assert repaired['done'] is False
+
+
+def test_repair_rejects_non_objects():
+    with pytest.raises(ValueError):
+        repair_json("['type', 'web_search',]")
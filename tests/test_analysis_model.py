@@ -0,0 +1,86 @@
+import gc
+import json
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from core.analysis_model import Element, ElementArray, ScreenAnalysis, to_json_value
+
+BUTTONS = [
+    {'position': (60, 25), 'bounds': (10, 10, 100, 30), 'area': 3000.0, 'confidence': 0.75, 'text': 'OK', 'role': 'push button'},
+    {'position': (215, 25), 'bounds': (200, 10, 30, 30)}
+]
+
+
+def test_element_array_serializes_like_the_dicts_it_packs():
+    array = ElementArray.from_dicts(BUTTONS, with_text=True)
+    assert array.to_json() == [
+        {'position': [60, 25], 'bounds': [10, 10, 100, 30], 'area': 3000.0, 'confidence': 0.75, 'text': 'OK', 'role': 'push button'},
+        {'position': [215, 25], 'bounds': [200, 10, 30, 30], 'area': 900.0, 'confidence': 1.0, 'text': ''}
+    ]
+    # Packing the serialized form again gives the same records
+    again = ElementArray.from_dicts(json.loads(json.dumps(array.to_json())), with_text=True)
+    assert again.to_json() == array.to_json()
+    assert [e.to_json() for e in again] == array.to_json()
+
+
+def test_elements_read_like_dicts():
+    element = ElementArray.from_dicts(BUTTONS)[1]
+    assert isinstance(element, Element)
+    assert element['position'] == (215, 25)
+    assert element.get('text') is None and 'text' not in element
+    with pytest.raises(KeyError):
+        element['text']
+    assert ElementArray.from_dicts(BUTTONS, with_text=True)[0].get('role') == 'push button'
+
+
+def test_map_to_screen_scales_and_offsets():
+    array = ElementArray.from_dicts(BUTTONS).map_to_screen(1000, 500, 0.5)
+    assert array[0].bounds == (1020, 520, 200, 60)
+    assert array[0].position == (1120, 550)
+
+
+def test_concatenate_and_slices_keep_texts_aligned():
+    texts = ElementArray.from_dicts(BUTTONS, with_text=True)
+    plain = ElementArray.from_dicts(BUTTONS[:1])
+    joined = ElementArray.concatenate([plain, texts])
+    assert len(joined) == 3
+    assert [e.text for e in joined] == ['', 'OK', '']
+    assert [e.text for e in joined[1:]] == ['OK', '']
+    assert ElementArray.concatenate([]).to_json() == []
+
+
+def test_screen_analysis_round_trips_through_json():
+    screenshot = np.zeros((4, 4, 3), np.uint8)
+    analysis = ScreenAnalysis(
+        text_content='OK',
+        text_boxes=ElementArray.from_dicts([BUTTONS[0]], with_text=True),
+        ui_elements={'buttons': ElementArray.from_dicts(BUTTONS), 'text_fields': ElementArray(), 'images': ElementArray()},
+        clickable_areas=ElementArray.from_dicts(BUTTONS[:1]),
+        current_app={'app_name': 'gedit', 'bounds': (0, 0, np.int32(800), 600), 'icon': np.zeros((8, 8))},
+        capture_region=(0, 0, 800, 600),
+        scale=0.5,
+        screenshot=screenshot
+    )
+    data = json.loads(json.dumps(analysis.to_json()))
+    assert data['text_content'] == 'OK'
+    assert data['text_boxes'][0]['text'] == 'OK'
+    assert len(data['ui_elements']['buttons']) == 2
+    assert data['current_app'] == {'app_name': 'gedit', 'bounds': [0, 0, 800, 600]}
+    assert data['capture_region'] == [0, 0, 800, 600]
+    assert 'screenshot' not in data
+    assert analysis['text_content'] == analysis.get('text_content') == 'OK'
+
+
+def test_screenshot_is_only_weakly_held():
+    screenshot = np.zeros((4, 4, 3), np.uint8)
+    analysis = ScreenAnalysis(screenshot=screenshot)
+    assert analysis.screenshot is screenshot
+    del screenshot
+    gc.collect()
+    assert analysis.screenshot is None
+
+
+def test_unserializable_values_raise():
+    with pytest.raises(TypeError):
+        to_json_value({'callback': object()})
@@ -0,0 +1,99 @@
+import threading
+import time
+from core.analysis_scheduler import AnalysisScheduler
+
+
+class FakeScreen:
+    """Records how far each analysis got; OCR blocks until `release` is set"""
+
+    def __init__(self):
+        self.captures = 0
+        self.ocr_runs = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.in_ocr = threading.Semaphore(0)
+
+    def capture_and_analyze_screen(self, should_cancel=None, proceed=None):
+        self.captures += 1
+        capture = self.captures
+        if proceed is not None and not proceed():
+            return None
+        self.ocr_runs += 1
+        self.in_ocr.release()
+        while not self.release.wait(0.01):
+            if should_cancel():
+                return None
+        return None if should_cancel() else {'capture': capture}
+
+
+def delivered_when_done(job, delivered):
+    """Delivery happens just after done is set"""
+    assert job.done.wait(2)
+    deadline = time.monotonic() + 2
+    while not delivered and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return delivered
+
+
+def make_scheduler(prefetch_max_age=1.5):
+    screen = FakeScreen()
+    delivered = []
+    scheduler = AnalysisScheduler(screen, delivered.append, prefetch_max_age=prefetch_max_age)
+    return scheduler, screen, delivered
+
+
+def test_prefetch_only_captures_until_claimed():
+    scheduler, screen, delivered = make_scheduler()
+    scheduler.prefetch()
+    job = scheduler.current
+    scheduler.cancel_prefetch()
+    assert job.done.wait(2)
+    assert screen.captures == 1
+    assert screen.ocr_runs == 0
+    assert delivered == []
+
+
+def test_activation_adopts_the_prefetch():
+    scheduler, screen, delivered = make_scheduler()
+    scheduler.prefetch()
+    prefetched = scheduler.current
+    job = scheduler.request()
+    assert job is prefetched
+    assert delivered_when_done(job, delivered) == [{'capture': 1}]
+    assert screen.captures == 1 and screen.ocr_runs == 1
+    assert scheduler.metrics()['prefetch_hits'] == 1
+
+
+def test_expired_prefetch_is_abandoned_and_replaced():
+    scheduler, screen, delivered = make_scheduler(prefetch_max_age=0.05)
+    scheduler.prefetch()
+    stale = scheduler.current
+    assert stale.done.wait(2)
+    assert screen.ocr_runs == 0
+
+    job = scheduler.request()
+    assert job is not stale
+    assert delivered_when_done(job, delivered) == [{'capture': 2}]
+
+
+def test_new_activation_supersedes_the_running_analysis():
+    scheduler, screen, delivered = make_scheduler()
+    screen.release.clear()
+    first = scheduler.request()
+    assert screen.in_ocr.acquire(timeout=2)
+    second = scheduler.request()
+    assert first.cancel_event.is_set()
+    screen.release.set()
+    assert first.done.wait(2)
+    assert delivered_when_done(second, delivered) == [{'capture': 2}]
+    assert scheduler.metrics()['superseded'] == 1
+
+
+def test_refresh_joins_the_analysis_in_flight():
+    scheduler, screen, delivered = make_scheduler()
+    screen.release.clear()
+    job = scheduler.request()
+    assert scheduler.refresh() is job
+    screen.release.set()
+    assert delivered_when_done(job, delivered) == [{'capture': 1}]
+    assert screen.captures == 1
@@ -0,0 +1,90 @@
+import os
+import stat
+import pytest
+from core import app_index as app_index_module
+from core.app_index import ApplicationIndex, parse_exec
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="uses POSIX executables")
+
+
+def write_desktop(directory, name, body):
+    path = directory / f'{name}.desktop'
+    path.write_text('[Desktop Entry]\nType=Application\n' + body)
+    return path
+
+
+def write_executable(directory, name):
+    path = directory / name
+    path.write_text('#!/bin/sh\n')
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    applications = tmp_path / 'applications'
+    bin_dir = tmp_path / 'bin'
+    applications.mkdir()
+    bin_dir.mkdir()
+    write_desktop(applications, 'code', 'Name=Visual Studio Code\nExec=/usr/bin/code --unity-launch %F\nKeywords=editor;ide;\n')
+    write_desktop(applications, 'org.gnome.Calculator', 'Name=Calculator\nExec=gnome-calculator\n')
+    write_desktop(applications, 'hidden', 'Name=Hidden Tool\nExec=hidden-tool\nNoDisplay=true\n')
+    for name in ('code', 'python3', 'reboot', 'halt', 'shutdown', 'rm', 'kill', 'sh', 'xterm'):
+        write_executable(bin_dir, name)
+
+    index = ApplicationIndex(path=None)
+    index.scan_roots = lambda: [(str(applications), 'desktop'), (str(bin_dir), 'path')]
+    return index
+
+
+def test_exact_names_and_aliases(index):
+    assert index.find('Visual Studio Code')['source'] == 'desktop'
+    assert index.find('calculator')['name'] == 'Calculator'
+    # The desktop entry wins over the bare executable of the same name
+    assert index.find('vscode')['argv'] == ['/usr/bin/code', '--unity-launch']
+
+
+def test_prefix_and_fuzzy_matches_reach_desktop_entries(index):
+    assert index.find('visual studio')['name'] == 'Visual Studio Code'
+    assert index.find('calculater')['name'] == 'Calculator'
+
+
+@pytest.mark.parametrize('name', ['reboot', 'rebot', 'shutdown', 'halt', 'halt now', 'rm', 'kill', 'sh', 'python3', 'xterm'])
+def test_bare_executables_are_not_launchable_by_name(index, name):
+    assert index.find(name) is None
+
+
+def test_builtin_aliases_reach_executables(index):
+    entry = index.find('terminal')
+    assert entry['source'] == 'path' and entry['name'] == 'xterm'
+
+
+def test_hidden_entries_are_skipped(index):
+    assert index.find('hidden tool') is None
+
+
+@pytest.mark.parametrize('name', ['', None, 'unknown', 'Unknown', 'application'])
+def test_placeholder_names_never_resolve(index, name):
+    assert index.find(name) is None
+
+
+def test_launch_does_not_start_anything_for_unknown_names(index, monkeypatch):
+    def popen(*args, **kwargs):
+        raise AssertionError("nothing should be launched")
+    monkeypatch.setattr(app_index_module.subprocess, 'Popen', popen)
+    assert index.launch('unknown') is None
+    assert index.launch('reboot') is None
+
+
+def test_new_files_are_picked_up_on_a_miss(index, tmp_path):
+    assert index.find('gimp') is None
+    write_desktop(tmp_path / 'applications', 'gimp', 'Name=GIMP\nExec=gimp %U\n')
+    # Directory mtimes can have one-second resolution
+    os.utime(tmp_path / 'applications', (0, 0))
+    assert index.find('gimp')['argv'] == ['gimp']
+
+
+def test_parse_exec_drops_field_codes():
+    assert parse_exec('env FOO=1 app --open %U') == ['env', 'FOO=1', 'app', '--open']
+    assert parse_exec('printf 100%%') == ['printf', '100%']
+    assert parse_exec('"unterminated') is None
@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+cv2 = pytest.importorskip('cv2')
+try:
+    # pyautogui needs a display as soon as it is imported
+    from core.capture_backends import FileCaptureBackend, create_capture_backend
+except Exception as e:
+    pytest.skip(f"capture backends unavailable: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    for i, name in enumerate(('a.png', 'b.png')):
+        frame = np.zeros((90, 160, 3), dtype=np.uint8)
+        frame[:, :, i] = 255
+        frame[10:20, 30:50] = (1, 2, 3)
+        cv2.imwrite(str(tmp_path / name), frame)
+    (tmp_path / 'notes.txt').write_text('not a frame')
+    return tmp_path
+
+
+def test_frames_cycle_in_file_name_order(fixture_dir):
+    backend = FileCaptureBackend(str(fixture_dir))
+    colours = [tuple(int(c) for c in backend.grab()[0, 0]) for _ in range(3)]
+    assert colours == [(255, 0, 0), (0, 255, 0), (255, 0, 0)]
+    assert backend.screen_size() == (160, 90)
+
+
+def test_region_is_cropped(fixture_dir):
+    backend = FileCaptureBackend(str(fixture_dir / 'a.png'))
+    crop = backend.grab((30, 10, 20, 10))
+    assert crop.shape == (10, 20, 3)
+    assert (crop == (1, 2, 3)).all()
+
+
+def test_selected_through_the_environment(fixture_dir, monkeypatch):
+    monkeypatch.setenv('ALTQU_CAPTURE_BACKEND', f'file:{fixture_dir}')
+    backend = create_capture_backend()
+    assert backend.name == 'file'
+    assert len(backend.frames) == 2
+
+
+def test_missing_fixtures_are_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        FileCaptureBackend(str(tmp_path))
+    with pytest.raises(ValueError):
+        FileCaptureBackend([str(tmp_path / 'missing.png')])
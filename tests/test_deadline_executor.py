@@ -0,0 +1,77 @@
+import threading
+import pytest
+from core.deadline_executor import DeadlineExecutor, DeadlineRun
+
+
+def make_executor(tmp_path, slo_ms=50):
+    return DeadlineExecutor(slo_ms=slo_ms, hard_timeout_ms=2000, log_file=str(tmp_path / 'decisions.jsonl'))
+
+
+def test_fast_llm_answer_wins(tmp_path):
+    executor = make_executor(tmp_path, slo_ms=2000)
+    result = executor.run(lambda run: {'type': 'web_search', 'query': 'llm'}, lambda: {'type': 'web_search', 'confidence': 0.9})
+    assert result['query'] == 'llm'
+    assert executor.decisions[-1]['decision'] == 'llm'
+
+
+def test_confident_fallback_cancels_the_losing_run(tmp_path):
+    executor = make_executor(tmp_path)
+    seen = []
+    release = threading.Event()
+
+    def slow_llm(run):
+        seen.append(run)
+        release.wait(5)
+        return {'type': 'web_search', 'query': 'too late'}
+
+    result = executor.run(slow_llm, lambda: {'type': 'app_search_open', 'app_to_search': 'calc', 'confidence': 0.9})
+    release.set()
+    assert result['type'] == 'app_search_open'
+    assert executor.decisions[-1]['decision'] == 'fallback_fast'
+    run, = seen
+    assert isinstance(run, DeadlineRun) and run.is_set()
+
+
+def test_uncertain_fallback_waits_for_the_llm(tmp_path):
+    executor = make_executor(tmp_path)
+
+    def late_llm(run):
+        threading.Event().wait(0.2)
+        return {'type': 'web_search', 'query': 'late'}
+
+    result = executor.run(late_llm, lambda: {'type': 'web_search', 'query': 'guess', 'confidence': 0.3})
+    assert result['query'] == 'late'
+    assert executor.decisions[-1]['decision'] == 'llm_late'
+
+
+def test_runs_are_tagged_in_order(tmp_path):
+    executor = make_executor(tmp_path, slo_ms=2000)
+    runs = []
+    for _ in range(3):
+        executor.run(lambda run: runs.append(run) or {'type': 'key_press', 'key': 'enter'}, lambda: None)
+    assert [run.run_id for run in runs] == [1, 2, 3]
+    assert [decision['run_id'] for decision in executor.decisions] == [1, 2, 3]
+    assert not any(run.is_set() for run in runs)
+
+
+def test_failing_fallback_cancels_the_llm(tmp_path):
+    executor = make_executor(tmp_path)
+    seen = []
+    release = threading.Event()
+
+    started = threading.Event()
+
+    def slow_llm(run):
+        seen.append(run)
+        started.set()
+        release.wait(5)
+        return None
+
+    def broken_fallback():
+        started.wait(5)
+        raise RuntimeError("fallback failed")
+
+    with pytest.raises(RuntimeError):
+        executor.run(slow_llm, broken_fallback)
+    release.set()
+    assert seen[0].is_set()
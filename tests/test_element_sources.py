@@ -0,0 +1,101 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+import pytest
+from core.element_sources import ElementSource, create_element_source
+
+WINDOW_TITLE = 'altqu accessibility fixture'
+
+GTK_APP = f'''
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+window = Gtk.Window(title={WINDOW_TITLE!r})
+box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+box.add(Gtk.Button(label='Press me'))
+box.add(Gtk.Entry())
+window.add(box)
+window.connect('destroy', Gtk.main_quit)
+window.show_all()
+Gtk.main()
+'''
+
+
+def test_cv_source_never_provides_elements():
+    source = create_element_source('cv')
+    assert type(source) is ElementSource
+    assert source.elements({'window_id': 1, 'title': 'x'}) is None
+
+
+@pytest.fixture
+def xvfb_display():
+    """A private X server; the GTK app and the AT-SPI client share the session bus"""
+    if shutil.which('Xvfb') is None:
+        pytest.skip("Xvfb not installed")
+    if not os.environ.get('DBUS_SESSION_BUS_ADDRESS'):
+        pytest.skip("needs a session bus: run under dbus-run-session")
+    try:
+        import gi
+        gi.require_version('Gtk', '3.0')
+        gi.require_version('Atspi', '2.0')
+        from gi.repository import Atspi, Gtk  # noqa: F401
+    except (ImportError, ValueError) as e:
+        pytest.skip(f"GTK/AT-SPI bindings unavailable: {e}")
+
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen(['Xvfb', '-displayfd', str(write_fd), '-screen', '0', '1024x768x24'], pass_fds=(write_fd,))
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        display = f':{f.readline().strip()}'
+    try:
+        yield display
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+@pytest.fixture
+def gtk_window(xvfb_display):
+    env = dict(os.environ, DISPLAY=xvfb_display)
+    env.pop('NO_AT_BRIDGE', None)
+    app = subprocess.Popen([sys.executable, '-c', GTK_APP], env=env)
+    try:
+        yield {'window_id': 1, 'title': WINDOW_TITLE, 'app_name': 'Unknown', 'bounds': None}
+    finally:
+        app.terminate()
+        app.wait(timeout=10)
+
+
+def test_atspi_source_reads_gtk_widgets(gtk_window):
+    source = create_element_source('atspi')
+    assert source.name == 'atspi'
+    try:
+        deadline = time.monotonic() + 20
+        while source.find_frame(gtk_window)[0] is None:
+            if time.monotonic() > deadline:
+                pytest.fail("GTK window never appeared on the accessibility bus")
+            time.sleep(0.2)
+
+        # Let startup accessibility events (focus, showing) settle before walking
+        time.sleep(1)
+        elements = source.elements(gtk_window)
+        buttons = [e for e in elements['buttons'] if e['text'] == 'Press me']
+        assert len(buttons) == 1
+        assert buttons[0]['role'] == 'push button'
+        assert buttons[0] in elements['clickable']
+        x, y, w, h = buttons[0]['bounds']
+        assert w > 0 and h > 0 and buttons[0]['position'] == (x + w // 2, y + h // 2)
+        assert any(e['role'] == 'text' for e in elements['text_fields'])
+
+        # Same tracker info and no accessibility events: served from the cache
+        assert source.elements(gtk_window) is elements
+        assert source.metrics()['hits'] >= 1
+
+        # New tracker info (e.g. the window moved) forces a fresh walk
+        walks = source.metrics()['walks']
+        source.elements(dict(gtk_window))
+        assert source.metrics()['walks'] == walks + 1
+    finally:
+        source.close()
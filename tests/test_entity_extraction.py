@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from core.entity_extraction import EntityExtractor, PageText, rank_products, rank_songs
+
+PRODUCT_PAGE = """Wireless Headphones Pro Max
+$129.99 4.5 out of 5 stars 1,234 ratings
+Sponsored
+Budget Earbuds Basic Model
+$19.99 3.9 out of 5 stars (87)"""
+
+SONG_PAGE = """Blinding Lights - The Weeknd 3:20
+Levitating - Dua Lipa 3:23
+Now playing at 10:30
+Song Pack - Various Artists $1.29"""
+
+
+@pytest.fixture
+def extractor():
+    return EntityExtractor()
+
+
+def kinds(extractor, text):
+    return [(entity.kind, entity.value) for entity in extractor.extract(PageText.from_analysis(screen_text=text))]
+
+
+def test_entities_are_parsed(extractor):
+    assert kinds(extractor, '$1,299.00') == [('price', 1299.0)]
+    assert kinds(extractor, '12,99 EUR') == [('price', 12.99)]
+    assert kinds(extractor, '4,5 stars') == [('rating', 4.5)]
+    assert kinds(extractor, '2.3k reviews') == [('reviews', 2300)]
+    assert kinds(extractor, '1:02:03') == [('duration', 3723)]
+
+
+@pytest.mark.parametrize('text', ['Meeting at 10:30', 'Mon 10:30', 'Wednesday, 9:15', '10:30 PM', '2024-05-01 10:30', '@ 7:45'])
+def test_times_of_day_are_not_durations(extractor, text):
+    assert kinds(extractor, text) == []
+
+
+def test_products_link_the_nearest_rating_and_review_count(extractor):
+    products = extractor.products(screen_text=PRODUCT_PAGE)
+    assert [(p['price_value'], p['rating'], p['reviews']) for p in products] == [(129.99, 4.5, 1234), (19.99, 3.9, 87)]
+    assert products[0]['title'] == 'Wireless Headphones Pro Max'
+
+
+def test_products_use_screen_positions_when_available(extractor):
+    boxes = [
+        {'text': 'Desk Lamp with USB Port', 'position': (100, 100)},
+        {'text': '$24.00', 'position': (100, 130)},
+        {'text': '4.8 stars', 'position': (100, 160)},
+        {'text': '3.1 stars', 'position': (900, 130)}
+    ]
+    product, = extractor.products(text_boxes=boxes)
+    assert product['rating'] == 4.8
+    assert product['position'] == (100, 130)
+
+
+def test_products_rank_by_confidence_adjusted_rating():
+    products = [
+        {'rating': 4.9, 'reviews': 3, 'price_value': 10},
+        {'rating': 4.7, 'reviews': 5000, 'price_value': 30},
+        {'rating': 3.0, 'reviews': 4000, 'price_value': 5}
+    ]
+    assert [int(i) for i in rank_products(products)] == [1, 0, 2]
+
+
+def test_songs_pair_titles_with_their_durations(extractor):
+    songs = extractor.songs(screen_text=SONG_PAGE)
+    assert [(s['title'], s['artist'], s.get('duration_seconds')) for s in songs] == [
+        ('Blinding Lights', 'The Weeknd', 200),
+        ('Levitating', 'Dua Lipa', 203)
+    ]
+
+
+def test_songs_ignore_rows_with_prices_or_ratings(extractor):
+    assert extractor.songs(screen_text='Song Pack - Various Artists $1.29\nGreat - Album 4.5 stars') == []
+
+
+def test_songs_rank_popularity_indicators_first():
+    songs = [
+        {'title': 'Intro', 'artist': 'Band', 'position': None},
+        {'title': 'Hit (Official Video)', 'artist': 'Band', 'position': None},
+        {'title': 'Outro', 'artist': 'Band', 'position': (10, 10)}
+    ]
+    assert [int(i) for i in rank_songs(songs)] == [1, 2, 0]
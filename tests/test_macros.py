@@ -0,0 +1,105 @@
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from core.macros import MacroLibrary, Recording
+
+
+def step(command, before=(), after=()):
+    return {'command': command, 'params': {}, 'before': list(before), 'after': list(after)}
+
+
+def spotify_recording(confirmed=True, verified_last=True):
+    recording = Recording('Play lofi beats on Spotify')
+    recording.steps = [
+        step({'type': 'app_search_open', 'app_to_search': 'spotify'}),
+        step(
+            {'type': 'screen_type', 'text_to_type': 'lofi beats'},
+            before=[{'kind': 'window', 'app_name': 'Spotify'}],
+            after=[{'kind': 'text', 'value': 'lofi beats'}] if verified_last else []
+        )
+    ]
+    recording.confirmed = len(recording.steps) if confirmed else 1
+    return recording
+
+
+@pytest.fixture
+def library(tmp_path):
+    return MacroLibrary(None, path=str(tmp_path / 'macros.json'))
+
+
+def finish(library, recording, ok=True):
+    library.recording = recording
+    return library.finish_recording(ok)
+
+
+def test_compile_turns_typed_text_into_a_parameter(library):
+    macro = library.compile(spotify_recording())
+    assert macro['pattern'] == r'^Play\s+(?P<p0>.+?)\s+on\s+Spotify[.!?]*$'
+    assert macro['params'] == ['p0']
+    typed = macro['steps'][1]
+    assert typed['params'] == {'text_to_type': 'p0'}
+    assert 'text_to_type' not in typed['command']
+    # The success check follows the parameter too
+    assert typed['after'] == [{'kind': 'text', 'param': 'p0'}]
+
+
+def test_triggers_made_only_of_parameters_are_refused(library):
+    recording = Recording('lofi beats')
+    recording.steps = [step({'type': 'screen_type', 'text_to_type': 'lofi beats'}, after=[{'kind': 'text', 'value': 'x'}])]
+    recording.confirmed = 1
+    assert library.compile(recording) is None
+
+
+def test_match_binds_parameters(library):
+    assert finish(library, spotify_recording()) is not None
+    macro, params = library.match('play   jazz for work on spotify!')
+    assert params == {'p0': 'jazz for work'}
+    assert macro['phrase'] == 'Play lofi beats on Spotify'
+    assert library.match('play jazz on youtube') is None
+
+
+def test_fewer_parameters_win(library):
+    finish(library, spotify_recording())
+    exact = Recording('Play focus on Spotify')
+    exact.steps = [step({'type': 'app_search_open', 'app_to_search': 'spotify'}, after=[{'kind': 'title', 'value': 'Spotify'}])]
+    exact.confirmed = 1
+    finish(library, exact)
+    macro, params = library.match('play focus on spotify')
+    assert macro['phrase'] == 'Play focus on Spotify' and params == {}
+
+
+@pytest.mark.parametrize('recording, ok', [
+    (spotify_recording(confirmed=False), True),
+    (spotify_recording(verified_last=False), True),
+    (spotify_recording(), False)
+])
+def test_unverified_runs_are_not_recorded(library, recording, ok):
+    assert finish(library, recording, ok) is None
+    assert library.match('play jazz on spotify') is None
+
+
+def test_unreplayable_runs_are_not_recorded(library):
+    recording = spotify_recording()
+    recording.replayable = False
+    assert finish(library, recording) is None
+
+
+def test_observe_success_confirms_and_discard_drops_unverified_steps(library):
+    library.start_recording('open spotify')
+    recording = library.recording
+    recording.steps.append(step({'type': 'app_search_open', 'app_to_search': 'spotify'}))
+    library.observe_success({'window_title_contains': 'Spotify'})
+    assert recording.confirmed == 1
+    assert recording.steps[0]['after'] == [{'kind': 'title', 'value': 'Spotify'}]
+
+    recording.steps.append(step({'type': 'key_press', 'key': 'enter'}))
+    library.discard_unverified()
+    assert len(recording.steps) == 1
+
+
+def test_macros_survive_a_restart(library, tmp_path):
+    finish(library, spotify_recording())
+    reloaded = MacroLibrary(None, path=str(tmp_path / 'macros.json'))
+    assert reloaded.match('play jazz on spotify')[1] == {'p0': 'jazz'}
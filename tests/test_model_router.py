@@ -0,0 +1,69 @@
+import pytest
+from core.model_router import ModelRouter
+
+
+class FakeClient:
+    def __init__(self, installed):
+        self.installed = installed
+        self.list_calls = 0
+
+    def list(self):
+        self.list_calls += 1
+        return {'models': [{'model': name} for name in self.installed]}
+
+
+@pytest.fixture
+def router():
+    client = FakeClient(['llama3.2:1b', 'qwen2.5:7b', 'llama3:latest'])
+    return ModelRouter(client, models=['llama3.2:1b', 'qwen2.5:7b', 'llama3', 'missing:70b'], latency_budget_ms=1000)
+
+
+def test_only_installed_models_are_used(router):
+    assert router.available_models() == ['llama3.2:1b', 'qwen2.5:7b', 'llama3']
+    router.available_models()
+    assert router.client.list_calls == 1
+
+
+def test_listing_failure_falls_back_to_the_largest_model():
+    class BrokenClient:
+        def list(self):
+            raise ConnectionError("server down")
+    router = ModelRouter(BrokenClient(), models=['small', 'large'])
+    assert router.available_models() == ['large']
+    assert router.choose('open calculator') == 'large'
+
+
+def test_simple_commands_start_small_and_complex_ones_large(router):
+    assert router.choose('open calculator') == 'llama3.2:1b'
+    assert router.choose('compare the prices on this page, then find the best rated one and explain why') == 'llama3'
+
+
+def test_escalation_walks_up_the_tiers(router):
+    assert router.escalate('llama3.2:1b') == 'qwen2.5:7b'
+    assert router.escalate('qwen2.5:7b') == 'llama3'
+    assert router.escalate('llama3') is None
+    assert router.escalate('not-configured') is None
+
+
+def test_invalid_or_unsure_answers_escalate(router):
+    assert router.needs_escalation(None)
+    assert router.needs_escalation({'type': 'web_search', 'confidence': 0.3})
+    assert not router.needs_escalation({'type': 'web_search', 'confidence': 0.9})
+    assert not router.needs_escalation({'type': 'web_search'})
+
+
+def test_slow_tiers_are_skipped_to_stay_in_budget(router):
+    complex_command = 'compare the prices on this page, then find the best rated one and explain why'
+    router.record('llama3', 5000)
+    assert router.choose(complex_command) == 'qwen2.5:7b'
+    router.record('qwen2.5:7b', 3000)
+    assert router.choose(complex_command) == 'llama3.2:1b'
+
+
+def test_record_keeps_an_average_and_failure_count(router):
+    router.record('llama3', 100)
+    router.record('llama3', 200, ok=False)
+    metrics = router.metrics()
+    assert metrics['llama3_requests'] == 2
+    assert metrics['llama3_failures'] == 1
+    assert metrics['llama3_mean_ms'] == 130.0
@@ -0,0 +1,82 @@
+import os
+import stat
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from core.ocr_cache import OCRCache, disk_cache_path, exact_hash, perceptual_hash
+
+
+def tile(seed, shape=(16, 64)):
+    return np.random.default_rng(seed).integers(0, 255, shape, dtype=np.uint8)
+
+
+def test_memory_only_by_default(monkeypatch, tmp_path):
+    monkeypatch.delenv('ALTQU_OCR_CACHE_PATH', raising=False)
+    monkeypatch.delenv('ALTQU_OCR_CACHE', raising=False)
+    monkeypatch.chdir(tmp_path)
+    assert disk_cache_path() is None
+    cache = OCRCache(path=disk_cache_path())
+    cache.put('k', 'Save', 0.9)
+    assert cache.get('k') == ('Save', 0.9)
+    assert os.listdir(tmp_path) == []
+
+
+def test_disk_tier_is_opt_in_and_owner_only(monkeypatch, tmp_path):
+    monkeypatch.delenv('ALTQU_OCR_CACHE_PATH', raising=False)
+    monkeypatch.setenv('ALTQU_OCR_CACHE', 'disk')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    path = disk_cache_path()
+    assert path == str(tmp_path / 'altqu' / 'ocr_cache.sqlite3')
+
+    cache = OCRCache(path=path)
+    cache.put('k', 'Save', 0.9)
+    cache.close()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) == 0o700
+
+    # A fresh process finds the entry on disk
+    reopened = OCRCache(path=path)
+    assert reopened.get('k') == ('Save', 0.9)
+    reopened.close()
+
+
+def test_explicit_path_wins(monkeypatch, tmp_path):
+    monkeypatch.setenv('ALTQU_OCR_CACHE_PATH', str(tmp_path / 'tiles.db'))
+    monkeypatch.setenv('ALTQU_OCR_CACHE', 'disk')
+    assert disk_cache_path() == str(tmp_path / 'tiles.db')
+
+
+def test_lru_evicts_oldest_and_counts_hits():
+    cache = OCRCache(memory_entries=2)
+    cache.put('a', 'A', 1.0)
+    cache.put('b', 'B', 1.0)
+    assert cache.get('a') == ('A', 1.0)
+    cache.put('c', 'C', 1.0)
+    assert cache.get('b') is None
+    assert cache.get('a') == ('A', 1.0)
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 1
+    assert stats['memory_entries'] == 2
+
+
+def test_saved_time_follows_recognition_cost():
+    cache = OCRCache()
+    cache.record_recognition_cost(40.0, 4)
+    cache.put('a', 'A', 1.0)
+    cache.get('a')
+    assert cache.stats()['saved_ms'] == 10.0
+
+
+def test_exact_hash_separates_shapes_and_content():
+    base = tile(1)
+    assert exact_hash(base) == exact_hash(base.copy())
+    assert exact_hash(base) != exact_hash(tile(2))
+    assert exact_hash(np.zeros((8, 16), np.uint8)) != exact_hash(np.zeros((16, 8), np.uint8))
+
+
+def test_perceptual_hash_tolerates_small_noise():
+    gradient = np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (16, 1))
+    noisy = np.clip(gradient.astype(int) + np.random.default_rng(0).integers(-2, 3, gradient.shape), 0, 255).astype(np.uint8)
+    assert perceptual_hash(gradient) == perceptual_hash(noisy)
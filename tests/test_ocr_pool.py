@@ -0,0 +1,148 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('psutil')
+
+from core import ocr_pool
+from core.ocr_pool import OCRWorkerError, OCRWorkerPool, attach_shared_memory, create_ocr_engine, to_plain
+
+
+class FakeSegment:
+    def __init__(self, size):
+        self.name = 'fake'
+        self.size = size
+        self.buf = bytearray(size)
+
+
+class FakeConn:
+    def __init__(self, worker):
+        self.worker = worker
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def poll(self, timeout):
+        return not self.worker.hang
+
+    def recv(self):
+        if self.worker.crash:
+            raise EOFError()
+        method, _, shape, dtype, kwargs = self.sent[-1]
+        image = np.ndarray(shape, dtype=dtype, buffer=self.worker.segment.buf)
+        return self.worker.reply or ('ok', [(method, int(image.sum()))])
+
+
+class FakeWorker:
+    """Answers jobs in-process; flags simulate crashes, hangs and bloat"""
+
+    def __init__(self):
+        self.conn = FakeConn(self)
+        self.jobs = 0
+        self.segment = None
+        self.crash = self.hang = False
+        self.reply = None
+        self.rss = 0
+        self.stopped = False
+
+    def wait_ready(self, timeout):
+        pass
+
+    def frame_buffer(self, nbytes):
+        if self.segment is None or self.segment.size < nbytes:
+            self.segment = FakeSegment(nbytes)
+        return self.segment
+
+    def rss_bytes(self):
+        return self.rss
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    spawned = []
+
+    def spawn(self):
+        worker = FakeWorker()
+        spawned.append(worker)
+        with self._lock:
+            self.workers.append(worker)
+        return worker
+
+    monkeypatch.setattr(OCRWorkerPool, 'spawn', spawn)
+    pool = OCRWorkerPool(workers=1, max_jobs=3, max_rss_mb=100, job_timeout=0.1)
+    pool.spawned = spawned
+    yield pool
+    pool.close()
+
+
+def test_frames_reach_the_worker_through_its_buffer(pool):
+    image = np.full((4, 5), 2, np.uint8)
+    assert pool.recognize(image, [[0, 5, 0, 4]]) == [('recognize', 40)]
+    method, _, shape, dtype, kwargs = pool.spawned[0].conn.sent[0]
+    assert (method, shape, dtype) == ('recognize', (4, 5), '|u1')
+    assert kwargs == {'horizontal_list': [[0, 5, 0, 4]], 'free_list': [], 'batch_size': 16}
+
+
+def test_worker_is_recycled_after_max_jobs(pool):
+    for _ in range(3):
+        pool.readtext(np.zeros((2, 2), np.uint8))
+    assert pool.recycled == 1
+    assert len(pool.spawned) == 2
+    pool.readtext(np.zeros((2, 2), np.uint8))
+    assert pool.spawned[1].jobs == 1
+
+
+def test_worker_is_recycled_when_memory_grows(pool):
+    pool.spawned[0].rss = 200 * 1024 * 1024
+    pool.readtext(np.zeros((2, 2), np.uint8))
+    assert pool.recycled == 1 and pool.metrics()['recycled'] == 1
+
+
+@pytest.mark.parametrize('failure, message', [('crash', 'died'), ('hang', 'exceeded')])
+def test_crashed_or_hung_worker_fails_one_job_and_is_replaced(pool, failure, message):
+    setattr(pool.spawned[0], failure, True)
+    with pytest.raises(OCRWorkerError, match=message):
+        pool.readtext(np.zeros((2, 2), np.uint8))
+    assert pool.crashes == 1
+    assert pool.readtext(np.ones((2, 2), np.uint8)) == [('readtext', 4)]
+
+
+def test_worker_errors_keep_the_worker(pool):
+    pool.spawned[0].reply = ('error', 'RuntimeError: bad image')
+    with pytest.raises(OCRWorkerError, match='bad image'):
+        pool.readtext(np.zeros((2, 2), np.uint8))
+    assert pool.crashes == 0 and len(pool.spawned) == 1
+
+
+def test_closed_pool_rejects_jobs(pool):
+    pool.close()
+    with pytest.raises(OCRWorkerError):
+        pool.readtext(np.zeros((2, 2), np.uint8))
+    assert pool.spawned[0].stopped
+
+
+def test_to_plain_converts_numpy_types():
+    results = to_plain([([[np.int64(1), np.float32(2.6)]], np.str_('OK'), np.float64(0.5))])
+    assert results == [([[1, 2]], 'OK', 0.5)]
+    assert type(results[0][0][0][0]) is int and type(results[0][2]) is float
+
+
+def test_attached_segment_is_not_unlinked_by_the_attacher():
+    from multiprocessing import shared_memory
+    segment = shared_memory.SharedMemory(create=True, size=16)
+    try:
+        attached = attach_shared_memory(segment.name)
+        attached.buf[0] = 7
+        attached.close()
+        assert segment.buf[0] == 7
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def test_zero_workers_selects_in_process_ocr(monkeypatch):
+    monkeypatch.setattr(ocr_pool, 'InProcessOCR', lambda: 'in-process')
+    assert create_ocr_engine(workers=0) == 'in-process'
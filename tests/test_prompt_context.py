@@ -0,0 +1,47 @@
+from core.prompt_context import PromptContextBuilder, estimate_tokens, tokenize
+
+
+def analysis(lines, **extra):
+    boxes = [{'text': text, 'confidence': 0.9, 'position': (10, 20 * i)} for i, text in enumerate(lines)]
+    return dict({'current_app': {'app_name': 'firefox', 'title': 'Shop'}, 'text_boxes': boxes}, **extra)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcd' * 10) == 10
+    # Many short words count by word rather than by character
+    assert estimate_tokens('a b c d e f') == 8
+
+
+def test_tokenize_drops_stop_words_and_punctuation():
+    assert tokenize('Please open the Settings, now.') == ['open', 'settings']
+
+
+def test_relevant_lines_rank_first():
+    builder = PromptContextBuilder()
+    ranked = builder.rank_lines('add headphones to cart', analysis(['Home', 'Sign in', 'Add to cart', 'Wireless headphones']))
+    assert [line for _, line in ranked][:2] == ['[10,40] Add to cart', '[10,60] Wireless headphones']
+
+
+def test_noise_and_duplicates_are_dropped():
+    builder = PromptContextBuilder()
+    boxes = analysis(['Save', '~~|', 'save', 'x'])
+    boxes['text_boxes'].append({'text': 'Cancel', 'confidence': 0.1, 'position': (0, 0)})
+    assert [line for _, line in builder.rank_lines('save', boxes)] == ['[10,0] Save']
+
+
+def test_context_stays_within_budget_and_counts_dropped_lines():
+    builder = PromptContextBuilder(token_budget=60)
+    lines = [f'Unrelated paragraph number {i} with plenty of filler words' for i in range(30)] + ['Checkout now']
+    context = builder.build('go to checkout', analysis(lines))
+    assert context['tokens'] <= 60
+    assert context['lines_used'] + context['lines_dropped'] == 31
+    assert context['lines_dropped'] > 0
+    assert 'Checkout now' in context['text']
+    assert context['text'].startswith('Current app: firefox (Shop)')
+
+
+def test_flat_text_is_chunked_when_boxes_are_missing():
+    builder = PromptContextBuilder()
+    context = builder.build('weather', {'text_content': ' '.join(f'word{i}' for i in range(30))})
+    assert context['lines_used'] == 3
@@ -0,0 +1,81 @@
+import pytest
+from core.quality_controller import QUALITY_LEVELS, QualityController
+
+LEVEL_NAMES = [point['name'] for point in QUALITY_LEVELS]
+
+
+@pytest.fixture(autouse=True)
+def no_environment(monkeypatch):
+    monkeypatch.delenv('ALTQU_QUALITY', raising=False)
+    monkeypatch.delenv('ALTQU_ANALYSIS_TARGET_MS', raising=False)
+
+
+def timings(total_ms):
+    return {'capture': total_ms * 0.2, 'ocr': total_ms * 0.5, 'ui_detection': total_ms * 0.3}
+
+
+def test_starts_balanced_and_adaptive():
+    controller = QualityController(target_ms=100)
+    assert controller.adaptive
+    assert controller.current()['name'] == 'balanced'
+
+
+def test_steps_down_after_consecutive_slow_samples():
+    controller = QualityController(target_ms=100)
+    controller.observe(timings(200))
+    assert controller.current()['name'] == 'balanced'
+    assert controller.observe(timings(200))['name'] == 'fast'
+
+
+def test_steps_back_up_after_a_run_of_fast_samples():
+    controller = QualityController(target_ms=100)
+    controller.observe(timings(200))
+    controller.observe(timings(200))
+    for _ in range(4):
+        assert controller.observe(timings(20))['name'] == 'fast'
+    assert controller.observe(timings(20))['name'] == 'balanced'
+
+
+def test_samples_near_the_target_hold_the_level():
+    controller = QualityController(target_ms=100)
+    for _ in range(20):
+        controller.observe(timings(80))
+    assert controller.current()['name'] == 'balanced'
+    assert controller.changes == 0
+
+
+def test_single_outlier_is_absorbed():
+    controller = QualityController(target_ms=100)
+    controller.observe(timings(80))
+    controller.observe(timings(200))
+    controller.observe(timings(40))
+    assert controller.current()['name'] == 'balanced'
+
+
+def test_levels_are_clamped():
+    controller = QualityController(target_ms=100, level=None)
+    for _ in range(40):
+        controller.observe(timings(10000))
+    assert controller.current()['name'] == LEVEL_NAMES[-1]
+    for _ in range(100):
+        controller.observe(timings(1))
+    assert controller.current()['name'] == LEVEL_NAMES[0]
+
+
+def test_pinned_level_never_adapts(monkeypatch):
+    monkeypatch.setenv('ALTQU_QUALITY', 'low')
+    controller = QualityController(target_ms=100)
+    for _ in range(10):
+        controller.observe(timings(10000))
+    assert not controller.adaptive
+    assert controller.current()['name'] == 'low'
+    assert controller.operating_point()['latency_ms'] == 10000
+
+
+def test_metrics_are_numeric_apart_from_the_name():
+    controller = QualityController(target_ms=100)
+    controller.observe(timings(50))
+    metrics = controller.metrics()
+    assert metrics['level'] == LEVEL_NAMES.index('balanced')
+    assert metrics['samples'] == 1
+    assert metrics['ocr_ms'] == 25.0
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+import re
+from core.screen_watch import ScreenWatcher, Watch
+
+
+class FakeBackend:
+    def __init__(self, width, height):
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def virtual_bounds(self):
+        return (0, 0, self.frame.shape[1], self.frame.shape[0])
+
+    def grab(self, bounds):
+        left, top, width, height = bounds
+        return self.frame[top:top + height, left:left + width]
+
+
+class FakeScreen:
+    """Records the size of every region sent to OCR"""
+
+    def __init__(self, width=3840, height=2160):
+        self.capture_backend = FakeBackend(width, height)
+        self.scanned = []
+
+    def clip_region(self, region, bounds):
+        return region
+
+    def extract_text_boxes(self, image):
+        self.scanned.append(image.shape)
+        return []
+
+    def identify_current_application(self):
+        return {'title': '', 'app_name': ''}
+
+
+def test_new_text_watch_scans_whole_screen_in_one_tick():
+    screen = FakeScreen()
+    watcher = ScreenWatcher(screen, max_pixels=500000)
+    watcher.rescan = True
+    watcher.check_text([Watch(1, 'text', re.compile('ready'))])
+    assert sum(h * w for h, w in screen.scanned) == 3840 * 2160
+    assert not watcher.dirty.any()
+    assert watcher.full_scan and watcher.full_scans == 1
+
+
+def test_changes_after_the_full_scan_stay_within_budget():
+    screen = FakeScreen()
+    watcher = ScreenWatcher(screen, max_pixels=500000)
+    watches = [Watch(1, 'text', re.compile('ready'))]
+    watcher.check_text(watches)
+    watcher.full_scan = False
+    screen.scanned.clear()
+
+    # Scrolling the whole screen dirties every tile; only the budget is scanned
+    screen.capture_backend.frame[:] = 255
+    watcher.check_text(watches)
+    assert 0 < sum(h * w for h, w in screen.scanned) <= 500000
+    assert watcher.dirty.any()
+    assert not watcher.full_scan
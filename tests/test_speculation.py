@@ -0,0 +1,109 @@
+import threading
+import pytest
+
+pytest.importorskip('numpy')
+
+from core.analysis_model import ScreenAnalysis
+from core.deadline_executor import DeadlineExecutor
+from core.speculation import SpeculativeInference, normalize_command
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.calls = []
+        self.cancels = []
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def process_intelligent_command(self, text, screen_analysis, cancel_event=None):
+        self.calls.append(text)
+        self.cancels.append(cancel_event)
+        self.started.release()
+        # Like streamed_chat, stop early once cancelled
+        while not self.release.wait(0.01):
+            if cancel_event.is_set():
+                return None
+        return {'type': 'web_search', 'query': text}
+
+
+def test_normalize_command():
+    assert normalize_command('  Play   Jazz on Spotify!! ') == 'play jazz on spotify'
+
+
+def test_results_are_reused_for_the_same_text_and_analysis():
+    engine = RecordingEngine()
+    speculation = SpeculativeInference(engine)
+    analysis = ScreenAnalysis()
+    speculation.submit('open calculator', analysis)
+    engine.release.set()
+    assert speculation.take('Open calculator.', analysis)(threading.Event())['query'] == 'open calculator'
+    assert speculation.hits == 1
+
+
+def test_results_do_not_carry_over_to_a_newer_analysis():
+    engine = RecordingEngine()
+    engine.release.set()
+    speculation = SpeculativeInference(engine)
+    old = ScreenAnalysis()
+    speculation.submit('open calculator', old)
+    speculation.take('open calculator', old)(threading.Event())
+    speculation.submit('open calculator', old)
+
+    newer = ScreenAnalysis()
+    newer.timestamp = old.timestamp + 1
+    assert speculation.take('open calculator', newer) is None
+    assert speculation.misses == 1
+
+
+def test_a_newer_prefix_cancels_the_running_request():
+    engine = RecordingEngine()
+    speculation = SpeculativeInference(engine)
+    analysis = ScreenAnalysis()
+    speculation.submit('open calc', analysis)
+    assert engine.started.acquire(timeout=5)
+    speculation.submit('open calculator', analysis)
+    assert engine.cancels[0].is_set()
+
+    # The newest prefix starts as soon as the cancelled request returns
+    assert engine.started.acquire(timeout=5)
+    engine.release.set()
+    assert speculation.take('open calculator', analysis)(threading.Event())['query'] == 'open calculator'
+    assert engine.calls == ['open calc', 'open calculator']
+    assert not engine.cancels[1].is_set()
+
+
+def test_a_miss_stops_the_request_in_flight():
+    engine = RecordingEngine()
+    speculation = SpeculativeInference(engine)
+    analysis = ScreenAnalysis()
+    speculation.submit('open calculator', analysis)
+    assert engine.started.acquire(timeout=5)
+    assert speculation.take('something else', analysis) is None
+    assert engine.cancels[0].is_set()
+
+
+def test_cancel_stops_the_request_in_flight():
+    engine = RecordingEngine()
+    speculation = SpeculativeInference(engine)
+    speculation.submit('open calculator', ScreenAnalysis())
+    assert engine.started.acquire(timeout=5)
+    speculation.cancel()
+    assert engine.cancels[0].is_set()
+
+
+def test_waiting_for_an_in_flight_run_is_capped_by_the_deadline(tmp_path):
+    engine = RecordingEngine()
+    speculation = SpeculativeInference(engine)
+    analysis = ScreenAnalysis()
+    speculation.submit('open calculator', analysis)
+    assert engine.started.acquire(timeout=5)
+
+    executor = DeadlineExecutor(slo_ms=50, log_file=str(tmp_path / 'decisions.jsonl'))
+    result = executor.run(
+        speculation.take('open calculator', analysis),
+        lambda: {'type': 'app_search_open', 'app_to_search': 'calculator', 'confidence': 0.9}
+    )
+    assert result['type'] == 'app_search_open'
+    assert executor.decisions[-1]['decision'] == 'fallback_fast'
+    # Losing the race stops the speculative request too
+    assert engine.cancels[0].wait(1)
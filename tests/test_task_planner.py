@@ -0,0 +1,129 @@
+import pytest
+from core.task_planner import PlanValidationError, TaskPlanner
+
+
+class TieredEngine:
+    """Answers request_tiered with canned responses, one per model tier"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def request_tiered(self, system_prompt, user_input, screen_context=None, cancel_event=None, check=None, purpose='command'):
+        self.requests.append(purpose)
+        for response in self.responses:
+            try:
+                return check(response) if check else response
+            except ValueError:
+                continue
+        return None
+
+
+def test_plan_repair_goes_through_the_tiered_request():
+    engine = TieredEngine([
+        {'type': 'multi_step_task', 'steps': [{'action': 'teleport'}]},
+        {'type': 'multi_step_task', 'steps': [{'action': 'press_key', 'key': 'enter'}]}
+    ])
+    planner = TaskPlanner(engine)
+    steps = planner.repair_plan('search lofi', [], {'action': 'click', 'target': 'Search'}, 'not found', [])
+    assert engine.requests == ['plan_repair']
+    assert [step['action'] for step in steps] == ['press_key']
+
+
+def test_plan_repair_gives_up_without_a_valid_plan():
+    engine = TieredEngine([{'type': 'web_search', 'query': 'lofi'}])
+    assert TaskPlanner(engine).repair_plan('search lofi', [], {'action': 'wait'}, 'timeout', []) is None
+
+
+def test_plan_validation_errors_are_value_errors():
+    with pytest.raises(ValueError):
+        TaskPlanner(None).validate_plan([])
+    assert issubclass(PlanValidationError, ValueError)
+
+
+class RecordingExecutor:
+    macros = None
+
+    def __init__(self):
+        self.commands = []
+
+    def execute_intelligent_command(self, command, screen_analysis):
+        self.commands.append(command)
+
+
+class WatchingScreen:
+    """wait_for_text succeeds only for text in `visible`"""
+
+    def __init__(self, visible=()):
+        self.visible = set(visible)
+        self.waits = []
+
+    def wait_for_text(self, text, timeout):
+        self.waits.append((text, timeout))
+        return text in self.visible
+
+    def wait_for_window(self, title, timeout):
+        return True
+
+    def capture_and_analyze_screen(self):
+        return {'text_boxes': [{'text': 'Search songs', 'position': (50, 60)}]}
+
+
+def test_validate_plan_normalizes_steps():
+    steps = TaskPlanner(None).validate_plan([
+        {'action': ' Open_App ', 'target': 'spotify', 'success': {'window_title_contains': 'Spotify', 'color': 'red'}},
+        {'action': 'wait', 'seconds': 60},
+        {'action': 'click', 'target': [10, 20], 'success': 'yes'}
+    ])
+    assert steps[0]['action'] == 'open_app'
+    assert steps[0]['success'] == {'window_title_contains': 'Spotify'}
+    assert steps[1]['seconds'] == 10.0
+    assert steps[2]['success'] == {}
+
+
+@pytest.mark.parametrize('steps, message', [
+    ('open spotify', 'non-empty list'),
+    ([{'action': 'wait'}] * 13, 'limit is 12'),
+    (['click'], 'not an object'),
+    ([{'action': 'rm -rf'}], "unknown action"),
+    ([{'action': 'type', 'text': ''}], "missing 'text'"),
+    ([{'action': 'wait', 'seconds': 'soon'}], "invalid 'seconds'")
+])
+def test_validate_plan_rejects_bad_plans(steps, message):
+    with pytest.raises(PlanValidationError, match=message):
+        TaskPlanner(None).validate_plan(steps)
+
+
+def test_execute_plan_translates_steps_and_locates_click_targets():
+    executor = RecordingExecutor()
+    planner = TaskPlanner(None, screen_intelligence=WatchingScreen())
+    done = planner.execute_plan('search lofi', [
+        {'action': 'open_app', 'target': 'spotify'},
+        {'action': 'click', 'target': 'search'},
+        {'action': 'type', 'text': 'lofi'},
+        {'action': 'press_key', 'key': 'enter'}
+    ], {}, executor)
+    assert done
+    assert [c['type'] for c in executor.commands] == ['app_search_open', 'screen_click', 'screen_type', 'key_press']
+    assert executor.commands[1]['coordinates'] == (50, 60)
+
+
+def test_failed_verification_repairs_the_rest_of_the_plan():
+    engine = TieredEngine([{'type': 'multi_step_task', 'steps': [{'action': 'press_key', 'key': 'enter', 'success': {'text_visible': 'lofi'}}]}])
+    screen = WatchingScreen(visible={'lofi'})
+    executor = RecordingExecutor()
+    planner = TaskPlanner(engine, screen_intelligence=screen, max_repairs=1)
+    done = planner.execute_plan('search lofi', [
+        {'action': 'type', 'text': 'lofi'},
+        {'action': 'press_key', 'key': 'tab', 'success': {'text_visible': 'results'}}
+    ], {}, executor)
+    assert done
+    assert [c.get('key') for c in executor.commands] == [None, 'tab', 'enter']
+    assert engine.requests == ['plan_repair']
+
+
+def test_execute_plan_stops_after_max_repairs():
+    engine = TieredEngine([{'type': 'multi_step_task', 'steps': [{'action': 'press_key', 'key': 'tab', 'success': {'text_visible': 'never'}}]}])
+    planner = TaskPlanner(engine, screen_intelligence=WatchingScreen(), max_repairs=2)
+    assert not planner.execute_plan('x', [{'action': 'press_key', 'key': 'tab', 'success': {'text_visible': 'never'}}], {}, RecordingExecutor())
+    assert engine.requests == ['plan_repair', 'plan_repair']
@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+cv2 = pytest.importorskip('cv2')
+
+from core.text_regions import merge_regions, pad_region, propose_text_regions, region_coverage
+
+
+def test_text_lines_are_proposed():
+    image = np.full((200, 500), 255, dtype=np.uint8)
+    cv2.putText(image, 'Hello world', (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    cv2.putText(image, 'Second line', (20, 150), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+
+    boxes = propose_text_regions(image)
+
+    assert len(boxes) == 2
+    first, second = sorted(boxes, key=lambda box: box[1])
+    for (x, y, w, h), baseline in ((first, 60), (second, 150)):
+        assert x <= 25 and x + w >= 150
+        assert y < baseline <= y + h + 10
+
+
+def test_flat_images_produce_no_regions():
+    assert propose_text_regions(np.full((120, 200), 40, dtype=np.uint8)) == []
+
+
+def test_merge_joins_neighbours_on_the_same_line_only():
+    boxes = [(0, 0, 40, 20), (50, 2, 30, 18), (0, 40, 40, 20), (200, 0, 20, 20)]
+    assert sorted(merge_regions(boxes, gap=12)) == [(0, 0, 80, 20), (0, 40, 40, 20), (200, 0, 20, 20)]
+
+
+def test_pad_is_clipped_to_the_image():
+    assert pad_region((2, 3, 10, 10), 5, 14, 100) == (0, 0, 14, 18)
+
+
+def test_coverage():
+    assert region_coverage([(0, 0, 10, 10), (20, 20, 10, 10)], 100, 10) == 0.2
+    assert region_coverage([], 0, 0) == 0.0
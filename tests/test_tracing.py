@@ -0,0 +1,86 @@
+import json
+import threading
+import pytest
+from core.tracing import Tracer
+
+
+def test_nested_spans_share_the_trace_and_link_parents():
+    tracer = Tracer()
+    with tracer.span('command', source='chat') as outer:
+        with tracer.span('ocr') as inner:
+            inner.set('tiles', 4)
+    spans = {s['name']: s for s in tracer.recent_spans()}
+    assert spans['ocr']['trace_id'] == spans['command']['trace_id'] == outer.trace_id
+    assert spans['ocr']['parent_id'] == outer.span_id
+    assert spans['command']['parent_id'] is None
+    assert spans['ocr']['attributes'] == {'tiles': 4}
+    assert spans['command']['attributes'] == {'source': 'chat'}
+
+
+def test_threads_start_their_own_traces():
+    tracer = Tracer()
+    with tracer.span('main'):
+        thread = threading.Thread(target=lambda: tracer.span('worker').__enter__().__exit__(None, None, None))
+        thread.start()
+        thread.join()
+    spans = {s['name']: s for s in tracer.recent_spans()}
+    assert spans['worker']['trace_id'] != spans['main']['trace_id']
+    assert spans['worker']['parent_id'] is None
+
+
+def test_errors_are_recorded_and_reraised():
+    tracer = Tracer()
+    with pytest.raises(RuntimeError):
+        with tracer.span('llm'):
+            raise RuntimeError('timeout')
+    with tracer.span('llm'):
+        pass
+    assert tracer.recent_spans(name='llm')[0]['error'] == 'RuntimeError: timeout'
+    assert tracer.summary()['llm']['count'] == 2
+    assert tracer.summary()['llm']['errors'] == 1
+
+
+def test_buffer_is_bounded():
+    tracer = Tracer(buffer_size=3)
+    for i in range(5):
+        with tracer.span(f'stage {i}'):
+            pass
+    assert [s['name'] for s in tracer.recent_spans()] == ['stage 2', 'stage 3', 'stage 4']
+    assert len(tracer.summary()) == 5
+
+
+def test_listeners_see_finished_spans_and_failures_are_contained():
+    tracer = Tracer()
+    seen = []
+    tracer.add_listener(lambda record: 1 / 0)
+    tracer.add_listener(seen.append)
+    with tracer.span('capture'):
+        pass
+    assert [r['name'] for r in seen] == ['capture']
+    tracer.remove_listener(seen.append)
+    with tracer.span('capture'):
+        pass
+    assert len(seen) == 1
+
+
+def test_prometheus_output_includes_stages_and_numeric_sources():
+    tracer = Tracer()
+    tracer.register_metrics('ocr_cache', lambda: {'hits': 3, 'hit_rate': 0.5, 'enabled': True, 'mode': 'exact'})
+    tracer.register_metrics('broken', lambda: 1 / 0)
+    with tracer.span('ocr'):
+        pass
+    text = tracer.render_prometheus()
+    assert 'altqu_stage_duration_seconds_count{stage="ocr"} 1' in text
+    assert 'altqu_stage_errors_total{stage="ocr"} 0' in text
+    assert 'altqu_ocr_cache_hits 3' in text
+    assert 'altqu_ocr_cache_hit_rate 0.5' in text
+    assert 'enabled' not in text and 'mode' not in text
+
+
+def test_trace_file_gets_one_json_line_per_span(tmp_path):
+    tracer = Tracer()
+    tracer.configure(trace_file=str(tmp_path / 'trace.jsonl'))
+    with tracer.span('capture', width=1920):
+        pass
+    records = [json.loads(line) for line in (tmp_path / 'trace.jsonl').read_text().splitlines()]
+    assert [(r['name'], r['attributes']) for r in records] == [('capture', {'width': 1920})]
@@ -0,0 +1,104 @@
+from ui.ui_bridge import UIBridge
+
+
+class FakeRoot:
+    """Stands in for Tk: after() callbacks are run by the test"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+
+
+def make_bridge(**kwargs):
+    bridge = UIBridge(FakeRoot(), **kwargs)
+    received = []
+    for kind in ('status', 'analysis', 'stage', 'llm_stream', 'show'):
+        bridge.on(kind, lambda payload, kind=kind: received.append((kind, payload)))
+    return bridge, received
+
+
+def test_coalesced_kinds_deliver_only_the_newest_value():
+    bridge, received = make_bridge()
+    for i in range(5):
+        bridge.post('status', i)
+        bridge.post('analysis', f'analysis {i}')
+    bridge.drain()
+    assert sorted(received) == [('analysis', 'analysis 4'), ('status', 4)]
+
+
+def test_batched_kinds_arrive_as_one_list():
+    bridge, received = make_bridge()
+    for i in range(3):
+        bridge.post('stage', {'name': f'stage {i}'})
+    bridge.drain()
+    assert received == [('stage', [{'name': 'stage 0'}, {'name': 'stage 1'}, {'name': 'stage 2'}])]
+
+
+def test_stream_chunks_are_concatenated():
+    bridge, received = make_bridge()
+    for chunk in ('{"type"', ': "web', '_search"}'):
+        bridge.post('llm_stream', chunk)
+    bridge.drain()
+    assert received == [('llm_stream', '{"type": "web_search"}')]
+
+
+def test_coalesced_state_keeps_its_place_between_ordered_events():
+    bridge, received = make_bridge()
+    bridge.post('status', 'old')
+    bridge.post('status', 'shown')
+    bridge.post('show')
+    bridge.post('status', 'newer')
+    bridge.post('status', 'newest')
+    bridge.post('show', 'again')
+    bridge.drain()
+    assert received == [('status', 'shown'), ('show', None), ('status', 'newest'), ('show', 'again')]
+
+
+def test_batches_before_an_ordered_event_are_flushed_first():
+    bridge, received = make_bridge()
+    bridge.on('progress_reset', lambda payload: received.append(('progress_reset', payload)))
+    bridge.post('stage', 'capture')
+    bridge.post('llm_stream', 'partial')
+    bridge.post('stage', 'ocr')
+    bridge.post('progress_reset')
+    bridge.post('stage', 'next')
+    bridge.drain()
+    assert received == [
+        ('llm_stream', 'partial'),
+        ('stage', ['capture', 'ocr']),
+        ('progress_reset', None),
+        ('stage', ['next'])
+    ]
+
+
+def test_drain_is_bounded_per_tick():
+    bridge, received = make_bridge(max_batch=10)
+    for i in range(25):
+        bridge.post('show', i)
+    bridge.drain()
+    assert [payload for _, payload in received] == list(range(10))
+    bridge.drain()
+    bridge.drain()
+    assert [payload for _, payload in received] == list(range(25))
+
+
+def test_failing_handler_does_not_block_the_rest():
+    bridge, received = make_bridge()
+    bridge.on('show', lambda payload: 1 / 0)
+    bridge.post('show')
+    bridge.post('status', 'still delivered')
+    bridge.drain()
+    assert received == [('status', 'still delivered')]
+
+
+def test_tick_reschedules_until_stopped():
+    bridge, _ = make_bridge(tick_ms=5)
+    bridge.start()
+    assert len(bridge.root.scheduled) == 1
+    bridge.root.scheduled.pop()[1]()
+    assert len(bridge.root.scheduled) == 1
+    bridge.stop()
+    bridge.root.scheduled.pop()[1]()
+    assert bridge.root.scheduled == []
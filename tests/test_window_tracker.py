@@ -0,0 +1,74 @@
+from core.window_tracker import UNKNOWN_WINDOW, WindowTracker, extract_app_name
+
+
+class FakeSource:
+    name = 'fake'
+
+    def __init__(self):
+        self.active = None
+
+    def active_window(self):
+        if isinstance(self.active, Exception):
+            raise self.active
+        return self.active
+
+
+def make_tracker():
+    tracker = WindowTracker()
+    tracker.source = FakeSource()
+    changes = []
+    tracker.subscribe(changes.append)
+    return tracker, tracker.source, changes
+
+
+def test_extract_app_name():
+    assert extract_app_name('lofi beats - Spotify Premium') == 'Spotify'
+    # Earlier COMMON_APPS entries win over later ones in the same title
+    assert extract_app_name('Word count - Google Chrome') == 'Google Chrome'
+    assert extract_app_name('notes.txt - gedit') == 'notes.txt'
+    assert extract_app_name('Terminal') == 'Terminal'
+
+
+def test_refresh_notifies_only_on_changes_and_reuses_info():
+    tracker, source, changes = make_tracker()
+    source.active = (1, 'README - Visual Studio Code', (0, 0, 800, 600))
+    assert tracker.refresh()
+    first = tracker.info
+    assert first['app_name'] == 'VS Code'
+    assert not tracker.refresh()
+
+    source.active = (2, 'Inbox - Outlook', (0, 0, 800, 600))
+    assert tracker.refresh()
+    source.active = (1, 'README - Visual Studio Code', (0, 0, 800, 600))
+    assert tracker.refresh()
+    assert tracker.info is first
+    assert [info['window_id'] for info in changes] == [1, 2, 1]
+    assert tracker.metrics() == {'changes': 3, 'known_windows': 2}
+
+
+def test_title_or_bounds_change_replaces_the_info():
+    tracker, source, changes = make_tracker()
+    source.active = (1, 'a - Firefox', (0, 0, 800, 600))
+    tracker.refresh()
+    source.active = (1, 'a - Firefox', (0, 0, 1024, 768))
+    assert tracker.refresh()
+    assert tracker.info['bounds'] == (0, 0, 1024, 768)
+    assert len(changes) == 2
+
+
+def test_lookup_failures_fall_back_to_unknown():
+    tracker, source, changes = make_tracker()
+    source.active = (1, 'Slack', None)
+    tracker.refresh()
+    source.active = RuntimeError('display closed')
+    assert tracker.refresh()
+    assert tracker.info is UNKNOWN_WINDOW
+    assert not tracker.refresh()
+    assert tracker.last_error == 'display closed'
+
+
+def test_without_a_window_system_current_is_unknown(monkeypatch):
+    tracker = WindowTracker()
+    monkeypatch.setattr(tracker, 'create_source', lambda: None)
+    assert tracker.current() is UNKNOWN_WINDOW
+    assert tracker._thread is False
@@ -1,6 +1,20 @@
 import tkinter as tk
 from tkinter import ttk
+import os
 import threading
+import time
+from collections import deque
+from core.profiler import profiler, parse_duration
+from core.speculation import SpeculativeInference
+from core.tracing import tracer
+from ui.ui_bridge import UIBridge
+
+# Spans shown in the progress panel
+PROGRESS_STAGES = (
+    'hotkey', 'screen_analysis', 'capture', 'ocr', 'ui_detection', 'activation_ready',
+    'command', 'macro_replay', 'speculative_inference', 'deadline_race', 'llm_request', 'json_parse',
+    'execution', 'plan_step', 'persistence'
+)
 
 class ChatInterface:
     def __init__(self, ai_engine, executor, context_manager, root=None, screen_intelligence=None):
@@ -9,6 +23,20 @@ class ChatInterface:
         self.context_manager = context_manager
         self.screen_intelligence = screen_intelligence
         self.current_screen_analysis = None
+        self.screen_analysis_time = 0
+        # Set by the app; every analysis goes through it so they never stack up
+        self.analysis_scheduler = None
+        
+        # Start inference while the user is still typing (ALTQU_SPECULATE=0 disables)
+        self.speculation = SpeculativeInference(ai_engine) if os.environ.get('ALTQU_SPECULATE', '1') != '0' else None
+        self.speculation_delay_ms = 350
+        self._speculation_after_id = None
+        # Speculation waiting for the analysis a stale-analysis refresh will deliver
+        self._speculate_after_refresh = False
+        
+        # Recent stage timings for the progress panel
+        self.stage_records = deque(maxlen=40)
+        self.progress_expanded = False
         
         # Use provided root or create new one
         if root:
@@ -19,6 +47,20 @@ class ChatInterface:
             self.setup_ui()
             self.root.withdraw()
         
+        # Worker threads talk to Tk only through the bridge
+        self.bridge = UIBridge(self.root)
+        self.bridge.on('status', self._command_completed)
+        self.bridge.on('analysis', self.set_current_screen_analysis)
+        self.bridge.on('show', lambda _: self.show_interface())
+        self.bridge.on('progress_reset', self._reset_progress)
+        self.bridge.on('stage', self._add_stages)
+        self.bridge.on('llm_stream', self._append_stream)
+        self.bridge.start()
+        tracer.add_listener(self._on_span)
+        # Newest deadline run that streamed into the panel
+        self.stream_run_id = 0
+        self.ai_engine.stream_listener = self._on_llm_chunk
+        
     def setup_ui(self):
         # Create a toplevel window for the chat interface
         self.chat_window = tk.Toplevel(self.root)
@@ -56,6 +98,7 @@ class ChatInterface:
         self.input_field.bind('<Escape>', lambda e: self.hide_interface())
         self.input_field.bind('<Control-w>', lambda e: self.hide_interface())  # Ctrl+W to close
         self.input_field.bind('<Control-Return>', lambda e: self.process_input(e))  # Ctrl+Enter to execute
+        self.input_field.bind('<KeyRelease>', self.on_key_release)
         
         
         # Button frame
@@ -86,6 +129,30 @@ class ChatInterface:
         )
         self.cancel_button.pack(side='right')
         
+        # Expandable progress panel: stage timings and streamed model output
+        self.details_button = tk.Button(
+            button_frame,
+            text="Details ▸",
+            command=self.toggle_progress_panel,
+            bg='#3c3c3c',
+            fg='white',
+            font=('Arial', 9),
+            relief='flat'
+        )
+        self.details_button.pack(side='left')
+        
+        self.progress_frame = tk.Frame(main_frame, bg='#2b2b2b')
+        self.stage_text = tk.Text(
+            self.progress_frame, height=7, bg='#1e1e1e', fg='#cfcfcf',
+            font=('Courier', 9), relief='flat', state='disabled'
+        )
+        self.stage_text.pack(fill='x', pady=(0, 5))
+        self.stream_text = tk.Text(
+            self.progress_frame, height=4, bg='#1e1e1e', fg='#9cdcfe',
+            font=('Courier', 9), relief='flat', wrap='char', state='disabled'
+        )
+        self.stream_text.pack(fill='x')
+        
         # Hide initially
         self.chat_window.withdraw()
         
@@ -93,19 +160,144 @@ class ChatInterface:
         user_input = self.input_var.get().strip()
         if not user_input:
             return
+        
+        if user_input.startswith('/profile'):
+            self.start_profiling(user_input[len('/profile'):])
+            return
             
-        # Update status
+        # Update status; Tk repaints as soon as this handler returns
         self.status_label.config(text="Processing command...")
-        self.chat_window.update()
+        self.bridge.post('progress_reset')
         
         # Process in separate thread to avoid blocking UI
-        threading.Thread(target=self._execute_command, args=(user_input,), daemon=True).start()
+        threading.Thread(target=self._execute_command, args=(user_input,), name='altqu-command', daemon=True).start()
+        
+        
+    
+    def on_key_release(self, event):
+        """Debounce keystrokes, then speculate on the current text"""
+        if self.speculation is None or event.keysym in ('Return', 'Escape'):
+            return
+        if self._speculation_after_id is not None:
+            self.root.after_cancel(self._speculation_after_id)
+        self._speculation_after_id = self.root.after(self.speculation_delay_ms, self._speculate)
+    
+    def _speculate(self):
+        self._speculation_after_id = None
+        text = self.input_var.get().strip()
+        if not text or text.startswith('/'):
+            return
+        if self.executor.macros is not None and self.executor.macros.match(text):
+            # A recorded macro will handle it without inference
+            return
+        
+        # A stale analysis is refreshed first; speculating against it could never
+        # hit, since the command will run against the refreshed one
+        if time.time() - self.screen_analysis_time > 15 and self.analysis_scheduler:
+            self._speculate_after_refresh = True
+            self.refresh_screen_analysis()
+            return
         
+        self.speculation.submit(text, self.current_screen_analysis)
+    
+    def set_analysis_scheduler(self, analysis_scheduler):
+        self.analysis_scheduler = analysis_scheduler
+    
+    def refresh_screen_analysis(self):
+        """Re-run screen analysis in the background; the result arrives via post_screen_analysis"""
+        self.analysis_scheduler.refresh()
+    
+    def start_profiling(self, duration_text):
+        """Handle '/profile 30s' - sample worker threads without a restart"""
+        self.input_var.set("")
+        if duration_text.strip() == 'stop':
+            profiler.stop()
+            self.status_label.config(text="Stopping profiler...")
+            return
+        
+        duration = parse_duration(duration_text)
         
+        def on_complete(report):
+            message = f"Profile saved: {report['summary']}" if report else "Profiling failed"
+            self.post_status(message)
+        
+        if profiler.start(duration, on_complete):
+            self.status_label.config(text=f"Profiling for {duration:g}s - keep using the assistant...")
+        else:
+            self.status_label.config(text="Profiler already running")
+    
+    def post_status(self, message):
+        """Thread-safe status update; only the newest message per tick is drawn"""
+        self.bridge.post('status', message)
+    
+    def post_screen_analysis(self, screen_analysis):
+        """Thread-safe hand-off of a finished screen analysis"""
+        self.bridge.post('analysis', screen_analysis)
+    
+    def post_show(self):
+        """Thread-safe request to show the window"""
+        self.bridge.post('show')
+    
+    def toggle_progress_panel(self):
+        self.progress_expanded = not self.progress_expanded
+        if self.progress_expanded:
+            self.progress_frame.pack(fill='both', expand=True, pady=(5, 0))
+            self.chat_window.geometry("500x330")
+            self.details_button.config(text="Details ▾")
+            self._render_stages()
+        else:
+            self.progress_frame.pack_forget()
+            self.chat_window.geometry("500x120")
+            self.details_button.config(text="Details ▸")
+    
+    def _on_span(self, record):
+        # Runs on the thread that finished the span
+        if record['name'] in PROGRESS_STAGES:
+            self.bridge.post('stage', record)
+    
+    def _on_llm_chunk(self, model, text, run):
+        # Runs on the LLM thread. Speculative runs (run is None) are usually
+        # discarded; chunks from a run that lost its race, or that a newer
+        # command has superseded, would interleave with the committed answer.
+        if run is None or run.is_set() or run.run_id < self.stream_run_id:
+            return
+        self.stream_run_id = run.run_id
+        self.bridge.post('llm_stream', text)
+    
+    def _reset_progress(self, _):
+        self.stage_records.clear()
+        for widget in (self.stage_text, self.stream_text):
+            widget.config(state='normal')
+            widget.delete('1.0', 'end')
+            widget.config(state='disabled')
+    
+    def _add_stages(self, records):
+        self.stage_records.extend(records)
+        if self.progress_expanded:
+            self._render_stages()
+    
+    def _render_stages(self):
+        lines = []
+        for record in self.stage_records:
+            attributes = record['attributes']
+            detail = attributes.get('model') or attributes.get('decision') or attributes.get('command_type') or ''
+            status = ' ✗' if record['error'] else ''
+            lines.append(f"{record['name']:<22}{record['duration_ms']:>9.1f} ms  {detail}{status}")
+        self.stage_text.config(state='normal')
+        self.stage_text.delete('1.0', 'end')
+        self.stage_text.insert('end', '\n'.join(lines[-int(self.stage_text.cget('height')):]))
+        self.stage_text.config(state='disabled')
+    
+    def _append_stream(self, text):
+        self.stream_text.config(state='normal')
+        self.stream_text.insert('end', text)
+        self.stream_text.see('end')
+        self.stream_text.config(state='disabled')
     
     def set_current_screen_analysis(self, screen_analysis):
         """Set the current screen analysis with progressive updates"""
         self.current_screen_analysis = screen_analysis
+        self.screen_analysis_time = time.time() if screen_analysis else 0
         
         if screen_analysis:
             app_name = screen_analysis.get('current_app', {}).get('app_name', 'Unknown')
@@ -119,32 +311,54 @@ class ChatInterface:
         if hasattr(self, 'status_label'):
             self.status_label.config(text=status_text)
         
+        if screen_analysis and self._speculate_after_refresh:
+            self._speculate_after_refresh = False
+            self._speculate()
     
     def _execute_command(self, user_input):
         try:
-            # Use intelligent processing
-            parsed_command = self.ai_engine.process_intelligent_command(
-                user_input, 
-                self.current_screen_analysis
-            )
-            
-            # Execute with intelligence
-            self.executor.execute_intelligent_command(
-                parsed_command, 
-                self.current_screen_analysis
-            )
+            screen_analysis = self.current_screen_analysis
+            macros = self.executor.macros
+            with tracer.span('command', chars=len(user_input)) as span:
+                # Recorded workflows replay without analysis or inference
+                if macros is not None and macros.run(user_input, self.executor):
+                    span.set('macro', True)
+                    self.post_status("Macro replayed!")
+                    return
+                
+                # Reuse the speculation for this exact text; one still in flight
+                # races the fallback like a fresh LLM call, under the same SLO
+                speculated = self.speculation.take(user_input, screen_analysis) if self.speculation else None
+                span.set('speculation_hit', speculated is not None)
+                parsed_command = self.ai_engine.process_with_deadline(
+                    user_input,
+                    screen_analysis,
+                    speculated
+                )
+                
+                # Execute with intelligence, recording the commands it runs
+                with tracer.span('execution', command_type=parsed_command.get('type')):
+                    if macros is not None:
+                        macros.start_recording(user_input)
+                    ok = self.executor.execute_intelligent_command(
+                        parsed_command, 
+                        screen_analysis
+                    )
+                    if macros is not None:
+                        macros.finish_recording(ok)
+                
+                # Save interaction
+                with tracer.span('persistence'):
+                    self.context_manager.save_interaction(
+                        user_input,
+                        parsed_command,
+                        screen_analysis
+                    )
             
-            # Save interaction
-            self.context_manager.save_interaction(
-                user_input,
-                str(parsed_command),
-                self.current_screen_analysis
-            )
-            
-            self.root.after(0, self._command_completed, "Intelligent command executed!")
+            self.post_status("Intelligent command executed!")
             
         except Exception as e:
-            self.root.after(0, self._command_completed, f"Error: {str(e)}")
+            self.post_status(f"Error: {str(e)}")
             
     def _command_completed(self, message):
         self.status_label.config(text=message)
@@ -161,5 +375,15 @@ class ChatInterface:
         
     def hide_interface(self):
         """Hide the chat interface"""
+        if self.speculation:
+            self.speculation.cancel()
+        self._speculate_after_refresh = False
         self.input_var.set("")
         self.chat_window.withdraw()
+    
+    def close(self):
+        """Detach from the tracer and engine and stop the UI tick"""
+        self.bridge.stop()
+        tracer.remove_listener(self._on_span)
+        if self.ai_engine.stream_listener == self._on_llm_chunk:
+            self.ai_engine.stream_listener = None
@@ -0,0 +1,93 @@
+import queue
+
+# Event kinds where only the newest value matters within one tick
+COALESCED_KINDS = ('status', 'analysis')
+# Event kinds delivered to their handler as one list per tick
+BATCHED_KINDS = ('stage',)
+
+
+class UIBridge:
+    """Thread-safe hand-off from worker threads to the Tk main loop.
+
+    Workers call post() from any thread. The Tk thread drains the queue on
+    a fixed after() tick, keeps only the latest value for coalesced kinds,
+    hands batched kinds over as a list and concatenates streamed text, so
+    the number of Tk calls per tick stays bounded whatever the load.
+    """
+
+    def __init__(self, root, tick_ms=25, max_batch=500):
+        self.root = root
+        self.tick_ms = tick_ms
+        self.max_batch = max_batch
+        self.events = queue.Queue()
+        self.handlers = {}
+        self.running = False
+
+    def on(self, kind, handler):
+        """Register handler(payload) for an event kind.
+
+        Batched kinds receive a list of payloads and '*stream' kinds the
+        concatenated text of every chunk posted since the last tick.
+        """
+        self.handlers[kind] = handler
+
+    def post(self, kind, payload=None):
+        """Queue an event; safe to call from any thread"""
+        self.events.put((kind, payload))
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.root.after(self.tick_ms, self._tick)
+
+    def stop(self):
+        self.running = False
+
+    def _tick(self):
+        try:
+            self.drain()
+        finally:
+            if self.running:
+                self.root.after(self.tick_ms, self._tick)
+
+    def drain(self):
+        """Process up to max_batch queued events on the Tk thread.
+
+        Coalesced, batched and streamed kinds are merged only between
+        ordered events: pending merged values are flushed before each
+        ordered event, so a 'progress_reset' still lands after the stage
+        records posted before it and a 'show' after the status set for it.
+        """
+        pending = {}
+        for _ in range(self.max_batch):
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind in COALESCED_KINDS:
+                pending.pop(kind, None)
+                pending[kind] = payload
+            elif kind in BATCHED_KINDS or kind.endswith('stream'):
+                # Re-insert so pending kinds flush in order of their last event
+                pending[kind] = pending.pop(kind, [])
+                pending[kind].append(payload)
+            else:
+                self._flush(pending)
+                self._dispatch(kind, payload)
+        self._flush(pending)
+
+    def _flush(self, pending):
+        for kind, value in pending.items():
+            if kind.endswith('stream'):
+                value = ''.join(value)
+            self._dispatch(kind, value)
+        pending.clear()
+
+    def _dispatch(self, kind, payload):
+        handler = self.handlers.get(kind)
+        if handler is None:
+            return
+        try:
+            handler(payload)
+        except Exception as e:
+            print(f"UI handler for {kind} failed: {e}")